@@ -0,0 +1,145 @@
+"""
+Compares GraphTool's CSR backend with the NetworkX backend on random API-like graphs
+(string node ids, skewed out-degrees) of growing size: build time, memory allocated by the
+build, and median query time per SearchMethod. Then measures A* through GraphTool: cold
+queries without and with a landmark index (ALT), and repeated (cached) queries.
+
+    python benchmarks/graph_backends.py [--sizes 10000 100000 1000000] [--queries 20]
+                                        [--graph zipf|grid] [--landmarks 8] [--json]
+
+ALT pays off on graphs with long shortest paths (--graph grid); on small-world graphs like
+the zipf ones most nodes are a hop or two from a hub, and it saves little.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import networkx  # noqa: F401  (imported up front so the NetworkX build times exclude it)
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inspector_gadget.graph import CSRGraph, GraphTool, NetworkXGraph, SearchMethod  # noqa: E402
+
+BACKENDS = {"csr": CSRGraph, "networkx": NetworkXGraph}
+
+
+def random_frames(num_edges, seed=0):
+    """
+    Returns (nodes, edges) frames with about num_edges / 8 nodes; sources follow a Zipf-like
+    distribution, so a few hub nodes have most of the out-edges, as in call graphs.
+    """
+    rng = np.random.default_rng(seed)
+    num_nodes = max(2, num_edges // 8)
+    ids = np.array([f"pkg.module{i % 97}.member_{i}" for i in range(num_nodes)], dtype=object)
+    sources = np.minimum(rng.zipf(1.3, num_edges) - 1, num_nodes - 1)
+    edges = pd.DataFrame({
+        "source": ids[rng.permutation(num_nodes)[sources]],
+        "target": ids[rng.integers(0, num_nodes, num_edges)],
+        "weight": rng.integers(1, 10, num_edges).astype(np.float64),
+    })
+    return pd.DataFrame({"id": ids}), edges
+
+
+def grid_frames(num_edges, seed=0):
+    """
+    Returns (nodes, edges) frames of a square grid with about num_edges directed edges (both
+    directions between neighbours) and random weights.
+    """
+    rng = np.random.default_rng(seed)
+    side = max(2, int((num_edges / 4) ** 0.5))
+    numbers = np.arange(side * side)
+    row, column = numbers // side, numbers % side
+    steps = [(column < side - 1, 1), (row < side - 1, side), (column > 0, -1), (row > 0, -side)]
+    src = np.concatenate([numbers[mask] for mask, _ in steps])
+    dst = np.concatenate([numbers[mask] + step for mask, step in steps])
+    ids = np.array([f"cell_{i}" for i in numbers], dtype=object)
+    edges = pd.DataFrame({"source": ids[src], "target": ids[dst], "weight": rng.integers(1, 10, len(src)).astype(np.float64)})
+    return pd.DataFrame({"id": ids}), edges
+
+
+GRAPHS = {"zipf": random_frames, "grid": grid_frames}
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def astar_queries(nodes, edges, pairs, landmarks):
+    """
+    Runs the A* queries twice through a GraphTool (cold, then from the result cache) and
+    returns median times, the landmark index build time and the nodes explored per cold query.
+    """
+    tool = GraphTool(nodes, edges, landmarks=landmarks)
+    _, index_seconds = timed(tool.landmark_index)
+    cold = [timed(tool.search, SearchMethod.ASTAR, source, target)[1] for source, target in pairs]
+    cached = [timed(tool.search, SearchMethod.ASTAR, source, target)[1] for source, target in pairs]
+    info = tool.cache_info()
+    return {"index_s": index_seconds, "cold_ms": statistics.median(cold) * 1e3,
+            "cached_us": statistics.median(cached) * 1e6, "explored": info["explored"] / len(pairs),
+            "hit_rate": info["hit_rate"], "index_mb": info["landmark_bytes"] / 2 ** 20}
+
+
+def run(num_edges, queries, seed=0, graph="zipf", landmarks=8):
+    nodes, edges = GRAPHS[graph](num_edges, seed)
+    rng = np.random.default_rng(seed + 1)
+    if graph == "zipf":
+        hubs = edges["source"].value_counts().index[:50].to_numpy()
+        pairs = [(hubs[rng.integers(0, len(hubs))], nodes["id"].iloc[rng.integers(0, len(nodes))]) for _ in range(queries)]
+    else:
+        pairs = [tuple(nodes["id"].iloc[rng.integers(0, len(nodes), 2)]) for _ in range(queries)]
+
+    report = {"edges": num_edges, "nodes": len(nodes)}
+    for name, backend in BACKENDS.items():
+        tracemalloc.start()
+        graph, build_seconds = timed(backend.from_frames, nodes, edges)
+        build_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        result = {"build_s": build_seconds, "build_mb": build_bytes / 2 ** 20}
+        for method in SearchMethod:
+            options = {"width": 4} if method == SearchMethod.BEAM else {}
+            samples = [timed(graph.search, method, source, target, **options)[1] for source, target in pairs]
+            result[f"{method.value}_ms"] = statistics.median(samples) * 1e3
+        report[name] = result
+        del graph
+    report["astar"] = astar_queries(nodes, edges, pairs, 0)
+    report["astar_alt"] = astar_queries(nodes, edges, pairs, landmarks)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--graph", choices=sorted(GRAPHS), default="zipf")
+    parser.add_argument("--landmarks", type=int, default=8, help="landmarks for the ALT measurements")
+    parser.add_argument("--json", action="store_true", help="print the measurements as JSON")
+    args = parser.parse_args(argv)
+
+    reports = [run(size, args.queries, graph=args.graph, landmarks=args.landmarks) for size in args.sizes]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    columns = ["build_s", "build_mb"] + [f"{method.value}_ms" for method in SearchMethod]
+    print(f"{'edges':>9} {'backend':>9} " + " ".join(f"{column:>12}" for column in columns))
+    for report in reports:
+        for name in BACKENDS:
+            values = " ".join(f"{report[name][column]:>12.3f}" for column in columns)
+            print(f"{report['edges']:>9} {name:>9} {values}")
+    columns = ["index_s", "index_mb", "cold_ms", "cached_us", "explored", "hit_rate"]
+    print(f"\n{'edges':>9} {'A*':>9} " + " ".join(f"{column:>12}" for column in columns))
+    for report in reports:
+        for name in ("astar", "astar_alt"):
+            values = " ".join(f"{report[name][column]:>12.3f}" for column in columns)
+            print(f"{report['edges']:>9} {name:>9} {values}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Measures the cost of `import inspector_gadget` in fresh interpreters and fails when it
+exceeds a budget, or when the import drags in a heavy dependency.
+
+    python benchmarks/import_time.py [--budget-ms 50] [--runs 7] [--statement "import inspector_gadget"]
+
+The reported time is the median over runs of the import alone: the same interpreter start
+(`python -c pass`) is measured and subtracted.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Importing the package must not load any of these; they load with the submodules that need them
+HEAVY_MODULES = ("outlines", "lark", "networkx", "pandas", "pyarrow", "numpy", "tiktoken", "lancedb")
+
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+exec(compile({statement!r}, "<import>", "exec"))
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "heavy": sorted(name for name in {heavy!r} if name in sys.modules),
+}}))
+"""
+
+
+def probe(statement):
+    """
+    Runs statement in a fresh interpreter (with the repo on sys.path) and returns the
+    probe's measurements: import seconds, peak RSS and the heavy modules it loaded.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO, os.environ.get("PYTHONPATH")])))
+    code = _PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"{statement!r} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(statement, runs):
+    baseline = [probe("pass") for _ in range(runs)]
+    samples = [probe(statement) for _ in range(runs)]
+    return {
+        "statement": statement,
+        "runs": runs,
+        "median_ms": statistics.median(s["seconds"] for s in samples) * 1e3,
+        "min_ms": min(s["seconds"] for s in samples) * 1e3,
+        "rss_kb": statistics.median(s["max_rss_kb"] for s in samples)
+                  - statistics.median(s["max_rss_kb"] for s in baseline),
+        "heavy_modules": samples[-1]["heavy"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--statement", default="import inspector_gadget")
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="print the measurements as JSON")
+    args = parser.parse_args(argv)
+
+    report = measure(args.statement, args.runs)
+    report["budget_ms"] = args.budget_ms
+    report["ok"] = report["median_ms"] <= args.budget_ms and not report["heavy_modules"]
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['statement']}: {report['median_ms']:.1f} ms median ({report['min_ms']:.1f} ms min) "
+              f"over {args.runs} runs, +{report['rss_kb'] / 1024:.1f} MB RSS, budget {args.budget_ms:.0f} ms")
+        if report["heavy_modules"]:
+            print(f"Heavy modules loaded at import: {', '.join(report['heavy_modules'])}")
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
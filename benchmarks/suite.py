@@ -0,0 +1,305 @@
+"""
+End-to-end benchmark suite: times the pipeline stages on pinned fixture libraries (the stdlib
+json and collections, and networkx when installed) and GraphTool searches on synthetic graphs,
+writes the results as JSON, and compares them with a stored baseline.
+
+    python benchmarks/suite.py [--fixtures json collections networkx] [--sizes 1000 10000 100000]
+                               [--stages ...] [--repeat 5] [--output results.json]
+                               [--baseline baseline.json] [--tolerance 0.25]
+
+Every (stage, fixture) runs in a fresh interpreter with an empty cache directory, so no stage
+inherits another's memory or warm caches. Per stage:
+
+    cold_ms        the first run
+    wall_ms        median of the next `repeat` runs (one run if the first took over 2 s)
+    rss_mb         growth of the process's peak RSS over the stage's setup
+    alloc_peak_mb  tracemalloc peak of one more run (traced separately from the timings)
+    alloc_blocks   memory blocks that run allocated and kept
+
+With --baseline the exit status is 1 when a stage's wall_ms or alloc_peak_mb is worse than
+the baseline's by more than the tolerance (and more than --floor-ms / --floor-mb), so a
+release can be gated on it. Fixture versions are recorded; comparing across versions warns.
+The exit status is also 1 when a stage fails (e.g. the sandboxed extraction worker can't start).
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+FIXTURES = ("json", "collections", "networkx")
+SIZES = (1_000, 10_000, 100_000)
+LIBRARY_STAGES = ("extract_functions", "extract_classes", "extract_sandboxed", "grammar", "lark_parser",
+                  "parser_cache_load", "tool_description")
+GRAPH_STAGES = ("graph_build", "graph_bfs", "graph_dfs", "graph_beam", "graph_dijkstra", "graph_astar")
+GRAPH_QUERIES = 20
+SLOW_STAGE_SECONDS = 2.0  # a stage whose first run takes longer is repeated once only
+
+
+# --- Stages ---
+# Each stage function does its setup and returns the zero-argument callable that is measured.
+
+def _library(fixture):
+    from inspector_gadget import extract_module_functions
+
+    module = importlib.import_module(fixture)
+    return module, extract_module_functions(module)
+
+
+def stage_extract_functions(fixture):
+    from inspector_gadget import extract_module_functions
+
+    module = importlib.import_module(fixture)
+    return lambda: extract_module_functions(module)
+
+
+def stage_extract_classes(fixture):
+    from inspector_gadget import extract_module_classes
+
+    module = importlib.import_module(fixture)
+    return lambda: extract_module_classes(module)
+
+
+def stage_extract_sandboxed(fixture):
+    from inspector_gadget import SubprocessInspector
+
+    inspector = SubprocessInspector()
+    return lambda: inspector.extract(fixture)  # the worker runs the package as installed
+
+
+def stage_grammar(fixture):
+    from inspector_gadget import convert_to_lark_grammar
+
+    _, api_map = _library(fixture)
+    return lambda: convert_to_lark_grammar(api_map)
+
+
+def stage_lark_parser(fixture):
+    import lark
+
+    from inspector_gadget import convert_to_lark_grammar
+
+    grammar = convert_to_lark_grammar(_library(fixture)[1])
+    return lambda: lark.Lark(grammar, parser="lalr")
+
+
+def stage_parser_cache_load(fixture):
+    from inspector_gadget import GrammarCache, convert_to_lark_grammar
+
+    grammar = convert_to_lark_grammar(_library(fixture)[1])
+    GrammarCache().parser(grammar)  # compiled and stored once; the runs load it from disk
+    return lambda: GrammarCache().parser(grammar)
+
+
+def stage_tool_description(fixture):
+    from inspector_gadget import convert_to_lark_grammar
+    from inspector_gadget.gadget import Gadget
+
+    module, api_map = _library(fixture)
+    gadget = Gadget(module, fixture, api_map, convert_to_lark_grammar(api_map))
+    return lambda: gadget.get_tool_description()
+
+
+def _graph_tool(size):
+    import numpy as np
+
+    from graph_backends import random_frames
+    from inspector_gadget.graph import GraphTool
+
+    nodes, edges = random_frames(size)
+    rng = np.random.default_rng(1)
+    hubs = edges["source"].value_counts().index[:50].to_numpy()
+    pairs = [(hubs[rng.integers(0, len(hubs))], nodes["id"].iloc[rng.integers(0, len(nodes))])
+             for _ in range(GRAPH_QUERIES)]
+    return nodes, edges, pairs, GraphTool
+
+
+def stage_graph_build(size):
+    nodes, edges, _, GraphTool = _graph_tool(size)
+    return lambda: GraphTool(nodes, edges, cache_size=0)
+
+
+def _graph_search(method):
+    def stage(size):
+        from inspector_gadget.graph import SearchMethod
+
+        nodes, edges, pairs, GraphTool = _graph_tool(size)
+        tool = GraphTool(nodes, edges, cache_size=0)  # no result cache: every run searches
+        options = {"width": 4} if method == "beam" else {}
+
+        def run():
+            for source, target in pairs:
+                tool.search(SearchMethod(method), source, target, **options)
+
+        return run
+    return stage
+
+
+STAGES = {name: globals()[f"stage_{name}"] for name in LIBRARY_STAGES + ("graph_build",)}
+STAGES.update((name, _graph_search(name[len("graph_"):])) for name in GRAPH_STAGES[1:])
+
+
+def _max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kilobytes on Linux
+
+
+def measure(stage, fixture, repeat):
+    """
+    Sets up stage for fixture (a module name, or a graph size in edges) in this process and
+    returns its measurements.
+    """
+    run = STAGES[stage](fixture)
+    rss_before = _max_rss_mb()
+    start = time.perf_counter()
+    run()
+    samples = [time.perf_counter() - start]
+    for _ in range(1 if samples[0] > SLOW_STAGE_SECONDS else repeat):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    rss_after = _max_rss_mb()
+
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    result = run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    blocks = sys.getallocatedblocks() - blocks
+    del result
+    return {"cold_ms": samples[0] * 1e3, "wall_ms": statistics.median(samples[1:] or samples) * 1e3,
+            "rss_mb": rss_after - rss_before, "alloc_peak_mb": peak / 2 ** 20, "alloc_blocks": blocks}
+
+
+def run_isolated(stage, fixture, repeat):
+    """
+    Runs measure() in a fresh interpreter with an empty cache directory and returns its
+    measurements, or {"error": ...}.
+    """
+    command = [sys.executable, os.path.abspath(__file__), "--worker", json.dumps([stage, fixture, repeat])]
+    with tempfile.TemporaryDirectory(prefix="inspector_gadget_bench_") as cache_dir:
+        env = dict(os.environ, INSPECTOR_GADGET_CACHE_DIR=cache_dir,
+                   PYTHONPATH=os.pathsep.join(filter(None, [REPO, os.environ.get("PYTHONPATH")])))
+        result = subprocess.run(command, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {"error": (result.stderr.strip().splitlines() or ["exit status %d" % result.returncode])[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def fixture_versions(fixtures):
+    versions = {"python": platform.python_version()}
+    for name in fixtures + ("lark", "numpy", "pandas"):
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            continue
+        versions[name] = getattr(module, "__version__", None) or versions["python"]
+    return versions
+
+
+def run_suite(fixtures, sizes, stages, repeat):
+    """
+    Returns {"meta": {...}, "results": {"stage[fixture]": measurements}} for the import of the
+    package and every selected stage.
+    """
+    from import_time import measure as measure_import
+
+    available = []
+    for name in fixtures:
+        try:
+            importlib.import_module(name)
+            available.append(name)
+        except ImportError:
+            print(f"Skipping fixture {name}: not installed")
+    results = {}
+    imported = measure_import("import inspector_gadget", repeat)
+    results["import[inspector_gadget]"] = {"wall_ms": imported["median_ms"], "cold_ms": imported["min_ms"],
+                                           "rss_mb": imported["rss_kb"] / 1024}
+    for stage in stages:
+        for fixture in (sizes if stage in GRAPH_STAGES else available):
+            key = f"{stage}[{fixture}]"
+            results[key] = run_isolated(stage, fixture, repeat)
+            print(f"{key:>36} " + (f"{results[key]['wall_ms']:>10.3f} ms" if "wall_ms" in results[key]
+                                    else results[key]["error"]), file=sys.stderr)
+    meta = {"repeat": repeat, "platform": platform.platform(), "versions": fixture_versions(tuple(available)),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    return {"meta": meta, "results": results}
+
+
+def compare(report, baseline, tolerance, floor_ms, floor_mb):
+    """
+    Returns (rows, regressions): one row (key, metric, baseline, current, change) per stage
+    and metric in both reports; regressions are the rows worse than tolerance allows.
+    """
+    rows, regressions = [], []
+    for key, current in report["results"].items():
+        previous = baseline["results"].get(key)
+        if not previous or "error" in previous or "error" in current:
+            continue
+        for metric, floor in (("wall_ms", floor_ms), ("alloc_peak_mb", floor_mb)):
+            if metric not in current or metric not in previous:
+                continue
+            change = current[metric] / previous[metric] - 1 if previous[metric] else 0.0
+            row = (key, metric, previous[metric], current[metric], change)
+            rows.append(row)
+            if change > tolerance and current[metric] - previous[metric] > floor:
+                regressions.append(row)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", nargs="+", default=list(FIXTURES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="graph sizes in edges")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results stored in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown / growth, as a fraction")
+    parser.add_argument("--floor-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--floor-mb", type=float, default=1.0, help="ignore memory growth smaller than this")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        stage, fixture, repeat = json.loads(args.worker)
+        print(json.dumps(measure(stage, fixture, repeat)))
+        return 0
+
+    report = run_suite(tuple(args.fixtures), args.sizes, args.stages, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    failed = [key for key, result in report["results"].items() if "error" in result]
+    for key in failed:
+        print(f"Failed: {key}: {report['results'][key]['error']}")
+    if not args.baseline:
+        return 1 if failed else 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    for name, version in baseline["meta"].get("versions", {}).items():
+        if report["meta"]["versions"].get(name, version) != version:
+            print(f"Warning: {name} is {report['meta']['versions'][name]}, the baseline used {version}")
+    rows, regressions = compare(report, baseline, args.tolerance, args.floor_ms, args.floor_mb)
+    print(f"{'stage':>36} {'metric':>13} {'baseline':>10} {'current':>10} {'change':>8}")
+    for key, metric, previous, current, change in rows:
+        flag = "  REGRESSION" if (key, metric, previous, current, change) in regressions else ""
+        print(f"{key:>36} {metric:>13} {previous:>10.3f} {current:>10.3f} {change:>+8.1%}{flag}")
+    print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+    return 1 if regressions or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,89 @@
-from .gadget  import Gadget, GadgetFactory
-from .graph   import GraphTool, SearchMethod
-from .utils   import extract_module_functions, extract_module_classes, convert_to_lark_grammar
-from .contexts import PythonAgentSystemPrompt, zen_of_python, Template
+import importlib
+from typing import TYPE_CHECKING
 
-__all__ = [
-    "Gadget",
-    "GadgetFactory",
-    "GraphTool",
-    "SearchMethod",
-    "extract_module_functions",
-    "extract_module_classes",
-    "convert_to_lark_grammar",
-    "PythonAgentSystemPrompt",
-    "zen_of_python",
-    "Template",
-]
+# Public names -> the submodule defining them. Submodules (and the heavy dependencies they pull
+# in: outlines, lark, networkx, pyarrow, ...) are imported on first attribute access (PEP 562),
+# so `import inspector_gadget` itself stays cheap; see benchmarks/import_time.py.
+_EXPORTS = {
+    "Gadget": "gadget",
+    "GadgetFactory": "gadget",
+    "GraphTool": "graph",
+    "SearchMethod": "graph",
+    "extract_module_functions": "utils",
+    "extract_module_classes": "utils",
+    "extract_class_methods": "utils",
+    "convert_to_lark_grammar": "utils",
+    "PythonAgentSystemPrompt": "contexts",
+    "zen_of_python": "contexts",
+    "Template": "contexts",
+    "APIMapCache": "cache",
+    "cached_extract": "cache",
+    "SourceIndex": "static",
+    "extract_source_functions": "static",
+    "extract_source_classes": "static",
+    "crawl_package": "crawler",
+    "flatten_api_map": "crawler",
+    "IncrementalAPIMap": "incremental",
+    "GrammarCache": "grammars",
+    "default_grammar_cache": "grammars",
+    "optimize_lark_grammar": "grammars",
+    "lexical_ranking": "slicing",
+    "select_members": "slicing",
+    "slice_grammar": "slicing",
+    "compile_slice": "slicing",
+    "APIIndex": "retrieval",
+    "HashingEmbedder": "retrieval",
+    "member_docstrings": "retrieval",
+    "count_tokens": "tokens",
+    "APIMap": "apimap",
+    "GadgetStore": "store",
+    "SubprocessInspector": "utils",
+    "IntrospectionError": "utils",
+    "build_call_graph": "callgraph",
+    "load_call_graph": "callgraph",
+    "CodeValidator": "validation",
+    "PromptScheduler": "scheduler",
+    "LocalModel": "scheduler",
+    "PatternIndex": "patterns",
+    "select_patterns": "patterns",
+    "MemorySink": "tracing",
+    "JSONLSink": "tracing",
+    "SamplingProfiler": "tracing",
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from .gadget  import Gadget, GadgetFactory
+    from .graph   import GraphTool, SearchMethod
+    from .utils   import (extract_module_functions, extract_module_classes, extract_class_methods,
+                          convert_to_lark_grammar, SubprocessInspector, IntrospectionError)
+    from .contexts import PythonAgentSystemPrompt, zen_of_python, Template
+    from .cache   import APIMapCache, cached_extract
+    from .static  import SourceIndex, extract_source_functions, extract_source_classes
+    from .crawler import crawl_package, flatten_api_map
+    from .incremental import IncrementalAPIMap
+    from .grammars import GrammarCache, default_grammar_cache, optimize_lark_grammar
+    from .slicing import lexical_ranking, select_members, slice_grammar, compile_slice
+    from .retrieval import APIIndex, HashingEmbedder, member_docstrings
+    from .tokens import count_tokens
+    from .apimap import APIMap
+    from .store import GadgetStore
+    from .callgraph import build_call_graph, load_call_graph
+    from .validation import CodeValidator
+    from .scheduler import PromptScheduler, LocalModel
+    from .patterns import PatternIndex, select_patterns
+    from .tracing import MemorySink, JSONLSink, SamplingProfiler
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,249 @@
+import ast
+import inspect
+import sys
+from collections.abc import Mapping
+
+import pyarrow as pa
+
+from .utils import _SourceExpr, _default, parse_signature
+
+
+# --- Columnar API Maps ---
+# Purpose: Hold API maps compactly and share them between gadgets, processes and tools.
+# Strength: One Arrow column per field (no per-member Python objects until asked for), parsed
+#           parameters stored once, zero-copy export to Arrow/pandas and mmap loading from disk.
+# Limitation: Immutable; build a new APIMap (e.g. from a refreshed dict) to change it.
+
+KINDS = ("function", "class", "method", "member")
+_PARAM_KINDS = list(inspect._ParameterKind)
+
+SCHEMA = pa.schema([
+    pa.field("name", pa.string()),
+    pa.field("kind", pa.dictionary(pa.int8(), pa.string())),
+    pa.field("qualname", pa.string()),
+    pa.field("signature", pa.string()),
+    pa.field("params", pa.list_(pa.string())),
+    pa.field("param_kinds", pa.list_(pa.int8())),
+    pa.field("defaults", pa.list_(pa.string())),       # source text, null when required
+    pa.field("annotations", pa.list_(pa.string())),    # source text, null when unannotated
+    pa.field("doc", pa.large_string()),
+])
+
+
+class Member:
+    """
+    One API member, decoded from an APIMap's columns on request. The docstring stays in the
+    map's doc buffer; doc_offset and doc_length locate it (see APIMap.doc).
+    """
+    __slots__ = ("name", "kind", "qualname", "params", "param_kinds", "defaults", "annotations",
+                 "doc_offset", "doc_length")
+
+    def __init__(self, name, kind, qualname, params, param_kinds, defaults, annotations, doc_offset, doc_length):
+        self.name = name
+        self.kind = kind
+        self.qualname = qualname
+        self.params = params
+        self.param_kinds = param_kinds
+        self.defaults = defaults
+        self.annotations = annotations
+        self.doc_offset = doc_offset
+        self.doc_length = doc_length
+
+    def __repr__(self):
+        return f"Member({self.name!r}, kind={self.kind!r}, params={self.params!r})"
+
+    def signature(self):
+        """
+        Rebuilds the member's inspect.Signature from its stored parameters, without re-parsing
+        the signature string.
+        """
+        P = inspect.Parameter
+        params = []
+        for name, kind, default, annotation in zip(self.params, self.param_kinds, self.defaults, self.annotations):
+            params.append(P(name, _PARAM_KINDS[kind],
+                            default=P.empty if default is None else _default_value(default),
+                            annotation=P.empty if annotation is None else _SourceExpr(annotation)))
+        return inspect.Signature(params)
+
+
+def _default_value(source):
+    # Literal defaults come back as values (the typed grammar rules look at them), others as source text
+    try:
+        return _default(ast.parse(source, mode="eval").body)
+    except SyntaxError:
+        return _SourceExpr(source)
+
+
+def _signature_columns(signature):
+    # (params, param kinds, defaults, annotations) of a signature string, or empty for unparseable ones
+    parsed = parse_signature(signature)
+    if parsed is None:
+        return [], [], [], []
+    empty = inspect.Parameter.empty
+    params = list(parsed.parameters.values())
+    return ([p.name for p in params],
+            [_PARAM_KINDS.index(p.kind) for p in params],
+            [None if p.default is empty else repr(p.default) for p in params],
+            [None if p.annotation is empty else inspect.formatannotation(p.annotation) for p in params])
+
+
+class APIMap(Mapping):
+    """
+    A read-only {api name: signature string} mapping, drop-in for the dicts the extractors
+    return, stored as an Arrow table with one row per member. Besides the mapping view it
+    gives per-member records (member()), rebuilt signatures (signature()) and docstrings (doc()).
+
+    Names are interned when the lookup index is built, so gadgets over the same library
+    share their name strings. to_arrow()/to_pandas() hand out the columns without copying,
+    and save()/load() use an uncompressed Arrow IPC file that load() memory-maps, so the
+    pages are shared by every process that loads the same file.
+    """
+    def __init__(self, table):
+        self._table = table
+        self._columns = {}
+        self._rows = None  # interned api name -> row, built on first lookup
+
+    def _column(self, field):
+        # One contiguous array per field (a memory-mapped table stays mapped)
+        column = self._columns.get(field)
+        if column is None:
+            chunked = self._table.column(field)
+            column = chunked.chunk(0) if chunked.num_chunks == 1 else chunked.combine_chunks()
+            self._columns[field] = column
+        return column
+
+    @classmethod
+    def from_signatures(cls, api_map, docstrings=None, kinds=None):
+        """
+        Builds an APIMap from {api name: signature string (or inspect.Signature)}, with optional
+        {name: docstring} and {name: kind} maps (kinds default to "member").
+        """
+        docstrings = docstrings or {}
+        kinds = kinds or {}
+        columns = {field.name: [] for field in SCHEMA}
+        for name, signature in api_map.items():
+            params, param_kinds, defaults, annotations = _signature_columns(signature)
+            columns["name"].append(name)
+            columns["kind"].append(kinds.get(name, "member"))
+            columns["qualname"].append(".".join(name.split(".")[-2 if kinds.get(name) == "method" else -1:]))
+            columns["signature"].append(str(signature))
+            columns["params"].append(params)
+            columns["param_kinds"].append(param_kinds)
+            columns["defaults"].append(defaults)
+            columns["annotations"].append(annotations)
+            columns["doc"].append(docstrings.get(name) or "")
+        columns["kind"] = pa.DictionaryArray.from_arrays(
+            pa.array([KINDS.index(kind) for kind in columns["kind"]], pa.int8()), pa.array(KINDS))
+        return cls(pa.table(columns, schema=SCHEMA))
+
+    @classmethod
+    def from_crawl(cls, crawled, docstrings=None):
+        """
+        Builds an APIMap from a crawler.crawl_package result, keeping each member's kind;
+        re-exported aliases get their definition's signature and kind.
+        """
+        api_map = {}
+        kinds = {}
+        for section, kind in (("functions", "function"), ("classes", "class"), ("methods", "method")):
+            for name, signature in crawled[section].items():
+                api_map[name] = signature
+                kinds[name] = kind
+        for alias, target in crawled["reexports"].items():
+            if target in api_map:
+                api_map[alias] = api_map[target]
+                kinds[alias] = kinds[target]
+        return cls.from_signatures(api_map, docstrings, kinds)
+
+    # -- mapping view --
+
+    def _row(self, name):
+        if self._rows is None:
+            self._rows = {sys.intern(name): row for row, name in enumerate(self._column("name").to_pylist())}
+        return self._rows[name]
+
+    def __getitem__(self, name):
+        return self._column("signature")[self._row(name)].as_py()
+
+    def __contains__(self, name):
+        try:
+            self._row(name)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self._rows if self._rows is not None else self._column("name").to_pylist())
+
+    def __len__(self):
+        return self._table.num_rows
+
+    def items(self):
+        # One pass over two columns instead of a lookup per key
+        return zip(self._column("name").to_pylist(), self._column("signature").to_pylist())
+
+    def values(self):
+        return self._column("signature").to_pylist()
+
+    # -- records --
+
+    def member(self, name):
+        """
+        Returns the Member record for name.
+        """
+        row = self._row(name)
+        value = lambda field: self._column(field)[row].as_py()
+        docs = self._column("doc")
+        offsets = memoryview(docs.buffers()[1]).cast("q")  # int64 offsets into the doc buffer
+        start, end = offsets[docs.offset + row], offsets[docs.offset + row + 1]
+        return Member(name, value("kind"), value("qualname"), tuple(value("params")), tuple(value("param_kinds")),
+                      tuple(value("defaults")), tuple(value("annotations")), start, end - start)
+
+    def select(self, names):
+        """
+        Returns an APIMap of just `names` (in that order), sharing this map's column types.
+        """
+        return APIMap(self._table.take([self._row(name) for name in names]))
+
+    def signature(self, name):
+        """
+        Returns name's inspect.Signature, rebuilt from the stored parameters.
+        """
+        return self.member(name).signature()
+
+    def doc(self, name):
+        """
+        Returns name's docstring ("" if it has none).
+        """
+        return self._column("doc")[self._row(name)].as_py()
+
+    # -- export and persistence --
+
+    def to_arrow(self):
+        """
+        Returns the underlying pyarrow.Table (no copy).
+        """
+        return self._table
+
+    def to_pandas(self):
+        """
+        Returns a pandas DataFrame backed by the Arrow columns (pd.ArrowDtype, no copy).
+        """
+        import pandas as pd
+
+        return self._table.to_pandas(types_mapper=pd.ArrowDtype)
+
+    def save(self, path):
+        """
+        Writes the map as an uncompressed Arrow IPC file, ready to be memory-mapped by load().
+        """
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, self._table.schema) as writer:
+                writer.write_table(self._table)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-maps an APIMap written by save(); columns are read from the mapped file on access.
+        """
+        with pa.memory_map(path, "r") as source:
+            return cls(pa.ipc.open_file(source).read_all())
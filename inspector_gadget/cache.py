@@ -0,0 +1,209 @@
+import hashlib
+import importlib
+import importlib.metadata
+import json
+import os
+import sys
+import tempfile
+import types
+import zlib
+from functools import lru_cache
+
+from .utils import (extract_module_functions, extract_module_classes, find_module_source,
+                    sandboxed_extract_functions, sandboxed_extract_classes)
+from .static import extract_source_functions, extract_source_classes
+from .crawler import crawl_package
+from . import tracing
+
+
+# --- API Map Cache ---
+# Purpose: Avoid re-walking large modules with inspect on every agent start.
+# Strength: Warm starts read a small compressed file and never import the target.
+# Limitation: Fingerprints use file stats, so edits that preserve size and mtime go unnoticed.
+
+CACHE_DIR_ENV = "INSPECTOR_GADGET_CACHE_DIR"
+CACHE_FORMAT = 1  # bump whenever the extractors change what they emit
+
+EXTRACTORS = {
+    "functions": extract_module_functions,
+    "classes": extract_module_classes,
+    # Static kinds parse source files instead of importing the module
+    "source_functions": extract_source_functions,
+    "source_classes": extract_source_classes,
+    "source_package": crawl_package,
+    # Sandboxed kinds import the module in a worker subprocess (see utils.SubprocessInspector)
+    "sandboxed_functions": sandboxed_extract_functions,
+    "sandboxed_classes": sandboxed_extract_classes,
+}
+# Kinds whose extractor takes a module name and never imports the module in this process
+STATIC_KINDS = {"source_functions", "source_classes", "source_package", "sandboxed_functions", "sandboxed_classes"}
+
+
+def default_cache_dir():
+    """
+    Returns the directory used for on-disk caches, honouring $INSPECTOR_GADGET_CACHE_DIR.
+    """
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(os.path.expanduser("~"), ".cache", "inspector_gadget")
+
+
+@lru_cache(maxsize=None)
+def distribution_version(module_name):
+    """
+    Returns the installed distribution version for the top-level package of
+    module_name, or None if it does not come from a distribution (stdlib, local code).
+    """
+    top_level = module_name.partition(".")[0]
+    try:
+        return importlib.metadata.version(top_level)
+    except importlib.metadata.PackageNotFoundError:
+        pass
+    # Import names don't always match distribution names (e.g. yaml -> PyYAML)
+    for dist_name in importlib.metadata.packages_distributions().get(top_level, []):
+        try:
+            return importlib.metadata.version(dist_name)
+        except importlib.metadata.PackageNotFoundError:
+            continue
+    return None
+
+
+def source_files(module_name):
+    """
+    Returns the sorted list of source files backing module_name, found without importing it.
+    Packages contribute every .py file and extension module below their directories.
+    """
+    origin, locations = find_module_source(module_name)
+    if locations is None:
+        return [origin] if origin else []
+    paths = []
+    for location in locations:
+        for root, dirs, files in os.walk(location):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+            for filename in files:
+                if filename.endswith((".py", ".pyi", ".so", ".pyd")):
+                    paths.append(os.path.join(root, filename))
+    return sorted(paths)
+
+
+def module_fingerprint(module_name):
+    """
+    Returns a hex digest identifying the current state of module_name's sources:
+    the distribution version, the interpreter version, and each file's path, size and mtime.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{module_name}\0{distribution_version(module_name)}\0{sys.version}\0".encode())
+    for path in source_files(module_name):
+        stat = os.stat(path)
+        digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+    return digest.hexdigest()
+
+
+class APIMapCache:
+    """
+    A content-addressed, on-disk cache of extracted API maps.
+
+    Entries are keyed by module name, extractor kind and the module's source fingerprint,
+    and stored as zlib-compressed JSON. A lookup only stats the module's files, so a hit
+    never imports or introspects the target. When the sources or the installed version
+    change the key changes with them, and older entries for the module are removed on
+    the next write.
+    """
+    def __init__(self, cache_dir=None):
+        self.cache_dir = os.path.join(cache_dir or default_cache_dir(), "api_maps")
+
+    def key(self, module_name, kind):
+        """
+        Returns the content address for module_name's API map of the given kind.
+        """
+        material = f"{CACHE_FORMAT}\0{kind}\0{module_fingerprint(module_name)}"
+        return hashlib.sha256(material.encode()).hexdigest()[:32]
+
+    def _path(self, module_name, kind, key):
+        return os.path.join(self.cache_dir, f"{module_name}.{kind}.{key}.json.z")
+
+    def get(self, module_name, kind="functions"):
+        """
+        Returns the cached API map for module_name, or None on a miss.
+        """
+        try:
+            path = self._path(module_name, kind, self.key(module_name, kind))
+        except ModuleNotFoundError:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return json.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, zlib.error):
+            # A truncated or corrupt entry is just a miss; it gets rewritten on put()
+            return None
+
+    def put(self, module_name, kind, api_map):
+        """
+        Stores api_map for module_name and drops any stale entries for the same module and kind.
+        """
+        key = self.key(module_name, kind)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        payload = zlib.compress(json.dumps(api_map, separators=(",", ":"), sort_keys=True).encode())
+
+        # Write to a temp file first so concurrent workers never observe a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path(module_name, kind, key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        prefix = f"{module_name}.{kind}."
+        for filename in os.listdir(self.cache_dir):
+            if filename.startswith(prefix) and key not in filename:
+                try:
+                    os.unlink(os.path.join(self.cache_dir, filename))
+                except FileNotFoundError:
+                    pass
+
+    def clear(self):
+        """
+        Removes every cached API map.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        for filename in os.listdir(self.cache_dir):
+            os.unlink(os.path.join(self.cache_dir, filename))
+
+    def extract(self, module, kind="functions"):
+        """
+        Returns the API map of the given kind for module (a module object or a dotted name),
+        serving it from the cache when the sources are unchanged and extracting it otherwise.
+        """
+        module_name = module.__name__ if isinstance(module, types.ModuleType) else module
+        with tracing.span("api_map.extract", module=module_name, kind=kind) as step:
+            api_map = self.get(module_name, kind)
+            tracing.count("api_map_cache", result="miss" if api_map is None else "hit", kind=kind)
+            if api_map is not None:
+                step.set(cache="hit")
+                return api_map
+
+            step.set(cache="miss")
+            if kind in STATIC_KINDS:
+                api_map = EXTRACTORS[kind](module_name)
+            else:
+                if not isinstance(module, types.ModuleType):
+                    with tracing.span("module.import", module=module_name):
+                        module = importlib.import_module(module_name)
+                api_map = EXTRACTORS[kind](module)
+            step.set(members=len(api_map))
+            try:
+                self.put(module_name, kind, api_map)
+            except (OSError, ModuleNotFoundError) as e:
+                # Modules that can't be located on disk (e.g. built at runtime) are simply not cached
+                print(f"Could not cache API map for {module_name}: {e}")
+            return api_map
+
+
+def cached_extract(module, kind="functions", cache_dir=None):
+    """
+    Convenience wrapper around APIMapCache.extract using the default cache directory.
+    """
+    return APIMapCache(cache_dir).extract(module, kind)
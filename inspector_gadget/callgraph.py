@@ -0,0 +1,320 @@
+import ast
+import json
+import os
+import tempfile
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .cache import default_cache_dir, module_fingerprint
+from .crawler import SERIAL_THRESHOLD, _chunks, iter_package_modules
+from .static import _module_statements, _resolve_relative
+
+
+# --- Call Graph Tables ---
+# Purpose: Build the graph GraphTool searches (modules, classes, functions and the calls,
+#          inheritance and imports between them) straight from a package's source.
+# Strength: Files are parsed in chunks (across a process pool) and each chunk is written out
+#           as one Parquet row group, so memory stays bounded by a chunk, not the package; the
+#           tables are cached against the sources' fingerprint and load without re-parsing.
+# Limitation: Static and name-based: calls through local variables, attributes of instances
+#             (other than self/cls) and dynamic dispatch are not resolved, and calls to names
+#             a package re-exports point at the re-exported name, not the definition.
+
+CALLGRAPH_FORMAT = 1
+CHUNK_FILES = 64  # files per chunk: one row group each
+
+NODE_KINDS = ("module", "class", "function", "method")
+EDGE_KINDS = ("contains", "calls", "inherits", "imports")
+
+NODE_SCHEMA = pa.schema([
+    pa.field("id", pa.string()),
+    pa.field("kind", pa.dictionary(pa.int8(), pa.string())),
+    pa.field("module", pa.string()),
+    pa.field("lineno", pa.int32()),
+])
+EDGE_SCHEMA = pa.schema([
+    pa.field("source", pa.string()),
+    pa.field("target", pa.string()),
+    pa.field("kind", pa.dictionary(pa.int8(), pa.string())),
+    pa.field("count", pa.int32()),   # occurrences in the source (e.g. call sites)
+])
+
+
+def default_callgraph_dir(module_name):
+    """
+    Returns the directory holding the cached call graph tables of module_name.
+    """
+    return os.path.join(default_cache_dir(), "callgraphs", module_name)
+
+
+# Node types with nothing to visit below them (names, constants, contexts, operators)
+_LEAVES = (ast.Name, ast.Constant, ast.expr_context, ast.operator, ast.unaryop, ast.cmpop, ast.boolop, ast.alias)
+_CHILD_FIELDS = {}  # node type -> the fields that can hold nodes worth visiting, last first
+
+
+def _child_fields(node_type):
+    fields = _CHILD_FIELDS.get(node_type)
+    if fields is None:
+        # Lists in the tree also hold None (e.g. Dict keys) and strings (e.g. Global names)
+        leaf = not issubclass(node_type, ast.AST) or issubclass(node_type, _LEAVES)
+        fields = _CHILD_FIELDS[node_type] = () if leaf else tuple(
+            field for field in reversed(node_type._fields) if field not in ("ctx", "op", "type_comment"))
+    return fields
+
+
+class _CallGraphVisitor:
+    """
+    Collects one module's nodes ({id: (kind, lineno)}) and edges ({(source, target, kind): count}).
+    Names resolve through the module's imports and top-level definitions, and self.x / cls.x
+    through the enclosing class; anything else (locals, builtins, instance attributes) is skipped.
+
+    Walks the tree with an explicit stack rather than ast.NodeVisitor: only definitions,
+    imports and calls need a handler, and the per-node dispatch would cost more than parsing.
+    """
+    def __init__(self, module_name, is_package):
+        self.module_name = module_name
+        self.is_package = is_package
+        self.nodes = {module_name: ("module", 1)}
+        self.edges = Counter()
+        self.aliases = {}                       # local name -> qualified name
+        self.scopes = [(module_name, "module")]  # (qualified name, node kind), innermost last
+        self._handlers = {
+            ast.Import: self._visit_import,
+            ast.ImportFrom: self._visit_import,
+            ast.ClassDef: self._visit_class,
+            ast.FunctionDef: self._visit_function,
+            ast.AsyncFunctionDef: self._visit_function,
+        }
+
+    def run(self, tree):
+        # Bind every top-level name first: functions may call names defined further down
+        for stmt in _module_statements(tree.body):
+            if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                self.aliases[stmt.name] = f"{self.module_name}.{stmt.name}"
+            elif isinstance(stmt, (ast.Import, ast.ImportFrom)):
+                self._bind_import(stmt)
+        self._walk(tree.body)
+        return self
+
+    def _walk(self, nodes):
+        stack = list(reversed(nodes))
+        handlers = self._handlers
+        while stack:
+            node = stack.pop()
+            node_type = type(node)
+            handler = handlers.get(node_type)
+            if handler is not None:
+                handler(node)  # visits what it needs below the node itself
+                continue
+            if node_type is ast.Call:
+                target = self._resolve(node.func)
+                if target is not None:
+                    self._edge(self.scopes[-1][0], target, "calls")
+            # Pushed last field first, so they pop in source order (an If's body before its orelse)
+            for field in _child_fields(node_type):
+                value = getattr(node, field, None)
+                if type(value) is list:
+                    stack.extend(reversed(value))
+                elif isinstance(value, ast.AST):
+                    stack.append(value)
+
+    def _bind_import(self, stmt):
+        # Binds the names stmt imports and returns the modules it imports them from
+        if isinstance(stmt, ast.Import):
+            for alias in stmt.names:
+                if alias.asname:
+                    self.aliases[alias.asname] = alias.name
+                else:
+                    top = alias.name.partition(".")[0]
+                    self.aliases[top] = top
+            return [alias.name for alias in stmt.names]
+        base = _resolve_relative(self.module_name, self.is_package, stmt.level, stmt.module)
+        for alias in stmt.names:
+            if alias.name != "*":
+                self.aliases[alias.asname or alias.name] = f"{base}.{alias.name}"
+        return [base]
+
+    def _edge(self, source, target, kind):
+        self.edges[source, target, kind] += 1
+
+    def _define(self, node, kind):
+        parent = self.scopes[-1][0]
+        qualname = f"{parent}.{node.name}"
+        self.nodes.setdefault(qualname, (kind, node.lineno))
+        self._edge(parent, qualname, "contains")
+        return qualname
+
+    def _enclosing_class(self):
+        # The class of the innermost function, if that function is a method
+        for i in range(len(self.scopes) - 1, 0, -1):
+            if self.scopes[i][1] in ("function", "method"):
+                return self.scopes[i - 1][0] if self.scopes[i][1] == "method" else None
+        return None
+
+    def _resolve(self, expr):
+        attributes = []
+        while isinstance(expr, ast.Attribute):
+            attributes.append(expr.attr)
+            expr = expr.value
+        if not isinstance(expr, ast.Name):
+            return None
+        attributes.reverse()
+        if expr.id in ("self", "cls") and len(attributes) == 1:
+            owner = self._enclosing_class()
+            return f"{owner}.{attributes[0]}" if owner else None
+        qualified = self.aliases.get(expr.id)
+        if qualified is None:
+            return None
+        return ".".join([qualified] + attributes)
+
+    def _visit_import(self, node):
+        for module in self._bind_import(node):
+            self._edge(self.module_name, module, "imports")
+
+    def _visit_class(self, node):
+        # Decorators, bases and keywords run in the enclosing scope
+        self._walk(node.decorator_list + node.bases + [keyword.value for keyword in node.keywords])
+        qualname = self._define(node, "class")
+        for base in node.bases:
+            target = self._resolve(base)
+            if target is not None:
+                self._edge(qualname, target, "inherits")
+        self.scopes.append((qualname, "class"))
+        self._walk(node.body)
+        self.scopes.pop()
+
+    def _visit_function(self, node):
+        kind = "method" if self.scopes[-1][1] == "class" else "function"
+        defaults = node.args.defaults + [default for default in node.args.kw_defaults if default is not None]
+        self._walk(node.decorator_list + defaults)
+        qualname = self._define(node, kind)
+        self.scopes.append((qualname, kind))
+        self._walk(node.body)
+        self.scopes.pop()
+
+
+def _graph_chunk(chunk):
+    """
+    Worker entry point: parses a batch of (module name, path, is_package) triples and returns
+    their nodes and edges as column lists, skipping files that fail to parse.
+    """
+    nodes = {"id": [], "kind": [], "module": [], "lineno": []}
+    edges = {"source": [], "target": [], "kind": [], "count": []}
+    for module_name, path, is_package in chunk:
+        try:
+            with open(path, "rb") as f:
+                tree = ast.parse(f.read(), filename=path)
+        except (SyntaxError, UnicodeDecodeError, ValueError, OSError) as e:
+            print(f"Could not parse {module_name}: {e}")
+            continue
+        visitor = _CallGraphVisitor(module_name, is_package).run(tree)
+        for node_id, (kind, lineno) in visitor.nodes.items():
+            nodes["id"].append(node_id)
+            nodes["kind"].append(NODE_KINDS.index(kind))
+            nodes["module"].append(module_name)
+            nodes["lineno"].append(lineno)
+        for (source, target, kind), occurrences in visitor.edges.items():
+            edges["source"].append(source)
+            edges["target"].append(target)
+            edges["kind"].append(EDGE_KINDS.index(kind))
+            edges["count"].append(occurrences)
+    return nodes, edges
+
+
+def _record_batch(columns, schema, kinds):
+    arrays = []
+    for field in schema:
+        if field.name == "kind":
+            arrays.append(pa.DictionaryArray.from_arrays(pa.array(columns["kind"], pa.int8()), pa.array(kinds)))
+        else:
+            arrays.append(pa.array(columns[field.name], field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _chunk_results(modules, workers, chunk_size):
+    # Yields each chunk's (nodes, edges) in order, keeping at most two chunks per worker in flight
+    if workers == 1 or len(modules) < SERIAL_THRESHOLD:
+        for chunk in _chunks(modules, chunk_size):
+            yield _graph_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in _chunks(modules, chunk_size):
+            pending.append(pool.submit(_graph_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def build_call_graph(module_name, path=None, workers=None, chunk_size=CHUNK_FILES, force=False):
+    """
+    Writes the call graph of a package (or module) as Parquet tables in the directory path
+    (default: default_callgraph_dir(module_name)) and returns path:
+
+        nodes.parquet: id, kind (module/class/function/method), module, lineno
+        edges.parquet: source, target, kind (contains/calls/inherits/imports), count
+
+    Ids are qualified names ("pkg.mod.Class.method"). Edge targets may name things outside
+    the package (e.g. "os.path.join"), which have no node row. The tables are reused while
+    the package's sources keep their fingerprint (see cache.module_fingerprint) unless force.
+    """
+    path = path or default_callgraph_dir(module_name)
+    meta_path = os.path.join(path, "meta.json")
+    fingerprint = module_fingerprint(module_name)
+    if not force:
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta.get("format") == CALLGRAPH_FORMAT and meta.get("fingerprint") == fingerprint:
+                return path
+        except (OSError, ValueError):
+            pass
+
+    os.makedirs(path, exist_ok=True)
+    try:
+        os.unlink(meta_path)  # the tables are incomplete until meta.json is back
+    except FileNotFoundError:
+        pass
+    modules = list(iter_package_modules(module_name))
+    workers = workers or os.cpu_count() or 1
+    targets = {name: tempfile.mkstemp(dir=path, suffix=".tmp") for name in ("nodes", "edges")}
+    counts = {"nodes": 0, "edges": 0}
+    try:
+        for fd, _ in targets.values():
+            os.close(fd)
+        with pq.ParquetWriter(targets["nodes"][1], NODE_SCHEMA) as node_writer, \
+                pq.ParquetWriter(targets["edges"][1], EDGE_SCHEMA) as edge_writer:
+            for nodes, edges in _chunk_results(modules, workers, chunk_size):
+                node_writer.write_batch(_record_batch(nodes, NODE_SCHEMA, NODE_KINDS))
+                edge_writer.write_batch(_record_batch(edges, EDGE_SCHEMA, EDGE_KINDS))
+                counts["nodes"] += len(nodes["id"])
+                counts["edges"] += len(edges["source"])
+        for name, (_, tmp_path) in targets.items():
+            os.replace(tmp_path, os.path.join(path, f"{name}.parquet"))
+    except BaseException:
+        for _, tmp_path in targets.values():
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        raise
+    meta = {"format": CALLGRAPH_FORMAT, "module": module_name, "fingerprint": fingerprint,
+            "files": len(modules), **counts}
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=1)
+    return path
+
+
+def load_call_graph(path, edge_kinds=None, node_kinds=None):
+    """
+    Reads the tables written by build_call_graph as (nodes, edges) DataFrames, in the shape
+    GraphTool takes. edge_kinds / node_kinds (e.g. ("calls",)) keep only those rows; they are
+    applied while reading, so skipped rows are never materialized.
+    """
+    node_filter = [("kind", "in", list(node_kinds))] if node_kinds else None
+    edge_filter = [("kind", "in", list(edge_kinds))] if edge_kinds else None
+    nodes = pq.read_table(os.path.join(path, "nodes.parquet"), filters=node_filter).to_pandas()
+    edges = pq.read_table(os.path.join(path, "edges.parquet"), filters=edge_filter).to_pandas()
+    return nodes, edges
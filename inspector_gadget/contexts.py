@@ -1,16 +1,18 @@
 import inspect
+import os
 import types
 import ast
+from enum import Enum
+from functools import lru_cache
 
-from outlines import Template, models, generate
-from outlines.samplers import greedy
-import lark
+# Templates and generators below need outlines; they are built on first access (see __getattr__)
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
 
 # --- Zen of Python --- 
 #Purpose: Provide a soft inductive bias for correct Python code.
 #Strength: Encourages correct syntax, semantics, and idioms.
 #Limitation: Does not prevent hallucinations.
-zen_of_python = Template.from_file("prompts/zen_of_python.txt")
+# zen_of_python: Template loaded from prompts/zen_of_python.txt
 
 # --- API Signatures Grammar --- 
 #Purpose: Constrain generation to valid function/method calls.
@@ -38,7 +40,7 @@ zen_of_python = Template.from_file("prompts/zen_of_python.txt")
 # Limitation: Very hard to enforce. Best done via outline+examples or hybrid structural scaffolds, not strict CFGs.
 
 
-PythonAgentSystemPrompt = Template.from_string("""
+PYTHON_AGENT_SYSTEM_PROMPT = """
 ## Agent Task
 
 You are writing Python code that performs the following task:
@@ -72,20 +74,106 @@ Example usage of {module_name}:
 ```python
 {example}
 ```
-""")
+"""
 
 
+# The same sections split for prefix reuse (see scheduler.PromptScheduler): everything that
+# depends only on the gadget set comes first and is rendered once per set; the task goes last.
+PYTHON_AGENT_PROMPT_PREFIX = """
+{{zen}}
 
+Your outputs shall be constrained by the following structured generations: 
+{%for gadget in gadgets%}
+- {{gadget}}
+{%endfor%}
 
+## Available API (constrained by grammar):
+{%for api in apis%}
+- {{api}}
+{%endfor%}
 
+## Design Principles
 
+Follow these software patterns:
+{%for pattern in patterns%}
+- {{pattern}}
+{%endfor%}
 
-class GeneratorEnum(Enum):
+## Reference Example
+
+Example usage of {{module_name}}:
+
+```python
+{{example}}
+```
+"""
+
+PYTHON_AGENT_TASK_PROMPT = """
+## Agent Task
+
+You are writing Python code that performs the following task:
+
+- {task}
+"""
+
+
+@lru_cache(maxsize=None)
+def load_template(filename):
     """
-    An enumeration of the different generators that can be used.
+    Returns the outlines Template stored in prompts/filename, read once.
     """
-    GADGET = generate.cfg
-    SYSTEM = generate.regex
-    TYPES = generate.format
+    from outlines import Template
+
+    return Template.from_file(os.path.join(PROMPTS_DIR, filename))
+
+
+def _generator_enum():
+    from outlines import generate
+
+    class GeneratorEnum(Enum):
+        """
+        An enumeration of the different generators that can be used.
+        """
+        GADGET = generate.cfg
+        SYSTEM = generate.regex
+        TYPES = generate.format
+
+    return GeneratorEnum
+
+
+def _template_class():
+    from outlines import Template
+
+    return Template
+
+
+def _python_agent_system_prompt():
+    from outlines import Template
+
+    return Template.from_string(PYTHON_AGENT_SYSTEM_PROMPT)
+
+
+def _python_agent_prompt_prefix():
+    from outlines import Template
+
+    return Template.from_string(PYTHON_AGENT_PROMPT_PREFIX)
+
+
+_LAZY_ATTRIBUTES = {
+    "zen_of_python": lambda: load_template("zen_of_python.txt"),
+    "PythonAgentSystemPrompt": _python_agent_system_prompt,
+    "PythonAgentPromptPrefix": _python_agent_prompt_prefix,
+    "GeneratorEnum": _generator_enum,
+    "Template": _template_class,
+}
+
+
+def __getattr__(name):
+    # PEP 562: build outlines-backed attributes on first access, then keep them as globals
+    loader = _LAZY_ATTRIBUTES.get(name)
+    if loader is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = loader()
+    return value
 
 
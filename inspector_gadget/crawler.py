@@ -0,0 +1,150 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .static import SourceIndex, summarize_file
+from .utils import find_module_source
+
+
+# --- Package Crawler ---
+# Purpose: Cover a whole package tree (subpackages, classes, methods), not just one module's top level.
+# Strength: Per-file parsing is independent, so it fans out across a process pool.
+# Limitation: Static, like static.py: members created at runtime are not seen.
+
+SERIAL_THRESHOLD = 64  # below this many files a process pool costs more than it saves
+
+
+def iter_package_modules(module_name):
+    """
+    Yields (module name, path, is_package) for every Python source file in the package,
+    descending into subpackages. A plain module yields just itself.
+    """
+    origin, locations = find_module_source(module_name)
+    if locations is None:
+        if origin and origin.endswith(".py"):
+            yield module_name, origin, False
+        return
+
+    for location in locations:
+        for root, dirs, files in os.walk(location):
+            dirs[:] = sorted(d for d in dirs if d.isidentifier())
+            relative = os.path.relpath(root, location)
+            prefix = module_name if relative == "." else f"{module_name}.{relative.replace(os.sep, '.')}"
+            for filename in sorted(files):
+                stem, ext = os.path.splitext(filename)
+                if ext != ".py":
+                    continue
+                if stem == "__init__":
+                    yield prefix, os.path.join(root, filename), True
+                elif stem.isidentifier():
+                    yield f"{prefix}.{stem}", os.path.join(root, filename), False
+
+
+def _summarize_chunk(chunk):
+    """
+    Worker entry point: summarizes a batch of (module name, path, is_package) triples,
+    skipping files that fail to parse rather than failing the whole batch.
+    """
+    summaries = []
+    for module_name, path, is_package in chunk:
+        try:
+            summaries.append(summarize_file(path, module_name, is_package))
+        except (SyntaxError, UnicodeDecodeError, ValueError, OSError) as e:
+            print(f"Could not parse {module_name}: {e}")
+    return summaries
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def summarize_package(module_name, workers=None):
+    """
+    Parses every source file of the package and returns the list of per-file summaries.
+    """
+    return summarize_modules(list(iter_package_modules(module_name)), workers)
+
+
+def summarize_modules(modules, workers=None):
+    """
+    Summarizes a list of (module name, path, is_package) triples. Files are batched into
+    chunks and parsed across a process pool of `workers` processes (default: os.cpu_count());
+    short lists and workers=1 run serially in-process.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(modules) < SERIAL_THRESHOLD:
+        return _summarize_chunk(modules)
+
+    # Several chunks per worker keeps the pool balanced when file sizes vary a lot
+    chunk_size = max(1, len(modules) // (workers * 4))
+    summaries = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch in pool.map(_summarize_chunk, _chunks(modules, chunk_size)):
+            summaries.extend(batch)
+    return summaries
+
+
+def crawl_package(module_name, workers=None, private=False):
+    """
+    Recursively introspects a package from source and merges every module into one API map:
+
+        functions: {qualified name: signature string}
+        classes:   {qualified name: signature string}
+        methods:   {qualified class name + "." + method: signature string}
+        reexports: {qualified alias: qualified name of the definition it points to}
+
+    Every member appears once, under the module that defines it; names that modules
+    import from elsewhere in the package are recorded in reexports instead of being
+    duplicated (e.g. "networkx.shortest_path" -> "networkx.algorithms.shortest_paths.generic.shortest_path").
+    Private names (leading underscore) are skipped unless private=True.
+    """
+    index = SourceIndex()
+    summaries = summarize_package(module_name, workers)
+    for summary in summaries:
+        index.add_summary(summary)
+
+    api_map = {"functions": {}, "classes": {}, "methods": {}, "reexports": {}}
+    for summary in summaries:
+        for section, entries in module_entries(index, summary["module"], private).items():
+            api_map[section].update(entries)
+    return api_map
+
+
+def module_entries(index, module_name, private=False):
+    """
+    Returns the crawl_package sections contributed by a single module: the members it
+    defines, plus the re-exports it makes of definitions elsewhere in the same package.
+    """
+    root = module_name.partition(".")[0]
+    entries = {"functions": {}, "classes": {}, "methods": {}, "reexports": {}}
+    for name, (kind, payload, defining_module, defined_name) in index.namespace(module_name).items():
+        if not private and name.startswith("_"):
+            continue
+        qualname = f"{module_name}.{name}"
+        if defining_module != module_name:
+            # Only record re-exports of definitions we actually crawled
+            if defining_module.partition(".")[0] == root:
+                entries["reexports"][qualname] = f"{defining_module}.{defined_name}"
+            continue
+        if kind == "function":
+            entries["functions"][qualname] = payload
+        else:
+            entries["classes"][qualname] = index.class_signature(payload, defining_module)
+            for method, sig in index.class_methods(payload, defining_module).items():
+                entries["methods"][f"{qualname}.{method}"] = sig
+    return entries
+
+
+def flatten_api_map(crawled):
+    """
+    Flattens a crawl_package result into the {name: signature} shape the extractors and
+    convert_to_lark_grammar use, with re-exported aliases pointing at their definition's signature.
+    """
+    flat = {}
+    flat.update(crawled["functions"])
+    flat.update(crawled["classes"])
+    flat.update(crawled["methods"])
+    for alias, target in crawled["reexports"].items():
+        if target in flat:
+            flat[alias] = flat[target]
+    return flat
@@ -1,12 +1,39 @@
+from __future__ import annotations
+
+import asyncio
 import inspect
+import multiprocessing
+import os
 import types
 import ast
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum 
+from functools import lru_cache
+from itertools import chain
+from operator import itemgetter
 
 from outlines import Template, models, generate
 from outlines.samplers import greedy
 
 import lark
+import pyarrow as pa
+
+from . import tracing
+from .apimap import APIMap
+from .cache import APIMapCache
+from .crawler import flatten_api_map
+from .incremental import IncrementalAPIMap
+from .patterns import default_pattern_index
+from .retrieval import APIIndex
+from .grammars import default_grammar_cache, optimize_lark_grammar
+from .slicing import DEFAULT_TOP_K, lexical_ranking, select_members, slice_grammar
+from .tokens import DEFAULT_ENCODING, count_tokens, take_within_budget
+from .utils import TYPED_GRAMMAR_MAX_MEMBERS, convert_to_lark_grammar
+from .validation import CodeValidator
+
+MAX_CACHED_BUILDS = 32  # IncrementalAPIMaps kept in memory for build_gadget(..., incremental=True)
+MAX_CACHED_INDEXES = 32  # APIIndexes kept in memory for retrieval
 
 
 class Gadget:
@@ -18,31 +45,100 @@ class Gadget:
     """
     def __init__(self, module, name, api_map, grammar):
         self.module = module            # the actual Python module
-        self.name = module.__name__     # name of the module (e.g., "networkx")
-        self.api_map = api_map          # dictionary mapping function names to signatures
+        self.name = name or module.__name__  # name of the module (e.g., "networkx")
+        # mapping of function names to signatures, stored columnar (see apimap.APIMap)
+        self.api_map = api_map if isinstance(api_map, APIMap) else APIMap.from_signatures(api_map)
         self.grammar = grammar          # the Lark grammar (as a string) derived from the API map
 
-    def get_tool_description(self):
+    def iter_tool_description(self, budget=None, task=None, rank=lexical_ranking, encoding=DEFAULT_ENCODING):
+        """
+        Yields the tool description in chunks: a header, one line per API entry, then the grammar.
+
+        With a token budget the yielded chunks never add up to more than `budget` tokens
+        (counted with tiktoken, memoized per chunk, see tokens.py). Given a task, entries are
+        ranked by relevance (see slicing.lexical_ranking) so the most relevant fit first; entries
+        that don't fit are left out. The grammar follows only if it fits in what is left, falling
+        back to the rules for just the listed entries (see slicing.slice_grammar), then to nothing.
+        """
+        header = f"Module: {self.name}\n" + "API Functions:\n"
+        entries = self._ranked_entries(task, rank)
+        grammar_header = "\nGrammar (constrained syntax):\n"
+        if budget is None:
+            yield header
+            for func in entries:
+                yield f"  - {func}{self.api_map[func]}\n"
+            yield grammar_header + self.grammar
+            return
+
+        spent = count_tokens(header, encoding)
+        if spent > budget:
+            return
+        yield header
+        listed = []
+        lines = ((func, f"  - {func}{self.api_map[func]}\n") for func in entries)
+        for (func, line), spent in take_within_budget(lines, budget, encoding, spent, text=itemgetter(1)):
+            listed.append(func)
+            yield line
+
+        grammar = grammar_header + self.grammar
+        if spent + count_tokens(grammar, encoding) > budget and listed and len(listed) < len(self.api_map):
+            grammar = grammar_header + slice_grammar(self.api_map, listed)
+        if spent + count_tokens(grammar, encoding) <= budget:
+            yield grammar
+
+    def _ranked_entries(self, task, rank):
+        if task is None:
+            return iter(self.api_map)
+        # Matching entries first, each re-exported alias group once; then everything else
+        scores = rank(task, self.api_map)
+        ranked = select_members(task, self.api_map, len(self.api_map), lambda task, api_map: scores)
+        return chain(ranked, (name for name in self.api_map if name not in scores))
+
+    def get_tool_description(self, budget=None, task=None, **kwargs):
         """
         Returns a descriptive prompt block for the gadget.
         Includes the module name, a summary of its API, and the grammar.
+        See iter_tool_description for the token budget and task ranking.
         """
-        description = f"Module: {self.name}\n"
-        description += "API Functions:\n"
-        for func, sig in self.api_map.items():
-            description += f"  - {func}{sig}\n"
-        description += "\nGrammar (constrained syntax):\n"
-        description += self.grammar
-        return description
+        return "".join(self.iter_tool_description(budget, task, **kwargs))
 
-    def as_declarative_tool(self):
+    def as_declarative_tool(self, budget=None, task=None, encoding=DEFAULT_ENCODING, **kwargs):
         """
         Returns a string that can be inserted into a larger system prompt,
         declaring the gadget as an available tool.
         """
-        return f"Tool({self.name}): " + self.get_tool_description()
+        prefix = f"Tool({self.name}): "
+        if budget is not None:
+            budget -= count_tokens(prefix, encoding)
+            if budget < 0:
+                return ""
+        tool = prefix + self.get_tool_description(budget, task, encoding=encoding, **kwargs)
+        if tracing.enabled():
+            tracing.count("prompt.tokens", count_tokens(tool, encoding), section="tool")
+        return tool
+
+    def slice(self, task, k=DEFAULT_TOP_K, rank=lexical_ranking, optimize=True):
+        """
+        Returns a Gadget limited to the k members of the API map most relevant to task
+        (ranked by `rank`, see slicing.py), whose grammar covers only those members.
+        Returns self when no member matches the task.
+        """
+        members = select_members(task, self.api_map, k, rank)
+        if not members:
+            print(f"No {self.name} members match the task; using the full grammar")
+            return self
+        return Gadget(self.module, self.name, self.api_map.select(members), slice_grammar(self.api_map, members, optimize))
+
+    def validator(self):
+        """
+        Returns the CodeValidator for code written with this gadget: its grammar and API
+        signatures (see validation.py). Made once per gadget, so its results stay memoized.
+        """
+        validator = getattr(self, "_validator", None)
+        if validator is None:
+            validator = self._validator = CodeValidator.from_gadget(self)
+        return validator
 
-    
 
 
 class GadgetFactory:
@@ -73,16 +169,17 @@ class GadgetFactory:
         self.model = model
 
         
-    def __call__(self, task: str):
+    @tracing.traced("gadget.slice")
+    def __call__(self, task: str, k: int = DEFAULT_TOP_K):
         """
         Given a task, extract necessary context from the dependency and construct a 
         composite prompt with constrained generation interface. 
 
-        Returns the gadget.
+        Returns the gadget, sliced to the k API members most relevant to the task.
         """
 
         # Given Task, identify relevant contexts 
-
+        return self.build_gadget(self.dependency).slice(task, k)
 
     def provision_context_choices(self):
         """
@@ -90,25 +187,50 @@ class GadgetFactory:
         """
         generate.choice(model, choices, sampler = self.sampler) 
 
-    def _build_gadget(self, ):
+    @tracing.traced("gadget.generator")
+    def _build_gadget(self, gadget: Gadget = None):
         """
-        Builds the gadget.
+        Builds the gadget's constrained generator.
+        The compiled grammar is served from the grammar cache (see grammars.GrammarCache),
+        so repeated builds over the same API surface and tokenizer skip recompilation.
         """
-        generate.cfg(gadget, grammar) 
+        gadget = gadget or self.build_gadget(self.dependency)
+        return default_grammar_cache().cfg_generator(self.model, gadget.grammar, self.sampler)
     
+    @tracing.traced("gadget.validate")
+    def validate(self, candidates, gadget: Gadget = None, first_valid: bool = False, **options):
+        """
+        Validates generated code candidates (e.g. best-of-n samples) against the gadget's
+        grammar and API signatures; returns their ValidationResults, stopping at the first
+        valid one with first_valid (see validation.CodeValidator.validate_many).
+        """
+        gadget = gadget or self.build_gadget(self.dependency)
+        return gadget.validator().validate_many(candidates, first_valid=first_valid, **options)
+
+    def select_patterns(self, task: str, budget: int = 512, k: int = 3, **options):
+        """
+        Returns the prompt lines of the design patterns (with examples where they fit) most
+        relevant to task, within budget tokens, from the precomputed pattern index (see
+        patterns.PatternIndex.select); the model never sees the whole catalog.
+        """
+        with tracing.span("gadget.patterns", budget=budget):
+            lines = default_pattern_index().select(task, budget, k, **options)
+        if tracing.enabled():
+            tracing.count("prompt.tokens", sum(count_tokens(line) for line in lines), section="patterns")
+        return lines
+
     def _build_gadget_system_prompt(self):
         """
         Builds the gadget system prompt.
         """
         return 
 
-    def _inpect_module(self):
+    def _inspect_module(self, dependency: Module = None):
         """
         Extracts the API context from the dependency.
+        Served from the on-disk API map cache when the dependency's sources are unchanged.
         """
-        
-        grammar 
-        return APILevelGrammar = Template.from_string(grammar)
+        return APIMapCache().extract(dependency or self.dependency, "functions")
 
     def _ast_module(self):
         """
@@ -116,14 +238,21 @@ class GadgetFactory:
         """
         return ast.parse(self.dependency)
     
-    def _get_relevant_api_context(self, dependency: Module):
+    @tracing.traced("gadget.retrieve")
+    def _get_relevant_api_context(self, task: str, dependency: Module = None, k: int = DEFAULT_TOP_K):
         """
-        Gets the relevant API context for the dependency.
+        Gets the API context relevant to the task: the k members of the dependency's API map
+        closest to the task in its vector index (see retrieval.APIIndex), as {name: signature}.
+        The index is synced first (APIIndex.sync): a no-op while the dependency's sources are
+        unchanged, else it reads docstrings and re-embeds only the members that changed.
         """
-        # Inspect and AST the dependency and construct an enum of the relevant API calls.
-        relevant_inspect_context = self._inspect_module(dependency)
-        generate.choice(model, choices, sampler = self.sampler)
-        
+        dependency = dependency or self.dependency
+        api_map = self._inspect_module(dependency)
+        name = dependency if isinstance(dependency, str) else dependency.__name__
+        index = self._cached(self._api_indexes, name, lambda: APIIndex(name), MAX_CACHED_INDEXES)
+        index.sync(dependency, api_map)
+        return {member: api_map[member] for member, _ in index.search(task, k)}
+
     
     def _generate_api_grammar(self, dependency: Module):
         """
@@ -135,29 +264,165 @@ class GadgetFactory:
         """
         Generates the scripting grammar for the dependency.
         """
-        return 
+        return
+
+    @staticmethod
+    async def build_many(modules, timeout: float = 120.0, workers: int | None = None, **options):
+        """
+        Builds gadgets for many modules at once, yielding (module name, gadget, error) as each
+        one finishes; gadget is None and error a message when a build fails.
+
+        Every module is built by build_gadget(name, **options) in its own worker process, at
+        most `workers` (default: CPU count) at a time, so a module that crashes its interpreter
+        or hangs on import fails alone: workers still running after `timeout` seconds are
+        killed. Gadgets built from an import have module set only if a module object was given,
+        as the target is never imported in this process.
+        """
+        context = _build_context()
+        limit = asyncio.Semaphore(workers or os.cpu_count() or 1)
+        waiters = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        running = set()
+        loop = asyncio.get_running_loop()
 
+        async def build(module):
+            name = module if isinstance(module, str) else module.__name__
+            async with limit:
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(target=_build_worker, args=(sender, name, options), daemon=True)
+                process.start()
+                sender.close()
+                running.add(process)
+                try:
+                    result = await loop.run_in_executor(waiters, _await_build, process, receiver, timeout)
+                finally:
+                    running.discard(process)
+                    receiver.close()
+            if result[0] != "ok":
+                return name, None, result[1]
+            _, grammar, table = result
+            api_map = APIMap(pa.ipc.open_file(pa.py_buffer(table)).read_all())
+            return name, Gadget(None if isinstance(module, str) else module, name, api_map, grammar), None
 
+        tasks = [asyncio.ensure_future(build(module)) for module in modules]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # The caller stopped early (or was cancelled): don't leave workers behind
+            for task in tasks:
+                task.cancel()
+            for process in list(running):
+                process.kill()
+            waiters.shutdown(wait=False)
+
+    # module name -> IncrementalAPIMap, for build_gadget(..., incremental=True); bounded LRU
+    _incremental_builds = OrderedDict()
+    # module name -> APIIndex, for _get_relevant_api_context; bounded LRU
+    _api_indexes = OrderedDict()
+
+    @staticmethod
+    def _cached(entries, name, make, maxsize):
+        # entries[name], made on a miss and marked most recently used; the oldest beyond maxsize go
+        entry = entries.get(name)
+        if entry is None:
+            entry = entries[name] = make()
+        entries.move_to_end(name)
+        while len(entries) > maxsize:
+            entries.popitem(last=False)
+        return entry
 
-class GadgetFactory:
     @staticmethod
-    def build_gadget(module):
+    @tracing.traced("gadget.build")
+    def build_gadget(module, cache: APIMapCache | None = None, static: bool = False, recursive: bool = False,
+                     incremental: bool = False, optimize: bool | None = None, sandboxed: bool = False):
         """
         Inspects the given module, extracts API information, generates grammar,
         and returns a Gadget instance.
+
+        The API map is read from the on-disk cache (see cache.APIMapCache) when the
+        module's sources and version are unchanged since the last extraction.
+        With static=True the API map is parsed from source (see static.py) and module
+        may be a dotted name; the target is never imported and Gadget.module is None.
+        recursive=True (which implies static) crawls every subpackage, class and method
+        (see crawler.crawl_package) and keys the API map by qualified name.
+        incremental=True builds the same recursive map, but keeps per-file fingerprints
+        (in memory and in the cache directory) so later calls only re-parse changed modules
+        and regenerate the grammar rules they affect (see incremental.IncrementalAPIMap).
+        optimize=True emits the minimized grammar from grammars.optimize_lark_grammar,
+        which accepts the same calls but compiles far faster for large API surfaces; the
+        default uses it for API maps beyond utils.TYPED_GRAMMAR_MAX_MEMBERS members, whose
+        rules are untyped (smaller maps get per-parameter rules, see convert_to_lark_grammar).
+        sandboxed=True imports and inspects the module in a resource-limited worker subprocess
+        instead of this process (see utils.SubprocessInspector); module may be a dotted name.
         """
-        api_map = {}
-        for name, obj in inspect.getmembers(module):
-            if isinstance(obj, (types.FunctionType, types.BuiltinFunctionType)):
-                try:
-                    api_map[name] = str(inspect.signature(obj))
-                except (ValueError, TypeError):
-                    continue
+        name = module if isinstance(module, str) else module.__name__
+        if incremental:
+            build = GadgetFactory._cached(GadgetFactory._incremental_builds, name,
+                                          lambda: IncrementalAPIMap.load(name), MAX_CACHED_BUILDS)
+            if build.refresh():
+                build.save()
+            if optimize is None:
+                optimize = len(build.api_map) > TYPED_GRAMMAR_MAX_MEMBERS
+            grammar = build.optimized_grammar() if optimize else build.grammar
+            return Gadget(None if isinstance(module, str) else module, name, build.api_map, grammar)
+
+        cache = cache or APIMapCache()
+        if recursive:
+            crawled = cache.extract(module, "source_package")
+            api_map = flatten_api_map(crawled)
+        else:
+            kind = "source_functions" if static else "sandboxed_functions" if sandboxed else "functions"
+            api_map = cache.extract(name if sandboxed else module, kind)
 
         # Generate grammar from the API map.
-        grammar = convert_to_lark_grammar(api_map)
-        return Gadget(module, module.__name__, api_map, grammar)
+        if optimize is None:
+            optimize = len(api_map) > TYPED_GRAMMAR_MAX_MEMBERS
+        with tracing.span("grammar.generate", members=len(api_map), optimize=optimize):
+            if optimize:
+                grammar, _ = optimize_lark_grammar(api_map, measure=False)
+            else:
+                grammar = convert_to_lark_grammar(api_map)
+        if recursive:
+            api_map = APIMap.from_crawl(crawled)
+        return Gadget(None if isinstance(module, str) else module, name, api_map, grammar)
+
+
+@lru_cache(maxsize=None)
+def _build_context():
+    # A fork server forks build workers from a clean process that has imported this module
+    # once, so each worker starts in milliseconds without inheriting the caller's threads
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _build_worker(connection, module_name, options):
+    # Runs in a build_many worker process; sends back the grammar and the API map as Arrow IPC
+    try:
+        gadget = GadgetFactory.build_gadget(module_name, **options)
+        sink = pa.BufferOutputStream()
+        table = gadget.api_map.to_arrow()
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        connection.send(("ok", gadget.grammar, sink.getvalue().to_pybytes()))
+    except BaseException as e:
+        connection.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        connection.close()
+
 
-# Example: Build a Gadget for networkx
-gadget_networkx = GadgetFactory.build_gadget(nx)
-print(gadget_networkx.get_tool_description())
+def _await_build(process, receiver, timeout):
+    # Blocks (in a waiter thread) until the worker reports, dies or runs out of time
+    if not receiver.poll(timeout):
+        process.kill()
+        process.join()
+        return "error", f"timed out after {timeout}s"
+    try:
+        result = receiver.recv()
+    except EOFError:
+        process.join()
+        return "error", f"worker exited with code {process.exitcode}"
+    process.join()
+    return result
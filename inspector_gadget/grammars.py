@@ -0,0 +1,392 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+import weakref
+from collections import OrderedDict
+
+import lark
+
+from . import tracing
+from .cache import default_cache_dir
+from .utils import assemble_lark_grammar, convert_to_lark_grammar, is_api_name, lark_args_rules, typed_rules
+
+
+# --- Compiled Grammar Cache ---
+# Purpose: Stop paying for Lark parser-table construction (and the outlines CFG generator
+#          built on top of it) on every process start.
+# Strength: Keyed by grammar and tokenizer hashes, so any process with the same API surface
+#           and model reuses the same compiled artifacts.
+# Limitation: Only LALR parsers can be serialized by Lark. outlines builds its own guide from
+#             the grammar string, so generators are memoized per process rather than on disk.
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 64
+
+
+def grammar_hash(grammar, **options):
+    """
+    Returns a stable hex digest for a grammar string and the Lark options it is compiled with.
+    """
+    digest = hashlib.sha256(grammar.encode())
+    digest.update(repr(sorted(options.items())).encode())
+    digest.update(lark.__version__.encode())
+    return digest.hexdigest()[:32]
+
+
+_tokenizer_hashes = {}  # id(tokenizer) -> (weak reference to it, digest); dropped with the tokenizer
+
+
+def tokenizer_hash(tokenizer):
+    """
+    Returns a stable hex digest of a tokenizer's vocabulary and special tokens.
+    Accepts outlines tokenizers (.vocabulary) and Hugging Face tokenizers (.get_vocab()).
+    """
+    cached = _tokenizer_hashes.get(id(tokenizer))
+    if cached is not None and cached[0]() is tokenizer:
+        return cached[1]
+    vocabulary = getattr(tokenizer, "vocabulary", None)
+    if vocabulary is None and hasattr(tokenizer, "get_vocab"):
+        vocabulary = tokenizer.get_vocab()
+    digest = hashlib.sha256()
+    for token, token_id in sorted((vocabulary or {}).items(), key=lambda item: item[1]):
+        digest.update(f"{token_id}\0{token}\0".encode("utf-8", "surrogatepass"))
+    digest.update(repr(getattr(tokenizer, "eos_token_id", None)).encode())
+    digest.update(repr(sorted(getattr(tokenizer, "special_tokens", None) or ())).encode())
+    key = id(tokenizer)
+    try:
+        reference = weakref.ref(tokenizer, lambda _: _tokenizer_hashes.pop(key, None))
+    except TypeError:
+        return digest.hexdigest()[:32]  # not weakly referenceable: not memoized, so not kept alive
+    _tokenizer_hashes[key] = (reference, digest.hexdigest()[:32])
+    return _tokenizer_hashes[key][1]
+
+
+def sampler_description(sampler):
+    """
+    Returns a hashable description of an outlines sampler: its type and parameters (e.g.
+    MultinomialSampler samples, top_k, top_p, temperature), so equal samplers compare equal.
+    """
+    if sampler is None:
+        return None
+    kind = f"{type(sampler).__module__}.{type(sampler).__qualname__}"
+    parameters = getattr(sampler, "__dict__", None)
+    if parameters is None:
+        return kind, repr(sampler)
+    return kind, tuple(sorted((name, value if isinstance(value, (int, float, str, bool, type(None))) else repr(value))
+                              for name, value in parameters.items()))
+
+
+class GrammarCache:
+    """
+    A two-level cache of compiled grammars.
+
+    parser() returns a Lark LALR parser, served from an in-process LRU, then from disk
+    (Lark.save/Lark.load files keyed by grammar hash), and only then built from scratch.
+    The disk cache is bounded by max_bytes and max_entries and evicts least recently used
+    files first. cfg_generator() memoizes outlines CFG generators by grammar hash plus
+    tokenizer hash, so a warm process serves constrained generation without rebuilding them.
+
+    Generators are not stored on disk, so a cold process still builds its own. outlines'
+    CFG generation (outlines.fsm.guide.CFGGuide, outlines 0.1) has no vocabulary-aligned
+    index to persist: it builds its own Lark parser from the grammar string and checks the
+    vocabulary token by token at each step, and it can't be given a cached parser.
+    """
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES,
+                 memory_entries=8):
+        self.cache_dir = os.path.join(cache_dir or default_cache_dir(), "grammars")
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._parsers = OrderedDict()
+        self._generators = OrderedDict()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.lark")
+
+    def _remember(self, table, key, value):
+        table[key] = value
+        table.move_to_end(key)
+        while len(table) > self.memory_entries:
+            table.popitem(last=False)
+
+    def parser(self, grammar, **options):
+        """
+        Returns a compiled lark.Lark LALR parser for grammar. Extra options are passed to Lark
+        and are part of the cache key.
+        """
+        options.setdefault("parser", "lalr")
+        key = grammar_hash(grammar, **options)
+        if key in self._parsers:
+            self._parsers.move_to_end(key)
+            tracing.count("grammar_cache", result="memory")
+            return self._parsers[key]
+
+        path = self._path(key)
+        parser = None
+        with tracing.span("grammar.load", bytes=len(grammar)):
+            try:
+                with open(path, "rb") as f:
+                    parser = lark.Lark.load(f)
+                os.utime(path)  # mark as recently used for eviction
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                # Written by an incompatible Lark version or truncated: rebuild and overwrite
+                print(f"Discarding unreadable grammar cache entry {path}: {e}")
+
+        if parser is None:
+            tracing.count("grammar_cache", result="miss")
+            with tracing.span("grammar.compile", bytes=len(grammar), parser=options["parser"]):
+                parser = lark.Lark(grammar, **options)
+            if options["parser"] == "lalr":
+                self._store(key, parser)
+        else:
+            tracing.count("grammar_cache", result="disk")
+        self._remember(self._parsers, key, parser)
+        return parser
+
+    def _store(self, key, parser):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                parser.save(f)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.evict()
+
+    def cfg_generator(self, model, grammar, sampler=None):
+        """
+        Returns outlines.generate.cfg(model, grammar, sampler), memoized by grammar hash,
+        tokenizer hash and sampler description (see sampler_description), so a new but equal
+        sampler reuses the generator. A generator calls the model it was built for, so the key
+        also holds the model's identity; the cached generator keeps the model alive, so its id
+        can't be reused while the entry exists.
+        """
+        from outlines import generate
+
+        key = (grammar_hash(grammar), tokenizer_hash(model.tokenizer), sampler_description(sampler), id(model))
+        if key in self._generators:
+            self._generators.move_to_end(key)
+            tracing.count("generator_cache", result="hit")
+            return self._generators[key]
+        tracing.count("generator_cache", result="miss")
+        with tracing.span("grammar.generator", bytes=len(grammar)):
+            generator = generate.cfg(model, grammar) if sampler is None else generate.cfg(model, grammar, sampler=sampler)
+        self._remember(self._generators, key, generator)
+        return generator
+
+    def warm(self, grammar, model=None, sampler=None):
+        """
+        Compiles grammar ahead of time (and its outlines generator when a model is given).
+        """
+        self.parser(grammar)
+        if model is not None:
+            self.cfg_generator(model, grammar, sampler)
+
+    def evict(self):
+        """
+        Removes least recently used entries until the disk cache fits max_bytes and max_entries.
+        """
+        try:
+            entries = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith(".lark")]
+        except FileNotFoundError:
+            return
+        stats = []
+        for path in entries:
+            try:
+                stats.append((os.stat(path), path))
+            except FileNotFoundError:
+                continue
+        stats.sort(key=lambda item: item[0].st_mtime_ns)
+        total = sum(stat.st_size for stat, _ in stats)
+        while stats and (total > self.max_bytes or len(stats) > self.max_entries):
+            stat, path = stats.pop(0)
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= stat.st_size
+
+    def clear(self):
+        """
+        Drops every cached parser and generator, in memory and on disk.
+        """
+        self._parsers.clear()
+        self._generators.clear()
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                os.unlink(os.path.join(self.cache_dir, name))
+
+
+_default_cache = None
+
+
+def default_grammar_cache():
+    """
+    Returns the process-wide GrammarCache used by GadgetFactory.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = GrammarCache()
+    return _default_cache
+
+
+# --- Grammar Minimization ---
+# Purpose: Keep grammars for thousands of API members small enough to compile and decode quickly.
+# Strength: Callee names become a few trie-shaped terminals instead of one alternative per name,
+#           members with identical argument rules share them, and dead rules are dropped.
+# Limitation: Parse trees differ from convert_to_lark_grammar's (one node per argument shape,
+#             not per member); the accepted language is unchanged.
+
+_PLACEHOLDER = "\x00"
+_DEFINITION = re.compile(r"^(\??[_A-Za-z][_A-Za-z0-9]*)(?:\.-?\d+)?\s*:")
+_LITERALS = re.compile(r'"(?:[^"\\]|\\.)*"i?|/(?:[^/\\\n]|\\.)+/[imslux]*')
+_SYMBOL = re.compile(r"[_A-Za-z][_A-Za-z0-9]*")
+_WS_CHARS = "[ \\t\\f\\r\\n]"  # the characters common.WS ignores
+
+
+def trie_regex(words):
+    """
+    Returns a regex matching exactly the given words, factored as a trie so shared
+    prefixes are matched once, e.g. ["add_edge", "add_node"] -> "add_(?:edge|node)".
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node):
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if all(len(branch) == 1 for branch in branches) and len(branches) > 1:
+            body = "[" + "".join(branches) + "]"
+        elif len(branches) == 1:
+            body = branches[0]
+        else:
+            body = "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            body = body + "?" if body.startswith("[") or len(body) == 1 else f"(?:{body})?"
+        return body
+
+    return emit(trie)
+
+
+def _definitions(grammar):
+    """
+    Splits grammar text into ({symbol: definition text}, directive lines), in order.
+    """
+    definitions = OrderedDict()
+    directives = []
+    current = None
+    for line in grammar.splitlines():
+        match = _DEFINITION.match(line)
+        if match:
+            current = match.group(1).lstrip("?")
+            definitions[current] = line
+        elif line.startswith("%"):
+            directives.append(line)
+            current = None
+        elif current is not None and line.strip():
+            definitions[current] += "\n" + line
+    return definitions, directives
+
+
+def _references(text):
+    body = text.split(":", 1)[1] if ":" in text else text
+    return set(_SYMBOL.findall(_LITERALS.sub(" ", body)))
+
+
+def prune_unreachable(grammar, start="start"):
+    """
+    Returns grammar without the rules and terminals that cannot be reached from start
+    (or from an %ignore directive).
+    """
+    definitions, directives = _definitions(grammar)
+    reachable = set()
+    pending = [start] + [name for line in directives if line.startswith("%ignore") for name in _references(line[7:])]
+    while pending:
+        symbol = pending.pop()
+        if symbol in reachable:
+            continue
+        reachable.add(symbol)
+        if symbol in definitions:
+            pending.extend(_references(definitions[symbol]) - reachable)
+    lines = [text for symbol, text in definitions.items() if symbol in reachable]
+    return "\n".join(lines + [""] + directives)
+
+
+def grammar_stats(grammar):
+    """
+    Returns {"rules": n, "terminals": n} counted from the grammar's own definitions.
+    """
+    definitions, _ = _definitions(grammar)
+    terminals = sum(1 for symbol in definitions if symbol.lstrip("_")[:1].isupper())
+    return {"rules": len(definitions) - terminals, "terminals": terminals}
+
+
+def _build_seconds(grammar):
+    started = time.perf_counter()
+    lark.Lark(grammar, parser="lalr")
+    return time.perf_counter() - started
+
+
+def optimize_lark_grammar(api_map, measure=True, compare=False, typed=None):
+    """
+    Optimizing backend for convert_to_lark_grammar: accepts the same calls, with a much
+    smaller grammar for large API surfaces. Returns (grammar, report).
+
+    Members are grouped by their argument rules (identical rules are emitted once per group;
+    typed works as in convert_to_lark_grammar: untyped members all share the generic `args`),
+    each group's callee names are matched by one trie-shaped terminal, and unreachable rules
+    are pruned. The callee terminal includes the opening parenthesis, so names that are
+    prefixes of each other ("dump" / "dumps") can never be mis-lexed across groups.
+
+    The report holds the optimized grammar's rule and terminal counts. With measure=True it
+    also holds the original's counts (rendering it costs as much as convert_to_lark_grammar)
+    and the LALR parser-build time of the optimized grammar; compare=True also times the
+    original, which can take a long time for big APIs. Hot paths pass measure=False.
+    """
+    typed = typed_rules(typed, sum(1 for name in api_map if is_api_name(name)))
+    groups = OrderedDict()  # (args expression, aux rules) -> callee names
+    for name, signature in api_map.items():
+        if not is_api_name(name):
+            continue
+        args_expr, aux_rules = lark_args_rules(_PLACEHOLDER, signature if typed else None)
+        groups.setdefault((args_expr, tuple(aux_rules)), []).append(name)
+
+    rules = OrderedDict()
+    for k, ((args_expr, aux_rules), names) in enumerate(groups.items()):
+        prefix = f"sig_{k}"
+        lines = [
+            f"call_{k}: CALLEE_{k} {args_expr} \")\"".replace(_PLACEHOLDER, prefix),
+            f"CALLEE_{k}: /{trie_regex(names)}{_WS_CHARS}*\\(/",
+        ]
+        lines.extend(rule.replace(_PLACEHOLDER, prefix) for rule in aux_rules)
+        rules[f"call_{k}"] = "\n".join(lines)
+
+    grammar = prune_unreachable(assemble_lark_grammar(rules))
+    after = grammar_stats(grammar)
+    report = {
+        "members": sum(len(names) for names in groups.values()),
+        "groups": len(groups),
+        "rules_after": after["rules"],
+        "terminals_after": after["terminals"],
+    }
+    if measure or compare:
+        original = convert_to_lark_grammar(api_map, typed)
+        before = grammar_stats(original)
+        report["rules_before"] = before["rules"]
+        report["terminals_before"] = before["terminals"]
+    if measure:
+        report["build_seconds_after"] = _build_seconds(grammar)
+    if compare:
+        report["build_seconds_before"] = _build_seconds(original)
+    return grammar, report
@@ -1,7 +1,16 @@
-import networkx as nx
+import heapq
+import os
+import re
+from collections import OrderedDict
 from enum import Enum
-from outlines import models, generate
-from outlines.samplers import greedy, Sampler
+from functools import lru_cache
+from itertools import count
+
+import numpy as np
+import pandas as pd
+
+from . import tracing
+
 
 class SearchMethod(Enum):
     DFS = "dfs"
@@ -10,34 +19,1230 @@ class SearchMethod(Enum):
     DIJKSTRA = "dijkstra"
     ASTAR = "astar"
 
-class GraphTool():
-    def __init__(self, nodes: pd.DataFrame, edges: pd.DataFrame, sampler: Sampler  = greedy()):
 
-        self.nodes = nodes
-        self.edges = edges
-        self.sampler = sampler
+# Methods that need a target; the others are traversals, which take one optionally
+PATH_METHODS = (SearchMethod.DIJKSTRA, SearchMethod.ASTAR)
+
+
+# --- CSR Graph Engine ---
+# Purpose: Search API and call graphs with millions of edges without a dict-of-dicts graph.
+# Strength: Built straight from the edge columns with NumPy (no per-edge Python objects); a few
+#           flat arrays hold the whole graph, and BFS expands each level with array operations.
+#           Updates go to a small overlay, so they cost as much as the change, not the graph.
+# Limitation: Options it doesn't implement fall back to NetworkX (see GraphTool).
+
+class CSRGraph:
+    """
+    A graph in compressed sparse row form. Nodes are numbered 0..n-1; ids[i] is the id of
+    node i, and node i's out-edges go to indices[indptr[i]:indptr[i + 1]] with the matching
+    weights. Each node's edges keep the order they had in the edge frame, so traversals visit
+    nodes in the same order as NetworkX does on the same frame.
+
+    Every search takes and returns node ids. Traversals (BFS, DFS, BEAM) return the visited
+    nodes in order, or with a target the path to it in the search tree; path searches
+    (DIJKSTRA, ASTAR) return the shortest path. Unreachable targets give None.
+
+    The arrays are never modified in place. add_nodes/remove_nodes/add_edges/remove_edges
+    record changes in an overlay that searches read through, and compact() folds it into new
+    arrays once it grows past compact_ratio of the edge count. Node numbers never change:
+    removed nodes stay behind as unreachable tombstones, and a removed id that is added again
+    gets a new number.
+    """
+    # Options each method implements here; any other option goes to NetworkX
+    OPTIONS = {
+        SearchMethod.BFS: {"depth_limit"},
+        SearchMethod.DFS: {"depth_limit"},
+        SearchMethod.BEAM: {"width", "value"},
+        SearchMethod.DIJKSTRA: set(),
+        SearchMethod.ASTAR: {"heuristic"},
+    }
+
+    def __init__(self, ids, indptr, indices, weights, directed=True, compact_ratio=0.1):
+        self.ids = ids
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.directed = directed
+        self.compact_ratio = compact_ratio
+        self._index = pd.Index(ids)
+        self._dead = set()      # removed node numbers (tombstones)
+        self._renumbered = {}   # id -> number, for ids whose number the index doesn't give
+        self._reset_overlay()
+
+    def _reset_overlay(self):
+        self._extra_ids = []    # ids of nodes added since the last compaction, numbered from len(ids)
+        self._fresh_dead = set()  # nodes removed since the last compaction (the arrays still hold their edges)
+        self._added = {}        # node -> {child: weight}, edges added since the last compaction
+        self._removed = {}      # node -> children whose array edges are removed
+        self._reweighted = {}   # node -> {child: weight}, new weights of array edges
+        self._changes = 0
+        self._overlay_arrays = None
+
+    @classmethod
+    def from_frames(cls, nodes, edges, source="source", target="target", weight="weight", node_id="id",
+                    directed=True):
+        """
+        Builds the graph from an edge frame (source, target and optional weight columns,
+        weights default to 1) and an optional node frame, whose node_id column adds nodes
+        that have no edges. Undirected graphs store every edge in both directions.
+        """
+        node_ids = nodes[node_id].to_numpy() if nodes is not None and node_id in nodes else np.empty(0, object)
+        sources = edges[source].to_numpy()
+        targets = edges[target].to_numpy()
+        codes, ids = pd.factorize(np.concatenate([node_ids, sources, targets]))
+        m = len(sources)
+        src = codes[len(node_ids):len(node_ids) + m]
+        dst = codes[len(node_ids) + m:]
+        weights = (edges[weight].to_numpy(np.float64) if weight in edges else np.ones(m))
+        if not directed:
+            # Both directions of each edge side by side, so every node's edges keep frame order
+            # (the stable sort in _csr_arrays preserves it), as in a NetworkX adjacency
+            src, dst = np.column_stack([src, dst]).ravel(), np.column_stack([dst, src]).ravel()
+            weights = np.repeat(weights, 2)
+        return cls.from_arrays(np.asarray(ids, dtype=object), src, dst, weights, directed)
+
+    @classmethod
+    def from_arrays(cls, ids, src, dst, weights, directed=True):
+        """
+        Builds the graph from node ids and parallel arrays of edge endpoints (node numbers) and weights.
+        """
+        return cls(ids, *cls._csr_arrays(len(ids), src, dst, weights), directed=directed)
+
+    @staticmethod
+    def _csr_arrays(n, src, dst, weights):
+        order = np.argsort(src, kind="stable")
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+        index_type = np.int32 if n < 2 ** 31 else np.int64
+        return indptr, dst[order].astype(index_type), np.asarray(weights, dtype=np.float64)[order]
+
+    def __len__(self):
+        return self.num_numbers - len(self._dead)
+
+    @property
+    def num_numbers(self):
+        # Node numbers in use, tombstones included
+        return len(self.ids) + len(self._extra_ids)
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def nbytes(self):
+        return self.indptr.nbytes + self.indices.nbytes + self.weights.nbytes + self.ids.nbytes
+
+    def node(self, node_id):
+        """
+        Returns the number of the node with the given id. Raises KeyError for unknown nodes.
+        """
+        number = self._renumbered.get(node_id)
+        if number is None:
+            number = self._index_number(node_id)
+        if number is None or number in self._dead:
+            raise KeyError(f"Unknown node {node_id!r}")
+        return number
+
+    def _index_number(self, node_id):
+        try:
+            number = self._index.get_loc(node_id)
+        except (KeyError, TypeError):
+            return None
+        # Duplicate ids only come from tombstones, and live ones are in _renumbered
+        return int(number) if isinstance(number, (int, np.integer)) else None
+
+    def node_id(self, number):
+        return self.ids[number] if number < len(self.ids) else self._extra_ids[number - len(self.ids)]
+
+    def _node_ids(self, numbers):
+        if isinstance(numbers, np.ndarray) and not self._extra_ids:
+            return self.ids[numbers].tolist()
+        return [self.node_id(number) for number in numbers]
+
+    def successors(self, node):
+        """
+        Returns node's successors (node numbers) as a list, in edge order.
+        """
+        return self._out_edges(node)[0]
+
+    def _out_edges(self, node):
+        # (children, weights) of node, with the overlay applied
+        if node < len(self.ids) and node not in self._dead:
+            begin, end = self.indptr[node], self.indptr[node + 1]
+            children = self.indices[begin:end].tolist()
+            weights = self.weights[begin:end].tolist()
+            removed = self._removed.get(node)
+            reweighted = self._reweighted.get(node)
+            if removed or reweighted or self._fresh_dead:
+                edges = [(child, reweighted.get(child, weight) if reweighted else weight)
+                         for child, weight in zip(children, weights)
+                         if child not in self._fresh_dead and not (removed and child in removed)]
+                children = [child for child, _ in edges]
+                weights = [weight for _, weight in edges]
+        else:
+            children, weights = [], []
+        added = self._added.get(node)
+        if added:
+            children = children + list(added)
+            weights = weights + list(added.values())
+        return children, weights
+
+    def out_degree(self, nodes):
+        """
+        Returns the out-degrees of an array of node numbers.
+        """
+        nodes = np.asarray(nodes, dtype=np.int64)
+        in_arrays = nodes < len(self.ids)
+        clipped = np.where(in_arrays, nodes, 0)
+        degrees = np.where(in_arrays, self.indptr[clipped + 1] - self.indptr[clipped], 0)
+        if self._changes:
+            for i in np.flatnonzero(np.isin(nodes, self._overlay_nodes())):
+                degrees[i] = len(self._out_edges(int(nodes[i]))[0])
+        return degrees
+
+    def _overlay_nodes(self):
+        # Nodes whose edges the overlay changes (directly, or through a removed child)
+        if self._overlay_arrays is None:
+            touched = set(self._added) | set(self._removed) | set(self._reweighted)
+            self._overlay_arrays = (np.fromiter(touched, np.int64, len(touched)),
+                                    np.fromiter(self._fresh_dead, np.int64, len(self._fresh_dead)))
+        if self._fresh_dead:
+            # Every node may have an edge into a tombstone: fall back to exact counts for all
+            return np.arange(self.num_numbers)
+        return self._overlay_arrays[0]
+
+    def _expand(self, frontier, weights=False):
+        # (children, parents, weights or None) of the frontier's out-edges, in visiting order,
+        # with the overlay applied
+        in_arrays = frontier < len(self.ids)
+        clipped = np.where(in_arrays, frontier, 0)
+        starts = self.indptr[clipped]
+        counts = np.where(in_arrays, self.indptr[clipped + 1] - starts, 0)
+        ends = np.cumsum(counts)
+        total = int(ends[-1]) if len(ends) else 0
+        offsets = np.repeat(starts - ends + counts, counts) + np.arange(total)
+        children = self.indices[offsets].astype(np.int64)
+        parents = np.repeat(frontier, counts)
+        edge_weights = self.weights[offsets] if weights else None
+        if not self._changes:
+            return children, parents, edge_weights
+
+        self._overlay_nodes()
+        touched, dead = self._overlay_arrays
+        keep = ~np.isin(children, dead) if len(dead) else np.ones(total, dtype=bool)
+        for i in np.flatnonzero(np.isin(frontier, touched)):
+            node = int(frontier[i])
+            block = slice(ends[i] - counts[i], ends[i])
+            removed = self._removed.get(node)
+            if removed:
+                keep[block] &= ~np.isin(children[block], list(removed))
+            reweighted = self._reweighted.get(node) if weights else None
+            if reweighted:
+                for j in np.flatnonzero(np.isin(children[block], list(reweighted))) + block.start:
+                    edge_weights[j] = reweighted[int(children[j])]
+        kept_before = np.concatenate([[0], np.cumsum(keep)])
+        children, parents = children[keep], parents[keep]
+        edge_weights = edge_weights[keep] if weights else None
+        positions, added_children, added_parents, added_weights = [], [], [], []
+        for i in np.flatnonzero(np.isin(frontier, touched)):
+            node = int(frontier[i])
+            for child, weight in self._added.get(node, {}).items():
+                positions.append(kept_before[ends[i]])
+                added_children.append(child)
+                added_parents.append(node)
+                added_weights.append(weight)
+        if positions:
+            children = np.insert(children, positions, added_children)
+            parents = np.insert(parents, positions, added_parents)
+            if weights:
+                edge_weights = np.insert(edge_weights, positions, added_weights)
+        return children, parents, edge_weights
+
+    def distances(self, start):
+        """
+        Returns the shortest distance from node number start to every node number, as an array
+        (inf where unreachable). Relaxes whole frontiers of edges at once (label-correcting, as
+        Bellman-Ford), so a full single-source pass stays in NumPy.
+        """
+        distances = np.full(self.num_numbers, np.inf)
+        distances[start] = 0.0
+        frontier = np.array([start])
+        while len(frontier):
+            children, parents, weights = self._expand(frontier, weights=True)
+            candidates = distances[parents] + weights
+            better = candidates < distances[children]
+            children = children[better]
+            np.minimum.at(distances, children, candidates[better])
+            frontier = np.unique(children)
+        return distances
+
+    def reversed(self):
+        """
+        Returns a graph with every edge reversed and the same node numbers (compacting first).
+        """
+        if self._changes:
+            self.compact()
+        src = np.repeat(np.arange(len(self.ids)), np.diff(self.indptr))
+        return CSRGraph.from_arrays(self.ids, self.indices.astype(np.int64), src, self.weights, self.directed)
+
+    # -- updates --
+
+    def _number(self, node_id, create=False):
+        try:
+            return self.node(node_id)
+        except KeyError:
+            if not create:
+                return None
+        number = self.num_numbers
+        self._extra_ids.append(node_id)
+        self._renumbered[node_id] = number
+        self._changes += 1
+        return number
 
-    def update_graph(self, nodes: pd.DataFrame, edges: pd.DataFrame):
-        self.G = self.G.update(nodes, edges)
+    def add_nodes(self, node_ids):
+        """
+        Adds the nodes that aren't in the graph yet. Returns the changed node numbers (none:
+        a new node has no edges, so no search result depends on it).
+        """
+        for node_id in node_ids:
+            self._number(node_id, create=True)
+        return set()
 
-    def query_graph(self, prompt):
+    def remove_nodes(self, node_ids):
+        """
+        Removes nodes (unknown ids are ignored) and their edges. Returns the changed node numbers.
+        """
+        changed = set()
+        for node_id in node_ids:
+            number = self._number(node_id)
+            if number is None:
+                continue
+            self._dead.add(number)
+            self._fresh_dead.add(number)
+            self._renumbered.pop(node_id, None)
+            for overlay in (self._added, self._removed, self._reweighted):
+                overlay.pop(number, None)
+            for added in self._added.values():
+                added.pop(number, None)
+            changed.add(number)
+            self._changes += 1
+        self._overlay_arrays = None
+        return changed
 
-    def choose_search_method(self, prompt):
-        generator = generate.choice(self.model, SearchMethod, self.sampler)
-    
-        method = generator(prompt)
+    def _has_array_edge(self, source, target):
+        if source >= len(self.ids):
+            return False
+        return bool(np.any(self.indices[self.indptr[source]:self.indptr[source + 1]] == target))
 
+    def add_edges(self, sources, targets, weights=None):
+        """
+        Adds edges, or sets the weight of existing ones (missing nodes are created; weights
+        default to 1). Returns the changed node numbers.
+        """
+        changed = set()
+        weights = [1.0] * len(sources) if weights is None else weights
+        for source_id, target_id, weight in zip(sources, targets, weights):
+            source = self._number(source_id, create=True)
+            target = self._number(target_id, create=True)
+            for u, v in ((source, target),) if self.directed else ((source, target), (target, source)):
+                if self._has_array_edge(u, v) and v not in self._removed.get(u, ()):
+                    # Keep its place in the edge order, as NetworkX does for an existing edge
+                    self._reweighted.setdefault(u, {})[v] = float(weight)
+                else:
+                    self._added.setdefault(u, {})[v] = float(weight)
+                changed.add(u)
+                self._changes += 1
+        self._overlay_arrays = None
+        self._maybe_compact()
+        return changed
+
+    def remove_edges(self, sources, targets):
+        """
+        Removes edges (unknown ones are ignored). Returns the changed node numbers.
+        """
+        changed = set()
+        for source_id, target_id in zip(sources, targets):
+            source, target = self._number(source_id), self._number(target_id)
+            if source is None or target is None:
+                continue
+            for u, v in ((source, target),) if self.directed else ((source, target), (target, source)):
+                if self._added.get(u, {}).pop(v, None) is not None or self._has_array_edge(u, v):
+                    if self._has_array_edge(u, v):
+                        self._removed.setdefault(u, set()).add(v)
+                        self._reweighted.get(u, {}).pop(v, None)
+                    changed.add(u)
+                    self._changes += 1
+        self._overlay_arrays = None
+        self._maybe_compact()
+        return changed
+
+    def _maybe_compact(self):
+        if self._changes > self.compact_ratio * max(self.num_edges, 1024):
+            self.compact()
+
+    def compact(self):
+        """
+        Folds the overlay into new arrays (node numbers are kept).
+        """
+        n = self.num_numbers
+        src = np.repeat(np.arange(len(self.ids)), np.diff(self.indptr))
+        dst = self.indices.astype(np.int64)
+        weights = self.weights.copy()
+        keep = ~np.isin(src, list(self._fresh_dead)) & ~np.isin(dst, list(self._fresh_dead))
+        for node, removed in self._removed.items():
+            block = slice(self.indptr[node], self.indptr[node + 1])
+            keep[block] &= ~np.isin(dst[block], list(removed))
+        for node, reweighted in self._reweighted.items():
+            block = slice(self.indptr[node], self.indptr[node + 1])
+            for i in np.flatnonzero(np.isin(dst[block], list(reweighted))):
+                weights[block.start + i] = reweighted[int(dst[block.start + i])]
+        added = [(node, child, weight) for node, children in self._added.items() for child, weight in children.items()]
+        src = np.concatenate([src[keep], np.array([edge[0] for edge in added], dtype=np.int64)])
+        dst = np.concatenate([dst[keep], np.array([edge[1] for edge in added], dtype=np.int64)])
+        weights = np.concatenate([weights[keep], np.array([edge[2] for edge in added], dtype=np.float64)])
+
+        self.ids = np.concatenate([self.ids, np.array(self._extra_ids + [None], dtype=object)[:-1]])
+        self.indptr, self.indices, self.weights = self._csr_arrays(n, src, dst, weights)
+        self._index = pd.Index(self.ids)
+        # Ids still need an explicit number if the index can't give it (re-added after removal)
+        self._renumbered = {node_id: number for node_id, number in self._renumbered.items()
+                            if self._index_number(node_id) != number}
+        self._reset_overlay()
+
+    def to_frames(self, source="source", target="target", weight="weight", node_id="id"):
+        """
+        Returns (nodes, edges) frames of the current graph (each undirected edge once per direction).
+        """
+        live = [number for number in range(self.num_numbers) if number not in self._dead]
+        rows = [(self.node_id(u), self.node_id(v), w) for u in live for v, w in zip(*self._out_edges(u))]
+        edges = pd.DataFrame(rows, columns=[source, target, weight])
+        return pd.DataFrame({node_id: self._node_ids(live)}), edges
+
+    # -- searches --
+
+    def supports(self, method, options):
+        return set(options) <= self.OPTIONS[method]
+
+    def search(self, method, source, target=None, **options):
+        """
+        Runs method (a SearchMethod) from source, to target if given; see the class docstring.
+        """
+        return self.trace(method, source, target, **options)[0]
+
+    def trace(self, method, source, target=None, landmarks=None, **options):
+        """
+        Like search, but returns (result, discovered): discovered holds the numbers of every node
+        the search reached, the only nodes whose changes can alter the result (see GraphTool).
+        An ASTAR search without a heuristic uses the landmarks (a LandmarkIndex), if given.
+        """
+        method = SearchMethod(method)
+        if method in PATH_METHODS and target is None:
+            raise ValueError(f"{method.value} search needs a target")
+        start = self.node(source)
+        goal = None if target is None else self.node(target)
         if method == SearchMethod.BFS:
-            return nx.bfs_tree(G, source=start_node)
+            found, discovered = self._bfs(start, goal, options.get("depth_limit"))
         elif method == SearchMethod.DFS:
-            return nx.dfs_tree(G, source=start_node)
+            found, discovered = self._dfs(start, goal, options.get("depth_limit"))
+        elif method == SearchMethod.BEAM:
+            found, discovered = self._beam(start, goal, options.get("width"), options.get("value"))
         elif method == SearchMethod.DIJKSTRA:
-            return nx.dijkstra_path(G, source=start_node, target=end_node)
-        elif method == SearchMethod.ASTAR:
-            return nx.astar_path(G, source=start_node, target=end_node)
+            found, discovered = self._dijkstra(start, goal)
+        else:
+            found, discovered = self._astar(start, goal, options.get("heuristic"), landmarks)
+        return None if found is None else self._node_ids(found), discovered
+
+    @staticmethod
+    def _path(predecessors, start, goal):
+        path = [goal]
+        while path[-1] != start:
+            path.append(predecessors[path[-1]])
+        return path[::-1]
+
+    def _bfs(self, start, goal, depth_limit=None):
+        # Level-synchronous: each level's successors are gathered, filtered and deduplicated as
+        # arrays, keeping first occurrences in order, which is exactly the FIFO visiting order
+        visited = np.zeros(self.num_numbers, dtype=bool)
+        visited[start] = True
+        predecessors = {}
+        order = [np.array([start])]
+        frontier = order[0]
+        depth = 0
+        while len(frontier) and (goal is None or not visited[goal]):
+            if depth_limit is not None and depth >= depth_limit:
+                break
+            candidates, parents, _ = self._expand(frontier)
+            if not len(candidates):
+                break
+            fresh = ~visited[candidates]
+            candidates = candidates[fresh]
+            _, first = np.unique(candidates, return_index=True)
+            first.sort()
+            frontier = candidates[first]
+            visited[frontier] = True
+            if goal is not None:
+                predecessors.update(zip(frontier.tolist(), parents[fresh][first].tolist()))
+            order.append(frontier)
+            depth += 1
+        order = np.concatenate(order)
+        if goal is None:
+            return order, order
+        return (self._path(predecessors, start, goal) if visited[goal] else None), order
+
+    def _dfs(self, start, goal, depth_limit=None):
+        # Preorder, with each node's successors expanded in edge order (as nx.dfs_preorder_nodes)
+        visited = {start}
+        order = [start]
+        predecessors = {}
+        stack = [(start, iter(self.successors(start)))]
+        while stack and goal not in visited:
+            parent, children = stack[-1]
+            for child in children:
+                if child not in visited:
+                    visited.add(child)
+                    order.append(child)
+                    predecessors[child] = parent
+                    if depth_limit is None or len(stack) < depth_limit:
+                        stack.append((child, iter(self.successors(child))))
+                    break
+            else:
+                stack.pop()
+        if goal is None:
+            return order, visited
+        return (self._path(predecessors, start, goal) if goal in visited else None), visited
+
+    def _beam(self, start, goal, width=None, value=None):
+        # Breadth-first, expanding only the `width` best successors of each node by value (a
+        # callable on node ids, default: out-degree), as nx.bfs_beam_edges. Every scored child
+        # counts as discovered: a change to one the beam left out can let it in
+        cache = {}
+
+        def scores_of(children):
+            if value is None:
+                return self.out_degree(children)
+            return np.array([cache[n] if n in cache else cache.setdefault(n, value(self.node_id(n)))
+                             for n in children.tolist()], dtype=np.float64)
+
+        visited = {start}
+        scored = {start}
+        order = [start]
+        predecessors = {}
+        queue = [start]
+        for parent in queue:
+            if goal in visited:
+                break
+            children = np.array(self.successors(parent), dtype=np.int64)
+            scored.update(children.tolist())
+            ranked = np.argsort(-scores_of(children), kind="stable")
+            for child in children[ranked[:width]].tolist():
+                if child not in visited:
+                    visited.add(child)
+                    order.append(child)
+                    predecessors[child] = parent
+                    queue.append(child)
+        if goal is None:
+            return order, scored
+        return (self._path(predecessors, start, goal) if goal in visited else None), scored
+
+    def _dijkstra(self, start, goal):
+        distances = {start: 0.0}
+        predecessors = {}
+        done = set()
+        tie = count()
+        heap = [(0.0, next(tie), start)]
+        while heap:
+            distance, _, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            if node == goal:
+                return self._path(predecessors, start, goal), distances
+            done.add(node)
+            for child, weight in zip(*self._out_edges(node)):
+                candidate = distance + weight
+                if child not in done and candidate < distances.get(child, np.inf):
+                    distances[child] = candidate
+                    predecessors[child] = node
+                    heapq.heappush(heap, (candidate, next(tie), child))
+        return None, distances
+
+    def _astar(self, start, goal, heuristic=None, landmarks=None):
+        # heuristic(u, v) estimates the distance between node ids, as for nx.astar_path; without
+        # one, landmarks give lower bounds (for all of a node's successors at once), and nodes
+        # they prove can't reach the goal are never queued
+        estimates = {}
+        lower_bound = landmarks.lower_bound(goal) if heuristic is None and landmarks is not None else None
+
+        def estimate(nodes):
+            if heuristic is not None:
+                return [estimates[node] if node in estimates else
+                        estimates.setdefault(node, heuristic(self.node_id(node), self.node_id(goal)))
+                        for node in nodes]
+            if lower_bound is not None:
+                return lower_bound(np.array(nodes, dtype=np.int64)).tolist()
+            return [0.0] * len(nodes)
+
+        costs = {start: 0.0}
+        predecessors = {}
+        done = set()
+        tie = count()
+        heap = [(estimate([start])[0], next(tie), start, 0.0)]
+        while heap:
+            _, _, node, cost = heapq.heappop(heap)
+            if node == goal:
+                return self._path(predecessors, start, goal), costs
+            if node in done or cost > costs[node]:
+                continue
+            done.add(node)
+            fresh = [(child, cost + weight) for child, weight in zip(*self._out_edges(node))
+                     if child not in done and cost + weight < costs.get(child, np.inf)]
+            if not fresh:
+                continue
+            for (child, candidate), remaining in zip(fresh, estimate([child for child, _ in fresh])):
+                if remaining != np.inf and candidate < costs.get(child, np.inf):
+                    costs[child] = candidate
+                    predecessors[child] = node
+                    heapq.heappush(heap, (candidate + remaining, next(tie), child, candidate))
+        return None, costs
+
+
+# --- Landmark Index (ALT) ---
+# Purpose: Guide A* with lower bounds from precomputed distances to and from a few landmark nodes.
+# Strength: Bounds cost a few array reads per node, need no domain heuristic, and prove most
+#           dead ends unreachable, so cold queries settle far fewer nodes than plain Dijkstra.
+# Limitation: Building runs two full shortest-path passes per landmark, and n x landmarks
+#             distances are kept. Adding or re-weighting edges invalidates it (removals don't:
+#             the old distances stay lower bounds).
+
+class LandmarkIndex:
+    """
+    Distances from (forward) and to (backward) each landmark for every node number of a
+    CSRGraph. By the triangle inequality, for any landmark L
+
+        d(v, t) >= d(L, t) - d(L, v)    and    d(v, t) >= d(v, L) - d(t, L)
+
+    and the largest of these is an admissible, consistent A* estimate. Landmarks are picked
+    farthest-first: the busiest node, then repeatedly the node farthest from those picked
+    (among nodes with out-edges: a sink bounds nothing in a directed graph).
+    """
+    def __init__(self, landmarks, forward, backward):
+        self.landmarks = landmarks  # node numbers
+        self.forward = forward      # (nodes, landmarks): d(L, v)
+        self.backward = backward    # (nodes, landmarks): d(v, L)
+
+    @classmethod
+    def build(cls, graph, count=8):
+        if graph._changes:
+            graph.compact()
+        degrees = graph.out_degree(np.arange(graph.num_numbers))
+        degrees[list(graph._dead)] = -1
+        landmarks, forward = [], []
+        nearest = np.full(graph.num_numbers, np.inf)
+        while len(landmarks) < count:
+            if not landmarks:
+                candidates = degrees
+            else:
+                reached = (degrees > 0) & np.isfinite(nearest) & (nearest > 0)
+                # Once everything reachable is covered, start from the busiest unreached node
+                candidates = np.where(reached, nearest, -1) if reached.any() else np.where(np.isinf(nearest), degrees, -1)
+            if not len(candidates) or candidates.max() < 0:
+                break
+            landmark = int(np.argmax(candidates))
+            landmarks.append(landmark)
+            forward.append(graph.distances(landmark))
+            nearest = np.minimum(nearest, forward[-1])
+        shape = (graph.num_numbers, len(landmarks))
+        forward = np.stack(forward, axis=1) if landmarks else np.empty(shape)
+        if not graph.directed:
+            return cls(landmarks, forward, forward)
+        reverse = graph.reversed()
+        backward = np.stack([reverse.distances(landmark) for landmark in landmarks], axis=1) if landmarks else np.empty(shape)
+        return cls(landmarks, forward, backward)
+
+    def nbytes(self):
+        return self.forward.nbytes + (self.backward.nbytes if self.backward is not self.forward else 0)
+
+    def lower_bound(self, goal):
+        """
+        Returns a function from an array of node numbers to lower bounds on their distances to
+        goal (inf where the landmarks prove goal unreachable). Nodes newer than the index get 0.
+        """
+        size = len(self.forward)
+        if goal >= size or not self.landmarks:
+            return lambda nodes: np.zeros(len(nodes))
+        to_goal, from_goal = self.forward[goal], self.backward[goal]
+        unknown_from_goal = np.isinf(from_goal)
+
+        def lower_bound(nodes):
+            inside = nodes < size
+            clipped = np.where(inside, nodes, 0)
+            to_nodes, from_nodes = self.forward[clipped], self.backward[clipped]
+            with np.errstate(invalid="ignore"):
+                # Terms are dropped where the landmark reaches neither end (inf - inf)
+                ahead = np.where(np.isinf(to_nodes), -np.inf, to_goal - to_nodes).max(axis=1)
+                behind = np.where(unknown_from_goal, -np.inf, from_nodes - from_goal).max(axis=1)
+            return np.where(inside, np.maximum(np.maximum(ahead, behind), 0.0), 0.0)
+        return lower_bound
+
+
+class NetworkXGraph:
+    """
+    The same search and update interface as CSRGraph over a networkx graph, which handles any
+    option the NetworkX functions accept. Used as the fallback backend, and for comparison.
+    """
+    def __init__(self, graph, weight="weight"):
+        self.graph = graph
+        self.weight = weight
+
+    @classmethod
+    def from_frames(cls, nodes, edges, source="source", target="target", weight="weight", node_id="id",
+                    directed=True):
+        import networkx as nx
+
+        graph = nx.from_pandas_edgelist(edges, source, target, edge_attr=weight if weight in edges else None,
+                                        create_using=nx.DiGraph if directed else nx.Graph)
+        if nodes is not None and node_id in nodes:
+            graph.add_nodes_from(nodes[node_id].tolist())
+        return cls(graph, weight)
+
+    def __len__(self):
+        return len(self.graph)
+
+    def add_nodes(self, node_ids):
+        self.graph.add_nodes_from(node_ids)
+
+    def remove_nodes(self, node_ids):
+        self.graph.remove_nodes_from(list(node_ids))
+
+    def add_edges(self, sources, targets, weights=None):
+        weights = [1.0] * len(sources) if weights is None else weights
+        self.graph.add_weighted_edges_from(zip(sources, targets, weights), weight=self.weight)
+
+    def remove_edges(self, sources, targets):
+        self.graph.remove_edges_from(zip(sources, targets))
+
+    def supports(self, method, options):
+        return True
+
+    def search(self, method, source, target=None, **options):
+        import networkx as nx
+
+        method = SearchMethod(method)
+        if method in PATH_METHODS and target is None:
+            raise ValueError(f"{method.value} search needs a target")
+        for node in (source, target):
+            if node is not None and node not in self.graph:
+                raise KeyError(f"Unknown node {node!r}")
+        try:
+            if method == SearchMethod.DIJKSTRA:
+                return nx.dijkstra_path(self.graph, source, target, weight=self.weight, **options)
+            if method == SearchMethod.ASTAR:
+                return nx.astar_path(self.graph, source, target, weight=self.weight, **options)
+        except nx.NetworkXNoPath:
+            return None
+
+        if method == SearchMethod.BFS:
+            edges = nx.bfs_edges(self.graph, source, **options)
+        elif method == SearchMethod.DFS:
+            edges = nx.dfs_edges(self.graph, source, **options)
+        else:
+            value = options.pop("value", None) or self._out_degree
+            edges = nx.bfs_beam_edges(self.graph, source, value, **options)
+        order = [source]
+        predecessors = {}
+        for parent, child in edges:
+            order.append(child)
+            predecessors[child] = parent
+            if child == target:
+                break
+        if target is None:
+            return order
+        if target != source and target not in predecessors:
+            return None
+        return CSRGraph._path(predecessors, source, target)
+
+    def _out_degree(self, node):
+        return self.graph.out_degree(node) if self.graph.is_directed() else self.graph.degree(node)
+
+
+MAX_CACHED_RESULTS = 1024
+
+
+def _intersects(sorted_numbers, numbers):
+    # Whether any of numbers is in the sorted array sorted_numbers
+    if not len(numbers) or not len(sorted_numbers):
+        return False
+    positions = np.minimum(np.searchsorted(sorted_numbers, numbers), len(sorted_numbers) - 1)
+    return bool((sorted_numbers[positions] == numbers).any())
+
+
+class SearchCache:
+    """
+    A bounded LRU cache of search results, keyed by (method, source, target, options) and the
+    graph version the result holds for. Rather than dropping every entry when the version
+    changes, invalidate() keeps the results an update can't affect and moves them to the new
+    version; get() only returns results for the version asked for.
+
+    Each entry holds the result and the sorted numbers of the nodes its search reached (None
+    when unknown: dropped by any update). Guided entries (A* with an estimate) are also dropped
+    when edges are added or re-weighted, since the estimates only held for the old distances.
+    """
+    def __init__(self, maxsize=MAX_CACHED_RESULTS):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # key -> [result, discovered, guided, version, hits]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, version):
+        """
+        Returns (True, result) for a cached result at version, else (False, None).
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[3] != version:
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        entry[4] += 1
+        return True, entry[0]
+
+    def put(self, key, result, discovered, version, guided=False):
+        self._entries[key] = [result, discovered, guided, version, 0]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, changed, version, edges_added=False, everything=False):
+        """
+        Drops the entries whose search reached a changed node number, and moves the rest to version.
+        """
+        changed = np.fromiter(changed, np.int64, len(changed))
+        for key, entry in list(self._entries.items()):
+            result, discovered, guided = entry[:3]
+            if everything or discovered is None or (guided and edges_added) or _intersects(discovered, changed):
+                del self._entries[key]
+                self.invalidations += 1
+            else:
+                entry[3] = version
+
+    def clear(self):
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def query_hits(self, key):
+        """
+        Returns how many times the cached result for key has been served (None if not cached).
+        """
+        entry = self._entries.get(key)
+        return None if entry is None else entry[4]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries), "maxsize": self.maxsize, "evictions": self.evictions,
+                "invalidations": self.invalidations}
+
+
+# --- Search Planner ---
+# Purpose: Pick a SearchMethod for a prompt without a model call for every graph query.
+# Strength: The query's structure (target or not, weights, heuristic) decides most queries and
+#           keywords the rest; decisions are cached per prompt template, so "path from A to B"
+#           and "path from C to D" share one, model-made or not.
+# Limitation: Keyword rules are English and coarse. Prompts whose keywords disagree go to the
+#             model, and without one, to the structural default.
+
+MAX_CACHED_PLANS = 1024
+
+# Keywords (lowercase, matched on word boundaries) -> the method they ask for. "shortest" asks
+# for the shortest-path method, which depends on the graph (see SearchPlanner.structural_default)
+PLAN_KEYWORDS = {
+    SearchMethod.DFS: ("dfs", "depth-first", "depth first", "deep", "deepest", "dive", "descend",
+                       "recursively", "exhaustive"),
+    SearchMethod.BFS: ("bfs", "breadth-first", "breadth first", "nearest", "closest", "neighbors",
+                       "neighbours", "nearby", "level by level", "fewest hops", "hops"),
+    SearchMethod.BEAM: ("beam", "most promising", "most important", "best", "top", "prune", "greedy"),
+    SearchMethod.DIJKSTRA: ("dijkstra",),
+    SearchMethod.ASTAR: ("a*", "astar", "a-star", "a star", "heuristic"),
+    "shortest": ("shortest", "cheapest", "lowest cost", "least cost", "minimum cost", "optimal path",
+                 "fastest route"),
+}
+_KEYWORD_PATTERNS = {intent: re.compile(r"(?<![\w*-])(?:" + "|".join(map(re.escape, words)) + r")(?![\w*-])")
+                     for intent, words in PLAN_KEYWORDS.items()}
+_QUOTED = re.compile(r"(['\"`]).*?\1")
+_DOTTED = re.compile(r"\b[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)+\b")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+def _replace_token(text, token, replacement):
+    # text with the occurrences of token that aren't inside a word replaced (as a regex with
+    # \w boundaries would, without compiling a pattern per node name)
+    parts, start = [], 0
+    found = text.find(token)
+    while found != -1:
+        end = found + len(token)
+        if ((found == 0 or not _is_word_char(text[found - 1]))
+                and (end == len(text) or not _is_word_char(text[end]))):
+            parts.extend((text[start:found], replacement))
+            start = end
+            found = text.find(token, end)
+        else:
+            found = text.find(token, found + 1)
+    parts.append(text[start:])
+    return "".join(parts)
+
+
+def prompt_template(prompt, names=()):
+    """
+    Returns prompt with the parts that vary between queries of the same kind replaced: the
+    given node names (as whole tokens only, so node "b" leaves "bfs" alone), quoted strings,
+    dotted names and numbers; lowercased, spaces collapsed.
+    """
+    for name in names:
+        if name is not None and str(name):
+            prompt = _replace_token(prompt, str(name), "{node}")
+    prompt = _QUOTED.sub("{node}", prompt)
+    prompt = _DOTTED.sub("{node}", prompt)
+    prompt = _NUMBER.sub("{n}", prompt)
+    return " ".join(prompt.lower().split())
+
+
+class SearchPlanner:
+    """
+    Chooses the SearchMethod for a prompt about a query's structure: whether it has a target,
+    whether the graph is weighted and whether A* has a heuristic (given, or landmarks).
+
+    Keywords in the prompt decide first (see PLAN_KEYWORDS); with none, the structure decides:
+    BFS for traversals, and the shortest-path method for paths (ASTAR with a heuristic,
+    DIJKSTRA on weighted graphs, else BFS, whose tree path has the fewest hops). Prompts whose
+    keywords ask for different methods, or for a path method without a target, are ambiguous:
+    choose_model(prompt, choices) decides those, among the methods valid for the query, or
+    returns None when it can't (no model), which leaves the structural default.
+
+    Only methods taking all the search options given (see CSRGraph.OPTIONS) are chosen: a
+    depth_limit rules out BEAM and the path methods, a heuristic everything but ASTAR. A rule's
+    pick that doesn't take them is left to the model, then to the structural default among
+    the methods that do.
+
+    Decisions, rule or model, are cached per (prompt template, structure, options) in a bounded LRU.
+    """
+    def __init__(self, choose_model=None, maxsize=MAX_CACHED_PLANS):
+        self.choose_model = choose_model  # (prompt, [SearchMethod]) -> SearchMethod or None
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.model_calls = 0
+        self._plans = OrderedDict()
+
+    @staticmethod
+    def structural_default(has_target, weighted, heuristic, allowed=tuple(SearchMethod)):
+        if not has_target:
+            method = SearchMethod.BFS
+        elif heuristic:
+            method = SearchMethod.ASTAR
         else:
-            raise ValueError(f"Invalid search method: {method}")
+            method = SearchMethod.DIJKSTRA if weighted else SearchMethod.BFS
+        return method if method in allowed else allowed[0]
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def allowed_methods(has_target, options=frozenset()):
+        """
+        Returns the methods valid for a query: those taking every option named in options (a
+        frozenset; ones no CSRGraph method takes are left to the NetworkX backend), and only
+        traversals without a target. Raises ValueError when there are none.
+        """
+        options = set(options) & set().union(*CSRGraph.OPTIONS.values())
+        allowed = tuple(method for method in SearchMethod if options <= CSRGraph.OPTIONS[method]
+                        and (has_target or method not in PATH_METHODS))
+        if not allowed:
+            raise ValueError(f"No search method takes {', '.join(sorted(options))}"
+                             + ("" if has_target else " without a target"))
+        return allowed
+
+    def rule(self, prompt, has_target, weighted=True, heuristic=False):
+        """
+        Returns the method the rules pick for prompt, or None if the prompt is ambiguous.
+        """
+        text = prompt.lower()
+        intents = {intent for intent, pattern in _KEYWORD_PATTERNS.items() if pattern.search(text)}
+        if "shortest" in intents:
+            intents.discard("shortest")
+            # An explicit path method says how; otherwise the structure does
+            if not intents & set(PATH_METHODS):
+                if not has_target:
+                    return None
+                intents.add(self.structural_default(True, weighted, heuristic))
+        if not intents:
+            return self.structural_default(has_target, weighted, heuristic)
+        if len(intents) > 1:
+            return None
+        method = intents.pop()
+        if method in PATH_METHODS and not has_target:
+            return None
+        return method
+
+    def choose(self, prompt, source=None, target=None, weighted=True, heuristic=False, options=()):
+        """
+        Returns the SearchMethod for prompt, from the cache, the rules or the model, in that
+        order. options names the search options the query passes.
+        """
+        structure = (target is not None, bool(weighted), bool(heuristic))
+        allowed = self.allowed_methods(target is not None, frozenset(options))
+        key = (prompt_template(prompt, (source, target)), structure, allowed)
+        method = self._plans.get(key)
+        if method is not None:
+            self._plans.move_to_end(key)
+            self.hits += 1
+            tracing.count("search_plan", source="cache")
+            return method
+        self.misses += 1
+
+        method = self.rule(prompt, *structure)
+        if method not in allowed:
+            method = None
+        tracing.count("search_plan", source="rule" if method is not None else "model" if self.choose_model else "default")
+        if method is None and self.choose_model is not None:
+            choices = list(allowed)
+            with tracing.span("model.choose_search_method", choices=len(choices)):
+                method = self.choose_model(prompt, choices)
+            if method is not None:
+                self.model_calls += 1
+                method = SearchMethod(method)
+                if method not in allowed:
+                    method = None
+        if method is None:
+            # No model to ask: not cached, so a model set later still gets the question
+            return self.structural_default(*structure, allowed)
+        self._plans[key] = method
+        while len(self._plans) > self.maxsize:
+            self._plans.popitem(last=False)
+        return method
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "model_calls": self.model_calls, "size": len(self._plans)}
+
+
+class GraphTool():
+    """
+    Searches a graph given as node and edge DataFrames (e.g. an API or call graph): edges have
+    source and target columns and an optional weight column, nodes an id column.
+
+    Searches run on a CSRGraph built from the frames' columns; options it doesn't implement
+    (e.g. BFS sort_neighbors) fall back to a NetworkX graph built on first need.
+    backend="networkx" uses NetworkX for everything.
+
+    update_graph applies changes in place and bumps version. Search results are cached (see
+    SearchCache, cache_info()), and an update drops only the results whose search reached a
+    changed node; the frames keep describing the graph as it was first built.
+
+    With landmarks > 0, ASTAR searches without a heuristic are guided by a LandmarkIndex of that
+    many landmarks, built on the first such search (and again after edges are added). They
+    return a shortest path, though not always the same one as NetworkX when several tie.
+    """
+    def __init__(self, nodes: pd.DataFrame, edges: pd.DataFrame, sampler=None, model=None,
+                 backend: str = "csr", directed: bool = True, source: str = "source", target: str = "target",
+                 weight: str = "weight", node_id: str = "id", landmarks: int = 0,
+                 cache_size: int = MAX_CACHED_RESULTS):
+
+        self.nodes = nodes
+        self.edges = edges
+        self.sampler = sampler
+        self.model = model
+        self.backend = backend
+        self.directed = directed
+        self.columns = {"source": source, "target": target, "weight": weight, "node_id": node_id}
+        self.version = 0
+        self.landmarks = landmarks
+        self.cache = SearchCache(cache_size)
+        self.planner = SearchPlanner(self._choose_with_model)
+        self.explored = 0  # nodes reached by the searches that ran (cache misses on the CSR backend)
+        self._build()
+
+    @classmethod
+    def from_call_graph(cls, module_or_path, edge_kinds=None, node_kinds=None, **options):
+        """
+        Returns a GraphTool over a package's call graph tables (see callgraph.build_call_graph):
+        module_or_path is a directory holding them, or a module name, whose tables are built or
+        reused from the cache. edge_kinds / node_kinds (e.g. ("calls",)) keep only those rows.
+        """
+        from .callgraph import build_call_graph, load_call_graph
+
+        path = module_or_path if os.path.isdir(module_or_path) else build_call_graph(module_or_path)
+        nodes, edges = load_call_graph(path, edge_kinds, node_kinds)
+        return cls(nodes, edges, **options)
+
+    def _build(self):
+        self.graph = (NetworkXGraph if self.backend == "networkx" else CSRGraph).from_frames(
+            self.nodes, self.edges, directed=self.directed, **self.columns)
+        self._networkx = self.graph if self.backend == "networkx" else None
+        self._landmark_index = None
+        weight = self.columns["weight"]
+        self.weighted = weight in self.edges and self.edges[weight].nunique() > 1
+        self.cache.clear()
+
+    def networkx_graph(self):
+        """
+        Returns the NetworkX backend, building it on first use (from the current graph, if updated).
+        """
+        if self._networkx is None:
+            nodes, edges = (self.nodes, self.edges) if not self.version else self.graph.to_frames(**self.columns)
+            self._networkx = NetworkXGraph.from_frames(nodes, edges, directed=self.directed, **self.columns)
+        return self._networkx
+
+    def replace_graph(self, nodes: pd.DataFrame, edges: pd.DataFrame):
+        """
+        Rebuilds the graph from complete node and edge frames. Returns the new version.
+        """
+        self.nodes = nodes
+        self.edges = edges
+        self.version += 1
+        self._build()
+        return self.version
+
+    def update_graph(self, nodes=None, edges=None, remove_nodes=None, remove_edges=None):
+        """
+        Applies a batch of changes and returns the new version: removes the edges in remove_edges
+        (a frame with source and target columns, or (source, target) pairs) and the nodes in
+        remove_nodes (ids), then adds nodes (a frame with an id column, or ids) and adds or
+        re-weights the edges in edges (a frame). Costs as much as the change, not the graph.
+        """
+        backends = [self.graph] + ([self._networkx] if self._networkx not in (None, self.graph) else [])
+        source, target, weight = self.columns["source"], self.columns["target"], self.columns["weight"]
+        changed = set()
+        for backend in backends:
+            touched = set()
+            if remove_edges is not None:
+                if isinstance(remove_edges, pd.DataFrame):
+                    pairs = (remove_edges[source].tolist(), remove_edges[target].tolist())
+                else:
+                    pairs = tuple(map(list, zip(*remove_edges))) or ([], [])
+                touched |= backend.remove_edges(*pairs) or set()
+            if remove_nodes is not None:
+                touched |= backend.remove_nodes(list(remove_nodes)) or set()
+            if nodes is not None:
+                ids = nodes[self.columns["node_id"]].tolist() if isinstance(nodes, pd.DataFrame) else list(nodes)
+                backend.add_nodes(ids)
+            if edges is not None:
+                weights = edges[weight].tolist() if weight in edges else None
+                self.weighted = self.weighted or (weights is not None and any(w != 1 for w in weights))
+                touched |= backend.add_edges(edges[source].tolist(), edges[target].tolist(), weights) or set()
+            if backend is self.graph:
+                changed = touched
+        self.version += 1
+        if edges is not None:
+            # New or re-weighted edges can shorten distances; removals only lengthen them
+            self._landmark_index = None
+        self.cache.invalidate(changed, self.version, edges_added=edges is not None,
+                              everything=isinstance(self.graph, NetworkXGraph))
+        return self.version
+
+    def landmark_index(self):
+        """
+        Returns the LandmarkIndex guiding ASTAR searches, building it if needed, or None when
+        landmarks are off (landmarks=0 or the NetworkX backend).
+        """
+        if not self.landmarks or not isinstance(self.graph, CSRGraph):
+            return None
+        if self._landmark_index is None:
+            self._landmark_index = LandmarkIndex.build(self.graph, self.landmarks)
+        return self._landmark_index
+
+    def cache_info(self):
+        """
+        Returns the result cache's counters (see SearchCache.stats), the nodes explored by the
+        searches that ran, and the landmark index size.
+        """
+        info = self.cache.stats()
+        info["explored"] = self.explored
+        info["version"] = self.version
+        info["landmark_bytes"] = self._landmark_index.nbytes() if self._landmark_index is not None else 0
+        return info
+
+    def add_node(self, node):
+        """
+        Adds a node (if it isn't in the graph already).
+        """
+        return self.update_graph(nodes=[node])
+
+    def add_edge(self, source, target, weight=1.0):
+        """
+        Adds an edge, or sets its weight if it exists.
+        """
+        columns = self.columns
+        return self.update_graph(edges=pd.DataFrame({columns["source"]: [source], columns["target"]: [target],
+                                                     columns["weight"]: [weight]}))
+
+    def search(self, method, source, target=None, **options):
+        """
+        Runs a SearchMethod from source (to target): traversals return the visited nodes in
+        order, or the tree path to target; DIJKSTRA and ASTAR return the shortest path.
+        Returns None when target is unreachable.
+        """
+        method = SearchMethod(method)
+        try:
+            key = (method, source, target, tuple(sorted(options.items())))
+            hash(key)
+        except TypeError:
+            key = None
+        if key is not None:
+            hit, result = self.cache.get(key, self.version)
+            tracing.count("search_cache", result="hit" if hit else "miss", method=method.value)
+            if hit:
+                return result
+
+        with tracing.span("graph.search", method=method.value) as step:
+            guided = method == SearchMethod.ASTAR and options.get("heuristic") is not None
+            if self.graph.supports(method, options) and isinstance(self.graph, CSRGraph):
+                landmarks = self.landmark_index() if method == SearchMethod.ASTAR and not guided else None
+                guided = guided or landmarks is not None
+                result, discovered = self.graph.trace(method, source, target, landmarks=landmarks, **options)
+                self.explored += len(discovered)
+                step.set(backend="csr", explored=len(discovered))
+                # The target counts as reached too: removing it must drop a cached "unreachable"
+                ends = [self.graph.node(target)] if target is not None else []
+                discovered = np.unique(np.concatenate([np.fromiter(discovered, np.int64, len(discovered)), ends]).astype(np.int64))
+                if method == SearchMethod.BEAM and options.get("value") is not None:
+                    discovered = None  # a custom value may read anything: any update drops the result
+            else:
+                backend = self.graph if self.graph.supports(method, options) else self.networkx_graph()
+                step.set(backend=type(backend).__name__)
+                result, discovered = backend.search(method, source, target, **options), None
+        if key is not None:
+            self.cache.put(key, result, discovered, self.version, guided)
+        return result
+
+    def query_graph(self, prompt, source, target=None, **options):
+        """
+        Searches from source (to target) with the method chosen for prompt.
+        """
+        return self.search(self.choose_search_method(prompt, source, target, **options), source, target, **options)
 
-    def add_node(self, node: Component):
+    def choose_search_method(self, prompt, source=None, target=None, **options):
+        """
+        Returns the SearchMethod for prompt and a query from source (to target) with options.
+        The SearchPlanner decides from the query's structure and the prompt's keywords; the
+        model is asked only about ambiguous prompts (never again for the same prompt template).
+        """
+        heuristic = options.get("heuristic") is not None or bool(self.landmarks and isinstance(self.graph, CSRGraph))
+        return self.planner.choose(prompt, source, target, self.weighted, heuristic, options)
 
+    def _choose_with_model(self, prompt, choices):
+        # Asks the model to pick among choices (a choice-constrained generation)
+        if self.model is None:
+            return None
+        from outlines import generate
+        from outlines.samplers import greedy
 
+        generator = generate.choice(self.model, [method.value for method in choices], self.sampler or greedy())
+        return SearchMethod(generator(prompt))
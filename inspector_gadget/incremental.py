@@ -0,0 +1,222 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+from .cache import default_cache_dir
+from .crawler import SERIAL_THRESHOLD, iter_package_modules, module_entries, summarize_modules
+from .grammars import optimize_lark_grammar
+from .static import SourceIndex, summarize_source
+from .utils import assemble_lark_grammar, lark_call_rule, lark_rule_names, typed_rules
+
+
+# --- Incremental Rebuilds ---
+# Purpose: Keep a package's API map and grammar current while its sources change many times a day.
+# Strength: A refresh stats every file but only re-parses the ones whose contents changed,
+#           then patches the map and the grammar rules of the modules that depend on them.
+# Limitation: The first build is a full crawl; module-level side effects are invisible (static).
+
+STATE_FORMAT = 3
+
+
+class IncrementalAPIMap:
+    """
+    A crawled, flattened API map (see crawler.flatten_api_map) plus the per-file fingerprints
+    and per-member grammar rules needed to update it in place.
+
+    refresh() compares each source file's (mtime, size) and, only when those moved, its
+    content hash. Changed modules are re-summarized; they and every module importing names
+    from them have their API entries rebuilt, and only the rules for members whose signature
+    changed are regenerated.
+    """
+    def __init__(self, module_name, private=False, workers=None):
+        self.module_name = module_name
+        self.private = private
+        self.workers = workers
+        self.index = SourceIndex()
+        self.fingerprints = {}      # path -> (mtime_ns, size, content digest)
+        self.modules = {}           # module name -> path
+        self.members = {}           # module name -> api names it contributes
+        self.api_map = {}           # api name -> signature string
+        self.rule_names = {}        # api name -> grammar rule name
+        self.rules = {}             # grammar rule name -> rule text
+        self.version = 0            # bumped whenever refresh() changes the API map
+        self.typed = None           # whether the rules are typed (see utils.typed_rules)
+        self._grammar = None
+        self._optimized = None      # (version, grammar) of the last optimized_grammar()
+
+    @property
+    def grammar(self):
+        """
+        The Lark grammar for the current API map, reassembled only after a change.
+        """
+        if self._grammar is None:
+            self._grammar = assemble_lark_grammar(self.rules)
+        return self._grammar
+
+    def optimized_grammar(self):
+        """
+        Returns the grammars.optimize_lark_grammar grammar for the current API map, rebuilt
+        only after a change.
+        """
+        if self._optimized is None or self._optimized[0] != self.version:
+            self._optimized = (self.version, optimize_lark_grammar(self.api_map, measure=False)[0])
+        return self._optimized[1]
+
+    def _scan(self):
+        """
+        Stats every source file and returns (changed, removed): the (module, path, is_package,
+        source bytes) entries whose contents differ from the last scan, and vanished module names.
+        """
+        changed = []
+        seen = set()
+        for module_name, path, is_package in iter_package_modules(self.module_name):
+            seen.add(module_name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            previous = self.fingerprints.get(path)
+            if previous is not None and previous[:2] == (stat.st_mtime_ns, stat.st_size) \
+                    and self.modules.get(module_name) == path:
+                continue
+            with open(path, "rb") as f:
+                source = f.read()
+            digest = hashlib.sha256(source).hexdigest()
+            self.fingerprints[path] = (stat.st_mtime_ns, stat.st_size, digest)
+            if previous is not None and previous[2] == digest and self.modules.get(module_name) == path:
+                continue  # touched, not edited
+            self.modules[module_name] = path
+            changed.append((module_name, path, is_package, source))
+
+        removed = [module_name for module_name in self.modules if module_name not in seen]
+        for module_name in removed:
+            self.fingerprints.pop(self.modules.pop(module_name), None)
+        return changed, removed
+
+    def _summarize(self, changed):
+        if len(changed) >= SERIAL_THRESHOLD:
+            # Bulk changes (e.g. the first build or a branch switch) go through the process pool
+            return summarize_modules([entry[:3] for entry in changed], self.workers)
+        summaries = []
+        for module_name, path, is_package, source in changed:
+            try:
+                summaries.append(summarize_source(source, module_name, is_package, path))
+            except (SyntaxError, UnicodeDecodeError, ValueError) as e:
+                print(f"Could not parse {module_name}: {e}")
+        return summaries
+
+    def refresh(self):
+        """
+        Brings the API map and grammar up to date with the sources on disk.
+        Returns the set of module names whose API entries were rebuilt (empty if nothing changed).
+        """
+        changed, removed = self._scan()
+        if not changed and not removed:
+            return set()
+
+        changed_names = {entry[0] for entry in changed}
+        for summary in self._summarize(changed):
+            self.index.add_summary(summary, affected=())
+        for module_name in changed_names - set(self.index.summaries):
+            # Failed to parse: drop it rather than keep serving stale members
+            self.index.remove_summary(module_name, affected=())
+        for module_name in removed:
+            self.index.remove_summary(module_name, affected=())
+
+        affected = self.index.dependents(changed_names | set(removed))
+        self.index.invalidate(affected)
+        self._patch(affected)
+        return affected
+
+    def _patch(self, affected):
+        previous = {}
+        for module_name in affected:
+            for name in self.members.pop(module_name, ()):
+                previous[name] = self.api_map.pop(name)
+
+        sections = {}
+        for module_name in sorted(affected):
+            if self.index.summaries.get(module_name) is not None:
+                sections[module_name] = module_entries(self.index, module_name, self.private)
+
+        # Definitions first, so re-exports below can point at signatures rebuilt in this pass
+        for module_name, entries in sections.items():
+            names = self.members.setdefault(module_name, [])
+            for section in ("functions", "classes", "methods"):
+                self.api_map.update(entries[section])
+                names.extend(entries[section])
+        for module_name, entries in sections.items():
+            names = self.members[module_name]
+            for alias, target in entries["reexports"].items():
+                if target in self.api_map:
+                    self.api_map[alias] = self.api_map[target]
+                    names.append(alias)
+
+        current = {name for module_name in sections for name in self.members[module_name]}
+        self._patch_rules(previous, current)
+
+    def _patch_rules(self, previous, current):
+        dirty = False
+        for name in previous.keys() - current:
+            rule = self.rule_names.pop(name, None)
+            if rule is not None:
+                del self.rules[rule]
+                dirty = True
+
+        new_names = {name for name in current if name not in self.rule_names}
+        self.rule_names.update(lark_rule_names(sorted(new_names), taken=set(self.rules)))
+        # Typed rules only while the package is small; crossing the threshold rewrites every rule
+        typed = typed_rules(None, len(self.rule_names))
+        retype = typed != self.typed
+        self.typed = typed
+        for name in (list(self.rule_names) if retype else current):
+            rule = self.rule_names.get(name)
+            if rule is None:
+                continue
+            if retype or name in new_names or previous.get(name) != self.api_map[name]:
+                self.rules[rule] = lark_call_rule(name, rule, self.api_map[name] if typed else None)
+                dirty = True
+
+        if dirty:
+            self.version += 1
+            self._grammar = None
+
+    # -- persistence --
+
+    @staticmethod
+    def state_path(module_name, cache_dir=None):
+        return os.path.join(cache_dir or default_cache_dir(), "incremental", f"{module_name}.pickle")
+
+    def save(self, path=None):
+        """
+        Writes the build state so a later process can refresh instead of crawling from scratch.
+        """
+        path = path or self.state_path(self.module_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((STATE_FORMAT, self.__dict__), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, module_name, path=None, **kwargs):
+        """
+        Returns the saved build state for module_name, or a fresh (empty) one if there is
+        none or it was written by an incompatible version. Call refresh() afterwards.
+        """
+        path = path or cls.state_path(module_name)
+        build = cls(module_name, **kwargs)
+        try:
+            with open(path, "rb") as f:
+                state_format, state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return build
+        if state_format == STATE_FORMAT and state.get("module_name") == module_name:
+            build.__dict__.update(state)
+            build.__dict__.update({key: value for key, value in kwargs.items()})
+        return build
@@ -0,0 +1,213 @@
+import hashlib
+import importlib.util
+import math
+import os
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from . import tracing
+from .cache import default_cache_dir
+from .contexts import PROMPTS_DIR
+from .retrieval import HashingEmbedder
+from .slicing import STOPWORDS, words
+from .tokens import DEFAULT_ENCODING, count_tokens, get_encoding
+
+
+# --- Pattern Index ---
+# Purpose: Pick the design patterns (FAIFPattern) and example snippets worth showing the model for
+#          a task, instead of offering it the whole catalog to choose from.
+# Strength: Descriptions, examples, embeddings and token counts are computed once and stored
+#           per catalog version; a selection is one keyword lookup plus one small vector scan
+#           (tens of microseconds), and repeated selections are memoized.
+# Limitation: Relevance is lexical (keywords and the hashing embedder's word fragments); a task
+#             that never names what it needs ("make it swappable") can miss its pattern.
+
+PATTERN_INDEX_FORMAT = 1
+MAX_CACHED_SELECTIONS = 1024
+KEYWORD_WEIGHT = 0.5  # weight of the keyword score (0..1) next to the cosine similarity
+MIN_SCORE = 0.25
+RELATIVE_SCORE = 0.5  # patterns scoring under this share of the best one are left out
+
+
+@lru_cache(maxsize=None)
+def load_prompt_module(filename):
+    """
+    Imports a Python file from prompts/ (not a package) and returns the module, once.
+    """
+    path = os.path.join(PROMPTS_DIR, filename)
+    spec = importlib.util.spec_from_file_location(f"inspector_gadget.prompts.{filename[:-3]}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _catalog_digest(embedder, encoding):
+    # Version of an index: its format, the catalog sources, the embedder and the token counter
+    digest = hashlib.sha1(f"{PATTERN_INDEX_FORMAT}\0{getattr(embedder, 'name', type(embedder).__name__)}".encode())
+    digest.update(f"\0{encoding if get_encoding(encoding) is not None else 'bytes'}".encode())
+    for filename in ("extract_faif_patterns.py", "faif_python_patterns.py"):
+        with open(os.path.join(PROMPTS_DIR, filename), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class PatternIndex:
+    """
+    The FAIFPattern catalog prepared for retrieval: per pattern its category, description,
+    canonical example (prompts/faif_python_patterns.py), keywords, an embedding, and the token
+    counts of its prompt lines with and without the example.
+
+    search() ranks patterns for a task; select() returns the prompt lines (for the `patterns`
+    of contexts.PythonAgentPromptPrefix) of the best patterns that fit a token budget.
+    Use PatternIndex.load() to reuse the stored index of the current catalog version.
+    """
+    def __init__(self, embedder=None, encoding=DEFAULT_ENCODING, vectors=None, tokens=None,
+                 cache_size=MAX_CACHED_SELECTIONS):
+        catalog = load_prompt_module("extract_faif_patterns.py").FAIFPattern
+        examples = load_prompt_module("faif_python_patterns.py")
+        categories = {pattern: category for category, patterns in catalog.get_patterns_by_category().items()
+                      for pattern in patterns}
+        self.embedder = embedder or HashingEmbedder()
+        self.encoding = encoding
+        self.version = _catalog_digest(self.embedder, encoding)
+        self.names = [pattern.name for pattern in catalog]
+        self.categories = [categories.get(pattern, "") for pattern in catalog]
+        self.descriptions = [catalog.get_pattern_description(pattern) or "" for pattern in catalog]
+        self.examples = [examples.EXAMPLES.get(name, "").strip() for name in self.names]
+        self.keywords = [examples.KEYWORDS.get(name, []) for name in self.names]
+
+        texts = [f"{name.replace('_', ' ')} {description} {' '.join(keywords)}"
+                 for name, description, keywords in zip(self.names, self.descriptions, self.keywords)]
+        self.vectors = np.asarray(self.embedder(texts) if vectors is None else vectors, dtype=np.float32)
+        if tokens is None:
+            tokens = [[count_tokens(self.line(i, example), encoding) for example in (False, True)]
+                      for i in range(len(self.names))]
+        self.tokens = np.asarray(tokens, dtype=np.int64)  # (patterns, 2): without / with the example
+
+        # Inverted keyword index with idf weights: word -> (pattern numbers, weight)
+        postings = {}
+        for i, text in enumerate(texts):
+            for word in set(words(text)) - STOPWORDS:
+                postings.setdefault(word, []).append(i)
+        self._postings = {word: (np.array(found), math.log(1 + len(self.names) / len(found)))
+                          for word, found in postings.items()}
+        self.cache_size = cache_size
+        self._selections = OrderedDict()
+
+    @classmethod
+    def load(cls, path=None, embedder=None, encoding=DEFAULT_ENCODING, **options):
+        """
+        Returns the index of the current catalog version, loading its embeddings and token
+        counts from path (default: <cache dir>/patterns) or computing and storing them.
+        """
+        embedder = embedder or HashingEmbedder()
+        path = path or os.path.join(default_cache_dir(), "patterns")
+        filename = os.path.join(path, f"faif-{_catalog_digest(embedder, encoding)}.npz")
+        try:
+            with np.load(filename) as stored:
+                return cls(embedder, encoding, stored["vectors"], stored["tokens"], **options)
+        except (OSError, KeyError, ValueError):
+            pass
+        index = cls(embedder, encoding, **options)
+        try:
+            os.makedirs(path, exist_ok=True)
+            temp = f"{filename}.{os.getpid()}.tmp.npz"
+            np.savez(temp, vectors=index.vectors, tokens=index.tokens)
+            os.replace(temp, filename)
+        except OSError as e:
+            print(f"Could not store the pattern index in {path}: {e}")
+        return index
+
+    def __len__(self):
+        return len(self.names)
+
+    def line(self, i, example=True):
+        """
+        Returns the prompt line of pattern number i, with its example snippet or without.
+        """
+        text = f"{self.names[i].replace('_', ' ').title()} ({self.categories[i]}): {self.descriptions[i]}"
+        if example and self.examples[i]:
+            text += f"\n```python\n{self.examples[i]}\n```"
+        return text
+
+    def scores(self, task):
+        """
+        Returns the relevance of every pattern to task: cosine similarity of the embeddings
+        plus KEYWORD_WEIGHT times the idf-weighted share of the task's known words it matches.
+        """
+        scores = self.vectors @ np.asarray(self.embedder([task]), dtype=np.float32)[0]
+        matched = np.zeros(len(self.names))
+        known = 0.0
+        for word in set(words(task)) - STOPWORDS:
+            posting = self._postings.get(word)
+            if posting is not None:
+                matched[posting[0]] += posting[1]
+                known += posting[1]
+        if known:
+            scores = scores + KEYWORD_WEIGHT * matched / known
+        return scores
+
+    def _ranked(self, task, min_score):
+        # Pattern numbers by score, best first, down to min_score and RELATIVE_SCORE of the best
+        scores = self.scores(task)
+        order = np.argsort(-scores, kind="stable")
+        cutoff = max(min_score, RELATIVE_SCORE * scores[order[0]]) if len(order) else min_score
+        return [(i, float(scores[i])) for i in order if scores[i] >= cutoff]
+
+    def search(self, task, k=5, min_score=MIN_SCORE):
+        """
+        Returns up to k (pattern name, score) pairs for task, best first. Patterns under
+        min_score, or under RELATIVE_SCORE times the best score, are left out.
+        """
+        return [(self.names[i], score) for i, score in self._ranked(task, min_score)[:k]]
+
+    def select(self, task, budget, k=3, examples=True, min_score=MIN_SCORE):
+        """
+        Returns the prompt lines of up to k patterns relevant to task (as ranked by search)
+        that fit in `budget` tokens together, best first. Each pattern comes with its example if that fits, else
+        with its description alone; patterns that don't fit at all are skipped. Memoized.
+        """
+        key = (task, budget, k, examples, min_score)
+        lines = self._selections.get(key)
+        tracing.count("pattern_selection", result="miss" if lines is None else "hit")
+        if lines is not None:
+            self._selections.move_to_end(key)
+            return list(lines)
+
+        lines, spent = [], 0
+        for i, _ in self._ranked(task, min_score):
+            if len(lines) == k:
+                break
+            for with_example in ((True, False) if examples and self.examples[i] else (False,)):
+                tokens = int(self.tokens[i, int(with_example)])
+                if spent + tokens <= budget:
+                    lines.append(self.line(i, with_example))
+                    spent += tokens
+                    break
+        self._selections[key] = tuple(lines)
+        while len(self._selections) > self.cache_size:
+            self._selections.popitem(last=False)
+        return lines
+
+
+_default_index = None
+
+
+def default_pattern_index():
+    """
+    Returns the process-wide PatternIndex (PatternIndex.load() on first use).
+    """
+    global _default_index
+    if _default_index is None:
+        _default_index = PatternIndex.load()
+    return _default_index
+
+
+def select_patterns(task, budget, k=3, **options):
+    """
+    Returns the prompt lines of the patterns for task within budget tokens, from the default
+    index (see PatternIndex.select).
+    """
+    return default_pattern_index().select(task, budget, k, **options)
@@ -0,0 +1,349 @@
+"""
+Canonical example snippets for the FAIFPattern members (see extract_faif_patterns.py), after
+the examples of the faif/python-patterns repository, cut down to the core of each pattern.
+
+EXAMPLES maps a FAIFPattern member name to its snippet; KEYWORDS maps it to task words that
+suggest the pattern beyond those in its name and description. patterns.PatternIndex reads both.
+"""
+
+EXAMPLES = {
+    "ABSTRACT_FACTORY": '''
+class PetShop:
+    def __init__(self, animal_factory):
+        self.pet_factory = animal_factory  # any callable returning a pet
+
+    def buy_pet(self, name):
+        return self.pet_factory(name)
+
+shop = PetShop(Dog)
+pet = shop.buy_pet("Lucy")
+''',
+    "BUILDER": '''
+class Building:
+    def __init__(self):
+        self.build_floor()
+        self.build_size()
+
+class House(Building):
+    def build_floor(self):
+        self.floor = "One"
+
+    def build_size(self):
+        self.size = "Big"
+''',
+    "FACTORY_METHOD": '''
+def get_localizer(language="English"):
+    localizers = {"English": EnglishLocalizer, "Greek": GreekLocalizer}
+    return localizers[language]()
+
+greek = get_localizer("Greek")
+print(greek.localize("dog"))
+''',
+    "PROTOTYPE": '''
+import copy
+
+class Prototype:
+    def __init__(self, value="default", **attrs):
+        self.value = value
+        self.__dict__.update(attrs)
+
+    def clone(self, **attrs):
+        obj = copy.deepcopy(self)
+        obj.__dict__.update(attrs)
+        return obj
+''',
+    "SINGLETON": '''
+class Borg:
+    _shared_state = {}
+
+    def __init__(self):
+        self.__dict__ = self._shared_state  # every instance shares one state
+
+a, b = Borg(), Borg()
+a.state = "Running"
+assert b.state == "Running"
+''',
+    "ADAPTER": '''
+class Adapter:
+    def __init__(self, obj, **adapted_methods):
+        self.obj = obj
+        self.__dict__.update(adapted_methods)
+
+    def __getattr__(self, attr):
+        return getattr(self.obj, attr)
+
+objects = [Adapter(Dog(), make_noise=dog.bark), Adapter(Cat(), make_noise=cat.meow)]
+''',
+    "BRIDGE": '''
+class CircleShape:
+    def __init__(self, x, y, radius, drawing_api):
+        self._x, self._y, self._radius = x, y, radius
+        self._drawing_api = drawing_api  # the implementation varies independently
+
+    def draw(self):
+        self._drawing_api.draw_circle(self._x, self._y, self._radius)
+''',
+    "COMPOSITE": '''
+class CompositeGraphic:
+    def __init__(self):
+        self.graphics = []
+
+    def render(self):
+        for graphic in self.graphics:
+            graphic.render()  # leaves and composites share one interface
+
+    def add(self, graphic):
+        self.graphics.append(graphic)
+''',
+    "DECORATOR": '''
+class BoldWrapper:
+    def __init__(self, wrapped):
+        self._wrapped = wrapped
+
+    def render(self):
+        return f"<b>{self._wrapped.render()}</b>"
+
+print(BoldWrapper(TextTag("hello")).render())
+''',
+    "FACADE": '''
+class ComputerFacade:
+    def __init__(self):
+        self.cpu, self.memory, self.ssd = CPU(), Memory(), SolidStateDrive()
+
+    def start(self):
+        self.cpu.freeze()
+        self.memory.load("0x00", self.ssd.read("100", "1024"))
+        self.cpu.jump("0x00")
+        self.cpu.execute()
+''',
+    "FLYWEIGHT": '''
+import weakref
+
+class Card:
+    _pool = weakref.WeakValueDictionary()
+
+    def __new__(cls, value, suit):
+        obj = cls._pool.get(value + suit)
+        if obj is None:
+            obj = cls._pool[value + suit] = object.__new__(cls)
+            obj.value, obj.suit = value, suit
+        return obj
+''',
+    "PROXY": '''
+class Proxy:
+    def __init__(self, real_subject):
+        self._real_subject = real_subject
+
+    def do_the_job(self, user):
+        if user != "admin":
+            raise PermissionError(f"{user} may not do the job")
+        return self._real_subject.do_the_job(user)
+''',
+    "CHAIN_OF_RESPONSIBILITY": '''
+class Handler:
+    def __init__(self, successor=None):
+        self.successor = successor
+
+    def handle(self, request):
+        result = self.check_range(request)
+        if not result and self.successor:
+            self.successor.handle(request)
+
+handler = ConcreteHandler0(ConcreteHandler1(FallbackHandler()))
+''',
+    "COMMAND": '''
+class RenameFileCommand:
+    def __init__(self, src, dest):
+        self.src, self.dest = src, dest
+
+    def execute(self):
+        os.rename(self.src, self.dest)
+
+    def undo(self):
+        os.rename(self.dest, self.src)
+
+history = []
+for command in [RenameFileCommand("a.txt", "b.txt")]:
+    command.execute()
+    history.append(command)
+''',
+    "INTERPRETER": '''
+class Number:
+    def __init__(self, value):
+        self.value = value
+
+    def interpret(self):
+        return self.value
+
+class Add:
+    def __init__(self, left, right):
+        self.left, self.right = left, right
+
+    def interpret(self):
+        return self.left.interpret() + self.right.interpret()
+
+print(Add(Number(1), Number(2)).interpret())
+''',
+    "ITERATOR": '''
+def count_to(count):
+    numbers = ["one", "two", "three", "four", "five"]
+    yield from numbers[:count]
+
+for number in count_to(3):
+    print(number)
+''',
+    "MEDIATOR": '''
+class ChatRoom:
+    def display_message(self, user, message):
+        print(f"[{user} says]: {message}")
+
+class User:
+    def __init__(self, name, room):
+        self.name, self.room = name, room
+
+    def say(self, message):
+        self.room.display_message(self, message)  # users talk through the room only
+''',
+    "MEMENTO": '''
+import copy
+
+def memento(obj, deep=False):
+    state = copy.deepcopy(obj.__dict__) if deep else copy.copy(obj.__dict__)
+
+    def restore():
+        obj.__dict__.clear()
+        obj.__dict__.update(state)
+
+    return restore
+
+restore = memento(account)
+account.withdraw(100)
+restore()
+''',
+    "OBSERVER": '''
+class Subject:
+    def __init__(self):
+        self._observers = []
+
+    def attach(self, observer):
+        self._observers.append(observer)
+
+    def notify(self):
+        for observer in self._observers:
+            observer.update(self)
+''',
+    "STATE": '''
+class Radio:
+    def __init__(self):
+        self.am_state, self.fm_state = AmState(self), FmState(self)
+        self.state = self.am_state
+
+    def toggle_amfm(self):
+        self.state.toggle_amfm()  # the current state object decides what happens
+
+    def scan(self):
+        self.state.scan()
+''',
+    "STRATEGY": '''
+class Order:
+    def __init__(self, price, discount_strategy=None):
+        self.price = price
+        self.discount_strategy = discount_strategy
+
+    def apply_discount(self):
+        discount = self.discount_strategy(self) if self.discount_strategy else 0
+        return self.price - discount
+
+order = Order(100, discount_strategy=lambda order: order.price * 0.1)
+''',
+    "TEMPLATE_METHOD": '''
+def template_function(getter, converter=False, to_save=False):
+    data = getter()
+    if converter:
+        data = convert_to_text(data)
+    if to_save:
+        saver()
+    return data
+
+template_function(get_text, to_save=True)
+''',
+    "VISITOR": '''
+class Visitor:
+    def visit(self, node, *args, **kwargs):
+        for cls in node.__class__.__mro__:
+            method = getattr(self, "visit_" + cls.__name__, None)
+            if method:
+                return method(node, *args, **kwargs)
+        return self.generic_visit(node, *args, **kwargs)
+''',
+    "DEPENDENCY_INJECTION": '''
+class TimeDisplay:
+    def __init__(self, time_provider):
+        self.time_provider = time_provider  # injected, so tests can pass a fake clock
+
+    def get_current_time_as_html_fragment(self):
+        return f"<span class='tinyBoldText'>{self.time_provider()}</span>"
+
+display = TimeDisplay(midnight_time_provider)
+''',
+    "REPOSITORY": '''
+class UserRepository:
+    def __init__(self, session):
+        self.session = session
+
+    def add(self, user):
+        self.session.add(user)
+
+    def get(self, user_id):
+        return self.session.query(User).filter_by(id=user_id).one()
+
+    def list(self):
+        return self.session.query(User).all()
+''',
+    "UNIT_OF_WORK": '''
+class UnitOfWork:
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+
+    def __enter__(self):
+        self.session = self.session_factory()
+        self.users = UserRepository(self.session)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.session.rollback()  # anything not committed is discarded
+        self.session.close()
+
+    def commit(self):
+        self.session.commit()
+''',
+}
+
+KEYWORDS = {
+    "ABSTRACT_FACTORY": ["family", "families", "platform", "theme", "pluggable"],
+    "BUILDER": ["construct", "step", "configure", "assemble", "complex"],
+    "FACTORY_METHOD": ["create", "instantiate", "factory", "constructor", "registry"],
+    "PROTOTYPE": ["copy", "clone", "duplicate", "template"],
+    "SINGLETON": ["single", "one", "global", "shared", "config", "settings"],
+    "ADAPTER": ["convert", "wrap", "incompatible", "legacy", "interface"],
+    "BRIDGE": ["backend", "implementation", "renderer", "driver"],
+    "COMPOSITE": ["tree", "hierarchy", "nested", "children", "recursive"],
+    "DECORATOR": ["wrap", "extend", "add", "behavior", "logging", "caching"],
+    "FACADE": ["simplify", "subsystem", "wrapper", "api", "unified"],
+    "FLYWEIGHT": ["memory", "intern", "pool", "many", "share", "reuse"],
+    "PROXY": ["access", "lazy", "remote", "permission", "cache", "guard"],
+    "CHAIN_OF_RESPONSIBILITY": ["handler", "middleware", "pipeline", "fallback", "chain"],
+    "COMMAND": ["undo", "redo", "queue", "action", "history", "execute"],
+    "INTERPRETER": ["parse", "expression", "language", "grammar", "evaluate", "dsl"],
+    "ITERATOR": ["iterate", "loop", "generator", "traverse", "stream", "sequence"],
+    "MEDIATOR": ["coordinate", "hub", "chat", "communicate", "broker"],
+    "MEMENTO": ["snapshot", "restore", "rollback", "checkpoint", "save"],
+    "OBSERVER": ["event", "subscribe", "listener", "notify", "callback", "publish"],
+    "STATE": ["state", "machine", "transition", "mode", "status"],
+    "STRATEGY": ["algorithm", "policy", "interchangeable", "swap", "choose", "select"],
+    "TEMPLATE_METHOD": ["skeleton", "steps", "hook", "override", "workflow"],
+    "VISITOR": ["visit", "traverse", "ast", "node", "walk", "operation"],
+    "DEPENDENCY_INJECTION": ["inject", "dependency", "testable", "mock", "provider"],
+    "REPOSITORY": ["database", "storage", "persist", "query", "crud", "store"],
+    "UNIT_OF_WORK": ["transaction", "commit", "rollback", "session", "atomic"],
+}
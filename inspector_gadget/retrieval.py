@@ -0,0 +1,304 @@
+import ast
+import hashlib
+import inspect
+import os
+import re
+import sys
+import types
+from functools import lru_cache
+
+import numpy as np
+import pyarrow as pa
+
+from .cache import default_cache_dir, module_fingerprint
+from .crawler import iter_package_modules
+from .slicing import words
+
+
+# --- API Retrieval Index ---
+# Purpose: Find the API members relevant to a task without showing the model every API name.
+# Strength: One embedding and one vector scan per query (milliseconds for ~10k members); updates
+#           re-embed only the members whose name, signature or docstring changed.
+# Limitation: Retrieval quality is bounded by the embedder; the default hashing embedder matches
+#             words and word fragments, not meaning.
+
+DEFAULT_DIM = 256
+_TABLE_NAME = re.compile(r"[^A-Za-z0-9_-]")
+
+
+@lru_cache(maxsize=1 << 16)
+def _bucket(feature, dim):
+    digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dim, 1.0 if value >> 63 else -1.0
+
+
+class HashingEmbedder:
+    """
+    Deterministic text embedder using feature hashing: every word, and every character trigram
+    of a word, is hashed to one of `dim` signed buckets, and the vector is L2-normalized.
+    Trigrams let "indentation" match "indent". Needs no model and gives identical vectors in
+    every process, which suits offline use and tests.
+
+    Any callable taking a list of texts and returning an (n, dim) array can be used in its
+    place (see APIIndex); give it `dim` and `name` attributes so indexes can tell embedders apart.
+    """
+    def __init__(self, dim=DEFAULT_DIM, trigram_weight=0.5):
+        self.dim = dim
+        self.trigram_weight = trigram_weight
+        self.name = f"hashing-{dim}-{trigram_weight}"
+
+    def __call__(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in words(text):
+                bucket, sign = _bucket(word, self.dim)
+                vectors[row, bucket] += sign
+                padded = f"<{word}>"
+                for i in range(len(padded) - 2):
+                    bucket, sign = _bucket(padded[i:i + 3], self.dim)
+                    vectors[row, bucket] += sign * self.trigram_weight
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+def _first_paragraph(doc):
+    return inspect.cleandoc(doc).split("\n\n")[0].strip() if doc else ""
+
+
+def source_docstrings(module_name):
+    """
+    Returns {qualified name: first docstring paragraph} for the functions, classes and methods
+    defined in a package's source files, read with ast (the package is not imported).
+    """
+    docs = {}
+    for name, path, _ in iter_package_modules(module_name):
+        try:
+            with open(path, "rb") as f:
+                tree = ast.parse(f.read())
+        except (SyntaxError, UnicodeDecodeError, ValueError, OSError) as e:
+            print(f"Could not parse {name}: {e}")
+            continue
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                docs[f"{name}.{node.name}"] = _first_paragraph(ast.get_docstring(node))
+            if isinstance(node, ast.ClassDef):
+                for child in node.body:
+                    if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        docs[f"{name}.{node.name}.{child.name}"] = _first_paragraph(ast.get_docstring(child))
+    return docs
+
+
+def member_docstrings(module, api_map):
+    """
+    Returns {api name: first docstring paragraph} for the members of api_map. A module object
+    is inspected directly (names may be relative to it, as the utils extractors produce);
+    a dotted name is read from source (or inspected, when it is already imported).
+    Re-exported aliases borrow their definition's docstring; from source, relative names
+    ("dijkstra_path", "Graph.add_edge") are resolved to their definition by their trailing
+    parts, preferring the definition nearest the top of the package.
+    """
+    if isinstance(module, str) and module in sys.modules:
+        module = sys.modules[module]
+    if isinstance(module, types.ModuleType):
+        docs = {}
+        prefix = module.__name__ + "."
+        for name in api_map:
+            obj = module
+            for part in (name[len(prefix):] if name.startswith(prefix) else name).split("."):
+                obj = getattr(obj, part, None)
+            docs[name] = _first_paragraph(inspect.getdoc(obj)) if obj is not None else ""
+        return docs
+
+    found = source_docstrings(module)
+    by_suffix = {}
+    for qualified in sorted(found, key=lambda name: name.count(".")):
+        if found[qualified]:
+            parts = qualified.split(".")
+            by_suffix.setdefault(parts[-1], found[qualified])
+            by_suffix.setdefault(".".join(parts[-2:]), found[qualified])
+
+    def lookup(name):
+        qualified = name if name == module or name.startswith(module + ".") else f"{module}.{name}"
+        parts = name.split(".")
+        return (found.get(qualified) or found.get(name) or by_suffix.get(".".join(parts[-2:]))
+                or by_suffix.get(parts[-1]))
+
+    docs = {name: lookup(name) for name in api_map}
+    by_definition = {(name.rpartition(".")[2], str(api_map[name])): docs[name] for name in api_map if docs[name]}
+    return {name: docs[name] or by_definition.get((name.rpartition(".")[2], str(api_map[name])), "")
+            for name in api_map}
+
+
+class APIIndex:
+    """
+    A LanceDB vector index over the members of one API map: one row per member with its
+    name, signature, docstring, module path and an embedding of all four.
+
+    update() upserts the current API map (merge_insert on name) and deletes members that
+    disappeared; a per-row digest of the embedded text and the embedder means unchanged members
+    are never re-embedded. search() returns the top-k members for a query, and rank() adapts
+    it to the ranking interface of slicing.select_members.
+    """
+    def __init__(self, name, path=None, embedder=None):
+        self.name = name
+        self.path = path or os.path.join(default_cache_dir(), "lancedb")
+        self.embedder = embedder or HashingEmbedder()
+        self.table_name = _TABLE_NAME.sub("_", name)
+        self._table = None
+        self._digests = None  # api name -> digest of its indexed row
+        self._synced = None  # key of the last sync(), see _sync_key
+
+    @property
+    def dim(self):
+        return getattr(self.embedder, "dim", None) or len(self.embedder(["dim"])[0])
+
+    def _schema(self):
+        return pa.schema([
+            pa.field("name", pa.string()),
+            pa.field("signature", pa.string()),
+            pa.field("docstring", pa.string()),
+            pa.field("module", pa.string()),
+            pa.field("digest", pa.string()),
+            pa.field("vector", pa.list_(pa.float32(), self.dim)),
+        ])
+
+    @property
+    def table(self):
+        if self._table is None:
+            import lancedb
+
+            db = lancedb.connect(self.path)
+            schema = self._schema()
+            table = db.create_table(self.table_name, schema=schema, exist_ok=True)
+            if table.schema.field("vector").type != schema.field("vector").type:
+                # Indexed with an embedder of another size: start over
+                table = db.create_table(self.table_name, schema=schema, mode="overwrite")
+            self._table = table
+        return self._table
+
+    def digests(self):
+        """
+        Returns {api name: row digest} for the rows currently in the index.
+        """
+        if self._digests is None:
+            columns = self.table.to_arrow().select(["name", "digest"]).to_pydict()
+            self._digests = dict(zip(columns["name"], columns["digest"]))
+        return self._digests
+
+    def _records(self, api_map, docstrings):
+        embedder_name = getattr(self.embedder, "name", type(self.embedder).__name__)
+        records = {}
+        for name, signature in api_map.items():
+            module, _, own = name.rpartition(".")
+            doc = docstrings.get(name, "")
+            text = f"{own} {signature} {doc} {module}"
+            digest = hashlib.sha1(f"{embedder_name}\0{text}".encode()).hexdigest()
+            records[name] = (str(signature), doc, module, digest, text)
+        return records
+
+    def _sync_path(self):
+        return os.path.join(self.path, f"{self.table_name}.synced")
+
+    def _sync_key(self, module, api_map):
+        # The module's source fingerprint, the embedder and the API map; None when unknown
+        try:
+            fingerprint = module_fingerprint(module if isinstance(module, str) else module.__name__)
+        except (ImportError, ValueError, OSError):
+            return None
+        digest = hashlib.sha1(f"{fingerprint}\0{getattr(self.embedder, 'name', type(self.embedder).__name__)}".encode())
+        for name, signature in api_map.items():
+            digest.update(f"\0{name}\0{signature}".encode())
+        return digest.hexdigest()
+
+    def _forget_sync(self):
+        self._synced = None
+        try:
+            os.remove(self._sync_path())
+        except OSError:
+            pass
+
+    def sync(self, module, api_map):
+        """
+        Updates the index from api_map and module's docstrings (see member_docstrings) unless
+        it already holds them. Syncs are keyed by the module's source fingerprint (see
+        cache.module_fingerprint), the embedder and the API map, and the key is stored next to
+        the table, so later queries, in this process or another, go straight to search().
+        Returns update()'s counts, or None when the index was current.
+        """
+        key = self._sync_key(module, api_map)
+        if key is not None and self._synced is None:
+            try:
+                with open(self._sync_path()) as f:
+                    self._synced = f.read().strip()
+            except OSError:
+                pass
+        if key is not None and key == self._synced:
+            return None
+        counts = self.update(api_map, member_docstrings(module, api_map))
+        if key is not None:
+            try:
+                os.makedirs(self.path, exist_ok=True)
+                with open(self._sync_path(), "w") as f:
+                    f.write(key)
+                self._synced = key
+            except OSError as e:
+                print(f"Could not record the sync of index {self.name}: {e}")
+        return counts
+
+    def update(self, api_map, docstrings=None):
+        """
+        Brings the index in line with api_map ({name: signature}); docstrings ({name: text},
+        see member_docstrings) are optional. Returns {"upserted": n, "deleted": n}.
+        """
+        self._forget_sync()
+        records = self._records(api_map, docstrings or {})
+        current = self.digests()
+        changed = [name for name, record in records.items() if current.get(name) != record[3]]
+        removed = [name for name in current if name not in records]
+
+        if changed:
+            vectors = np.asarray(self.embedder([records[name][4] for name in changed]), dtype=np.float32)
+            data = pa.table({
+                "name": changed,
+                "signature": [records[name][0] for name in changed],
+                "docstring": [records[name][1] for name in changed],
+                "module": [records[name][2] for name in changed],
+                "digest": [records[name][3] for name in changed],
+                "vector": pa.FixedSizeListArray.from_arrays(pa.array(vectors.ravel()), vectors.shape[1]),
+            }, schema=self._schema())
+            self.table.merge_insert("name").when_matched_update_all().when_not_matched_insert_all().execute(data)
+        for i in range(0, len(removed), 512):
+            quoted = ", ".join("'" + name.replace("'", "''") + "'" for name in removed[i:i + 512])
+            self.table.delete(f"name IN ({quoted})")
+
+        current.update((name, records[name][3]) for name in changed)
+        for name in removed:
+            del current[name]
+        return {"upserted": len(changed), "deleted": len(removed)}
+
+    def search(self, query, k=10):
+        """
+        Returns the k members most similar to query as [(api name, cosine similarity)], best first.
+        """
+        if not self.digests():
+            return []
+        vector = np.asarray(self.embedder([query]), dtype=np.float32)[0]
+        hits = self.table.search(vector).distance_type("cosine").limit(k).to_arrow()
+        return [(name, 1.0 - distance) for name, distance in
+                zip(hits.column("name").to_pylist(), hits.column("_distance").to_pylist())]
+
+    def rank(self, task, api_map, k=100):
+        """
+        Ranking function for slicing.select_members: {api name: similarity} for the top k hits
+        that are in api_map.
+        """
+        return {name: score for name, score in self.search(task, k) if name in api_map and score > 0}
+
+    def clear(self):
+        """
+        Drops every row of the index.
+        """
+        self._forget_sync()
+        self.table.delete("true")
+        self._digests = {}
@@ -0,0 +1,295 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from . import tracing
+from .tokens import count_tokens
+
+
+# --- Prompt Scheduler ---
+# Purpose: Serve many agent tasks concurrently: the static part of the system prompt (Zen of
+#          Python, tool descriptions, API, patterns, example) is rendered once per gadget set,
+#          and concurrent tasks sharing it go to the model as one batch.
+# Strength: Prompts in a batch share a byte-identical prefix, so a model server with prefix
+#           (KV) caching prefills it once; a concurrency limit and bounded admission keep a
+#           burst of tasks from piling up inside the process.
+# Limitation: Batching trades up to batch_window of latency for throughput; prefix reuse on the
+#             model side is up to the server (the scheduler only makes it possible).
+
+MAX_CACHED_PREFIXES = 32
+MAX_BATCH = 16
+BATCH_WINDOW = 0.002  # seconds a new batch waits for more tasks with the same prefix
+MAX_CONCURRENCY = 4  # model calls in flight
+MAX_PENDING = 256  # tasks admitted (queued or running); submit() waits beyond this
+
+
+def _freeze(value):
+    # Hashable stand-in for a prompt context value (lists of patterns, dicts of APIs, ...)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def render_prefix(gadgets, zen=None, apis=(), patterns=(), module_name="", example=""):
+    """
+    Renders contexts.PythonAgentPromptPrefix for gadgets (Gadgets, or tool descriptions as
+    strings) and the rest of the static context. zen defaults to the Zen of Python.
+    """
+    from . import contexts
+
+    tools = [gadget if isinstance(gadget, str) else gadget.as_declarative_tool() for gadget in gadgets]
+    return contexts.PythonAgentPromptPrefix(
+        zen=contexts.zen_of_python() if zen is None else zen, gadgets=tools, apis=list(apis),
+        patterns=list(patterns), module_name=module_name, example=example)
+
+
+def render_task(task):
+    """
+    Renders the per-task suffix that follows the prefix (contexts.PYTHON_AGENT_TASK_PROMPT).
+    """
+    from .contexts import PYTHON_AGENT_TASK_PROMPT
+
+    return PYTHON_AGENT_TASK_PROMPT.format(task=task)
+
+
+class PromptScheduler:
+    """
+    Sends agent tasks to a model, batching concurrent tasks whose prompts share a prefix.
+
+    model is called with a list of prompts and returns the list of completions: a coroutine
+    function, or a plain callable (an outlines generator, say), which runs in a thread. Each
+    prompt is render_prefix(gadgets, **context) + render_task(task); prefixes are cached per
+    gadget set and context (prefix_cache_size entries).
+
+    A task waits at most batch_window seconds for others with the same prefix (a batch leaves
+    early when it reaches max_batch); at most max_concurrency batches are at the model at once,
+    and submit() blocks once max_pending tasks are admitted.
+
+        async with PromptScheduler(model) as scheduler:
+            codes = await scheduler.map(tasks, [gadget], patterns=patterns)
+    """
+    def __init__(self, model, max_batch=MAX_BATCH, batch_window=BATCH_WINDOW, max_concurrency=MAX_CONCURRENCY,
+                 max_pending=MAX_PENDING, prefix_cache_size=MAX_CACHED_PREFIXES, render_prefix=render_prefix,
+                 render_task=render_task, **generation):
+        self.model = model
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.prefix_cache_size = prefix_cache_size
+        self.render_prefix = render_prefix
+        self.render_task = render_task
+        self.generation = generation
+        self._async_model = asyncio.iscoroutinefunction(model) or asyncio.iscoroutinefunction(
+            getattr(model, "__call__", None))
+        self._prefixes = OrderedDict()  # key -> (gadgets, prefix); the gadgets keep their ids in use
+        self._queues = {}  # key -> [(prefix, suffix, future, submitted)]
+        self._timers = {}  # key -> TimerHandle of the queue's batch window
+        self._batches = set()  # running batch tasks
+        self._loop = None
+        self._admission = None  # Semaphore(max_pending), made in the running loop
+        self._slots = None  # Semaphore(max_concurrency)
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "batches": 0, "largest_batch": 0,
+                       "prefix_hits": 0, "prefix_misses": 0, "queue_wait_s": 0.0, "latency_s": 0.0}
+        self._started = None
+
+    def prefix_key(self, gadgets, **context):
+        return (tuple(gadget if isinstance(gadget, str) else id(gadget) for gadget in gadgets), _freeze(context))
+
+    def prefix(self, gadgets, **context):
+        """
+        Returns (key, prefix) for a gadget set and context, rendering the prefix on first use.
+        """
+        gadgets = tuple(gadgets)
+        key = self.prefix_key(gadgets, **context)
+        entry = self._prefixes.get(key)
+        tracing.count("prompt_prefix_cache", result="miss" if entry is None else "hit")
+        if entry is not None:
+            self._stats["prefix_hits"] += 1
+            self._prefixes.move_to_end(key)
+            return key, entry[1]
+        self._stats["prefix_misses"] += 1
+        with tracing.span("prompt.render_prefix", gadgets=len(gadgets)):
+            prefix = self.render_prefix(gadgets, **context)
+        if tracing.enabled():
+            tracing.count("prompt.tokens", count_tokens(prefix), section="prefix")
+        self._prefixes[key] = (gadgets, prefix)
+        while len(self._prefixes) > self.prefix_cache_size:
+            self._prefixes.popitem(last=False)
+        return key, prefix
+
+    async def submit(self, task, gadgets=(), **context):
+        """
+        Queues task (with the prefix for gadgets and context) and returns the model's
+        completion. Waits first while max_pending tasks are already admitted.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:  # semaphores are bound to the loop they first wait in
+            self._loop = loop
+            self._admission = asyncio.Semaphore(self.max_pending)
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        await self._admission.acquire()
+        try:
+            submitted = time.perf_counter()
+            if self._started is None:
+                self._started = submitted
+            self._stats["submitted"] += 1
+            key, prefix = self.prefix(gadgets, **context)
+            suffix = self.render_task(task)
+            if tracing.enabled():
+                tracing.count("prompt.tokens", count_tokens(suffix), section="task")
+            future = loop.create_future()
+            queue = self._queues.setdefault(key, [])
+            queue.append((prefix, suffix, future, submitted))
+            if len(queue) >= self.max_batch:
+                self._flush(key)
+            elif len(queue) == 1:
+                self._timers[key] = loop.call_later(self.batch_window, self._flush, key)
+            return await future
+        finally:
+            self._admission.release()
+
+    async def map(self, tasks, gadgets=(), **context):
+        """
+        Submits every task with the same gadgets and context; returns the completions in order.
+        """
+        return await asyncio.gather(*(self.submit(task, gadgets, **context) for task in tasks))
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._queues.pop(key, None)
+        if batch:
+            running = asyncio.ensure_future(self._run_batch(batch))
+            self._batches.add(running)
+            running.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch):
+        async with self._slots:
+            started = time.perf_counter()
+            self._stats["batches"] += 1
+            self._stats["largest_batch"] = max(self._stats["largest_batch"], len(batch))
+            self._stats["queue_wait_s"] += sum(started - submitted for *_, submitted in batch)
+            prompts = [prefix + suffix for prefix, suffix, _, _ in batch]
+            try:
+                with tracing.span("model.call", batch=len(prompts)):
+                    completions = await self._call_model(prompts)
+                if len(completions) != len(prompts):
+                    raise ValueError(f"The model returned {len(completions)} completions for {len(prompts)} prompts")
+            except Exception as e:
+                self._stats["failed"] += len(batch)
+                for _, _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            finished = time.perf_counter()
+            self._stats["completed"] += len(batch)
+            self._stats["latency_s"] += sum(finished - submitted for *_, submitted in batch)
+            for (_, _, future, _), completion in zip(batch, completions):
+                if not future.done():  # the submitter may have been cancelled
+                    future.set_result(completion)
+
+    async def _call_model(self, prompts):
+        if self._async_model:
+            return list(await self.model(prompts, **self.generation))
+        loop = asyncio.get_running_loop()
+        return list(await loop.run_in_executor(None, lambda: self.model(prompts, **self.generation)))
+
+    async def drain(self):
+        """
+        Sends every queued batch now and waits until all running batches finish.
+        """
+        for key in list(self._queues):
+            self._flush(key)
+        while self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.drain()
+
+    def stats(self):
+        """
+        Returns counters (tasks, batches, prefix cache hits and misses) with throughput, mean
+        batch size and mean queue wait / latency of completed tasks in seconds.
+        """
+        stats = dict(self._stats)
+        done = stats["completed"] + stats["failed"]
+        stats["mean_batch"] = done / stats["batches"] if stats["batches"] else 0.0
+        stats["queue_wait_s"] = stats["queue_wait_s"] / done if done else 0.0
+        stats["latency_s"] = stats["latency_s"] / stats["completed"] if stats["completed"] else 0.0
+        elapsed = time.perf_counter() - self._started if self._started is not None else 0.0
+        stats["tasks_per_s"] = stats["completed"] / elapsed if elapsed else 0.0
+        stats["pending"] = sum(len(queue) for queue in self._queues.values())
+        stats["prefixes"] = len(self._prefixes)
+        return stats
+
+
+# --- Local Stand-in Model ---
+# Purpose: Exercise the scheduler (tests, benchmarks) without a model server.
+# Strength: Simulates the costs batching and prefix reuse save: prefill per uncached prompt
+#           block (blocks are cached by their hash chain, as in paged KV caches), decode steps
+#           run in lockstep for a batch, and one device is shared by concurrent calls.
+# Limitation: A cost model, not a model: its completions come from `respond`.
+
+class LocalModel:
+    """
+    An async batch model for tests: await model(prompts) returns [respond(prompt), ...] after
+    sleeping for the prefill of the prompt blocks (block_size characters) not already cached
+    (prefill_seconds per character; blocks shared within a batch are prefilled once) and for
+    `tokens` decode steps of decode_seconds each. `devices` calls run at once.
+
+    first_tokens lists (prompt, time.perf_counter() of its first token) for every prompt.
+    """
+    def __init__(self, respond=None, prefill_seconds=1e-6, decode_seconds=5e-4, tokens=16, block_size=256,
+                 cache_blocks=4096, devices=1):
+        self.respond = respond or (lambda prompt: "pass")
+        self.prefill_seconds = prefill_seconds
+        self.decode_seconds = decode_seconds
+        self.tokens = tokens
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self.devices = devices
+        self.first_tokens = []
+        self.calls = 0
+        self.prefilled_chars = 0
+        self.cached_chars = 0
+        self._blocks = OrderedDict()
+        self._loop = None
+        self._device = None
+
+    def _prefill(self, prompts):
+        # Characters to prefill for prompts, reusing cached blocks; caches the new ones
+        fresh = 0
+        for prompt in prompts:
+            chain = None
+            for offset in range(0, len(prompt), self.block_size):
+                block = prompt[offset:offset + self.block_size]
+                chain = hash((chain, block))
+                if chain in self._blocks:
+                    self._blocks.move_to_end(chain)
+                    self.cached_chars += len(block)
+                else:
+                    self._blocks[chain] = None
+                    fresh += len(block)
+        while len(self._blocks) > self.cache_blocks:
+            self._blocks.popitem(last=False)
+        self.prefilled_chars += fresh
+        return fresh
+
+    async def __call__(self, prompts):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._device = loop, asyncio.Semaphore(self.devices)
+        async with self._device:
+            self.calls += 1
+            await asyncio.sleep(self._prefill(prompts) * self.prefill_seconds)
+            first_token = time.perf_counter()
+            self.first_tokens.extend((prompt, first_token) for prompt in prompts)
+            await asyncio.sleep(self.tokens * self.decode_seconds)
+        return [self.respond(prompt) for prompt in prompts]
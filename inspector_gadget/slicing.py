@@ -0,0 +1,139 @@
+import math
+import re
+from collections import Counter, OrderedDict
+from functools import lru_cache
+
+from .grammars import default_grammar_cache, optimize_lark_grammar, prune_unreachable
+from .utils import convert_to_lark_grammar, is_api_name
+
+
+# --- Grammar Slicing ---
+# Purpose: Constrain each generation to the part of the API a task is about, not the whole module.
+# Strength: A slice of k members compiles and decodes like a toy grammar, however large the API is.
+# Limitation: Members the ranking misses can't be generated at all; raise k for tasks spanning many calls.
+
+DEFAULT_TOP_K = 24
+MAX_CACHED_SLICES = 256
+
+STOPWORDS = frozenset("""
+    a an and are as at be between by do for from get how i in into is it its me my of on or
+    our that the them then this to use using we with
+""".split())
+_WORD = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+_PARAMETER = re.compile(r"[(,]\s*\**([A-Za-z_]\w*)")
+
+
+def words(text):
+    """
+    Splits text into lowercase words, breaking identifiers at underscores, dots and
+    camelCase, and folding simple plurals: "shortestPaths_dijkstra" -> ["shortest", "path", "dijkstra"].
+    """
+    found = []
+    for word in _WORD.findall(text):
+        word = word.lower()
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        found.append(word)
+    return found
+
+
+@lru_cache(maxsize=1 << 16)
+def _member_words(name, signature):
+    # (own name words, module path words, parameter words, own name length, all of them)
+    path, _, own = name.rpartition(".")
+    own_words = words(own)
+    fields = (frozenset(own_words), frozenset(words(path)),
+              frozenset(words(" ".join(_PARAMETER.findall(signature)))))
+    return fields + (max(1, len(own_words)), fields[0] | fields[1] | fields[2])
+
+
+def _is_test_member(name):
+    return any(part in ("test", "tests", "testing", "conftest") or part.startswith("test_")
+               for part in name.split(".")[:-1])
+
+
+def lexical_ranking(task, api_map):
+    """
+    Default relevance ranking: returns {api name: score} for the members sharing words with
+    the task. Words in a member's own name count most (less the longer the name is), then its
+    module path, then its parameter names; each is weighted by how rare the word is across
+    the API (IDF). Members of test modules are ranked down.
+    Any callable with the same (task, api_map) -> {name: score} shape can replace it.
+    """
+    task_words = set(words(task)) - STOPWORDS
+    if not task_words:
+        return {}
+
+    fields = {}
+    frequency = Counter()
+    for name, signature in api_map.items():
+        entry = fields[name] = _member_words(name, str(signature))
+        frequency.update(entry[4])
+
+    total = len(api_map)
+    idf = {word: math.log(1 + total / frequency[word]) for word in task_words if frequency[word]}
+    scores = {}
+    for name, (own, path, parameters, length, _) in fields.items():
+        score = sum(idf[word] * (3.0 * (word in own) / math.sqrt(length) + 1.0 * (word in path)
+                                 + 0.5 * (word in parameters))
+                    for word in idf)
+        if score > 0:
+            scores[name] = score * (0.1 if _is_test_member(name) else 1.0)
+    return scores
+
+
+def select_members(task, api_map, k=DEFAULT_TOP_K, rank=lexical_ranking):
+    """
+    Returns the names of the k members of api_map most relevant to task, best first.
+    Re-exported aliases of one definition (same name and signature, e.g. networkx.shortest_path
+    and networkx.algorithms.shortest_paths.generic.shortest_path) take a single slot, under the
+    shortest qualified name, with the best score among them.
+    """
+    best = {}  # (own name, signature) -> (score, qualified name)
+    for name, score in rank(task, api_map).items():
+        if score <= 0 or name not in api_map or not is_api_name(name):
+            continue
+        alias_key = (name.rpartition(".")[2], str(api_map[name]))
+        previous = best.get(alias_key)
+        if previous is None:
+            best[alias_key] = (score, name)
+        else:
+            shortest = min(previous[1], name, key=lambda alias: (len(alias), alias))
+            best[alias_key] = (max(previous[0], score), shortest)
+    ranked = sorted(best.values(), key=lambda entry: (-entry[0], len(entry[1]), entry[1]))
+    return [name for _, name in ranked[:k]]
+
+
+_slices = OrderedDict()  # (frozenset of (name, signature), optimize) -> grammar
+
+
+def slice_grammar(api_map, members, optimize=True):
+    """
+    Returns a grammar for just `members` of api_map: their call rules and the argument rules
+    and terminals those reach, nothing else. Slices are memoized by their set of members
+    (and signatures), and the text is the same whatever order members come in, so the
+    compiled parser is shared through the grammar cache (see grammars.GrammarCache) too.
+    """
+    key = (frozenset((name, str(api_map[name])) for name in members), optimize)
+    grammar = _slices.get(key)
+    if grammar is not None:
+        _slices.move_to_end(key)
+        return grammar
+
+    sub_map = {name: api_map[name] for name in sorted(members)}
+    if optimize:
+        grammar, _ = optimize_lark_grammar(sub_map, measure=False)
+    else:
+        grammar = prune_unreachable(convert_to_lark_grammar(sub_map))
+    _slices[key] = grammar
+    while len(_slices) > MAX_CACHED_SLICES:
+        _slices.popitem(last=False)
+    return grammar
+
+
+def compile_slice(api_map, members, optimize=True, cache=None):
+    """
+    Returns the compiled LALR parser for slice_grammar(api_map, members), served from the
+    grammar cache (memory, then disk) when the same slice was compiled before.
+    """
+    return (cache or default_grammar_cache()).parser(slice_grammar(api_map, members, optimize))
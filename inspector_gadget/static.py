@@ -0,0 +1,485 @@
+import ast
+import inspect
+import os
+
+from .utils import _SourceExpr, _annotation, _default, find_module_source, signature_from_ast
+
+
+# --- Static Introspection ---
+# Purpose: Extract the same name -> signature maps as utils.extract_module_* without importing the target.
+# Strength: Cost is bounded by parsing source files; import-time side effects never run.
+# Limitation: Only sees what is written in Python source. Runtime-generated members,
+#             C extensions and non-literal defaults are approximated or skipped.
+
+PLACEHOLDER_SIGNATURE = "(*args, **kwargs)"
+
+
+def _dataclass_signature(node, future_annotations):
+    """
+    Rebuilds the generated __init__ signature of a @dataclass from its annotated fields.
+    """
+    P = inspect.Parameter
+    params = []
+    for stmt in node.body:
+        if not isinstance(stmt, ast.AnnAssign) or not isinstance(stmt.target, ast.Name):
+            continue
+        if ast.unparse(stmt.annotation).split("[")[0] in ("ClassVar", "typing.ClassVar"):
+            continue
+        default = P.empty
+        if stmt.value is not None:
+            default = _default(stmt.value)
+            call = stmt.value
+            if isinstance(call, ast.Call) and ast.unparse(call.func) in ("field", "dataclasses.field"):
+                keywords = {kw.arg: kw.value for kw in call.keywords}
+                if "default" in keywords:
+                    default = _default(keywords["default"])
+                elif "default_factory" in keywords:
+                    default = _SourceExpr("<factory>")
+                else:
+                    default = P.empty
+        params.append(P(stmt.target.id, P.POSITIONAL_OR_KEYWORD, default=default,
+                        annotation=_annotation(stmt.annotation, future_annotations)))
+    return inspect.Signature(params, return_annotation=None)
+
+
+def _is_dataclass(node):
+    for decorator in node.decorator_list:
+        target = decorator.func if isinstance(decorator, ast.Call) else decorator
+        if ast.unparse(target) in ("dataclass", "dataclasses.dataclass"):
+            return True
+    return False
+
+
+def _literal_names(node):
+    """
+    Returns the strings in a list/tuple literal, or None if node is anything else.
+    """
+    if isinstance(node, (ast.List, ast.Tuple)) and all(
+        isinstance(elt, ast.Constant) and isinstance(elt.value, str) for elt in node.elts
+    ):
+        return [elt.value for elt in node.elts]
+    return None
+
+
+def _resolve_relative(module_name, is_package, level, target):
+    """
+    Resolves the module named in a `from ... import` to an absolute dotted name.
+    """
+    if level == 0:
+        return target
+    parts = module_name.split(".")
+    if not is_package:
+        parts = parts[:-1]
+    if level > 1:
+        parts = parts[: len(parts) - (level - 1)]
+    if target:
+        parts.append(target)
+    return ".".join(parts)
+
+
+def _module_statements(body):
+    """
+    Yields the statements that execute at module level, descending into if/try blocks
+    (e.g. `try: from ._speedups import f except ImportError: def f(...)`).
+    """
+    for stmt in body:
+        if isinstance(stmt, ast.If):
+            yield from _module_statements(stmt.body)
+            yield from _module_statements(stmt.orelse)
+        elif isinstance(stmt, ast.Try):
+            yield from _module_statements(stmt.body)
+            for handler in stmt.handlers:
+                yield from _module_statements(handler.body)
+            yield from _module_statements(stmt.orelse)
+            yield from _module_statements(stmt.finalbody)
+        else:
+            yield stmt
+
+
+def summarize_source(source, module_name, is_package=False, path=None):
+    """
+    Parses one module's source and returns a plain, picklable summary of what it defines:
+
+        functions: {name: signature string}
+        classes:   {name: {"init": signature string or None, "bases": [...], "methods": {...}}}
+        imports:   {local name: [absolute module, attribute]} for `from m import a as b`
+        modules:   {local name: absolute module} for `import m` / `import m as b`
+        stars:     [absolute module, ...] for `from m import *`
+        aliases:   {name: other local name} for top-level `a = b`
+        all:       the literal __all__ list (or None), plus all_refs for `__all__ += m.__all__`
+    """
+    tree = ast.parse(source, filename=path or module_name)
+    future_annotations = any(
+        isinstance(stmt, ast.ImportFrom) and stmt.module == "__future__"
+        and any(alias.name == "annotations" for alias in stmt.names)
+        for stmt in tree.body
+    )
+    summary = {
+        "module": module_name,
+        "path": path,
+        "is_package": is_package,
+        "functions": {},
+        "classes": {},
+        "imports": {},
+        "modules": {},
+        "stars": [],
+        "aliases": {},
+        "all": None,
+        "all_refs": [],
+    }
+
+    for stmt in _module_statements(tree.body):
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            sig = signature_from_ast(stmt.args, stmt.returns, future_annotations)
+            summary["functions"][stmt.name] = str(sig)
+            summary["classes"].pop(stmt.name, None)
+
+        elif isinstance(stmt, ast.ClassDef):
+            summary["classes"][stmt.name] = _summarize_class(stmt, future_annotations)
+            summary["functions"].pop(stmt.name, None)
+
+        elif isinstance(stmt, ast.ImportFrom):
+            source_module = _resolve_relative(module_name, is_package, stmt.level, stmt.module)
+            for alias in stmt.names:
+                if alias.name == "*":
+                    summary["stars"].append(source_module)
+                else:
+                    summary["imports"][alias.asname or alias.name] = [source_module, alias.name]
+
+        elif isinstance(stmt, ast.Import):
+            for alias in stmt.names:
+                if alias.asname:
+                    summary["modules"][alias.asname] = alias.name
+                else:
+                    top_level = alias.name.partition(".")[0]
+                    summary["modules"][top_level] = top_level
+
+        elif isinstance(stmt, (ast.Assign, ast.AugAssign)):
+            _summarize_assignment(stmt, summary)
+
+        elif isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call):
+            # __all__.extend([...]) / __all__.append("x")
+            call = stmt.value
+            if ast.unparse(call.func) in ("__all__.extend", "__all__.append") and call.args:
+                names = _literal_names(call.args[0])
+                if names is None and isinstance(call.args[0], ast.Constant):
+                    names = [call.args[0].value]
+                if names is not None:
+                    summary["all"] = (summary["all"] or []) + names
+
+    return summary
+
+
+def _summarize_class(node, future_annotations):
+    init = None
+    methods = {}
+    for stmt in node.body:
+        if not isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        if stmt.name in ("__init__", "__new__") and (init is None or stmt.name == "__init__"):
+            init = str(signature_from_ast(stmt.args, stmt.returns, future_annotations, drop_first=True))
+        if not stmt.name.startswith("_"):
+            methods[stmt.name] = str(signature_from_ast(stmt.args, stmt.returns, future_annotations))
+    if init is None and _is_dataclass(node):
+        init = str(_dataclass_signature(node, future_annotations))
+    return {
+        "init": init,
+        "bases": [ast.unparse(base) for base in node.bases],
+        "methods": methods,
+    }
+
+
+def _summarize_assignment(stmt, summary):
+    if isinstance(stmt, ast.AugAssign):
+        if isinstance(stmt.target, ast.Name) and stmt.target.id == "__all__":
+            names = _literal_names(stmt.value)
+            if names is not None:
+                summary["all"] = (summary["all"] or []) + names
+            elif isinstance(stmt.value, ast.Attribute) and stmt.value.attr == "__all__":
+                summary["all_refs"].append(ast.unparse(stmt.value.value))
+        return
+
+    for target in stmt.targets:
+        if not isinstance(target, ast.Name):
+            continue
+        if target.id == "__all__":
+            names = _literal_names(stmt.value)
+            summary["all"] = names
+        elif isinstance(stmt.value, ast.Name):
+            summary["aliases"][target.id] = stmt.value.id
+        else:
+            # Rebinding a name to anything else hides an earlier def/import of it
+            summary["functions"].pop(target.id, None)
+            summary["classes"].pop(target.id, None)
+            summary["imports"].pop(target.id, None)
+
+
+def summarize_file(path, module_name, is_package=False):
+    """
+    Reads and summarizes one source file. Top-level so it can be shipped to worker processes.
+    """
+    with open(path, "rb") as f:
+        source = f.read()
+    return summarize_source(source, module_name, is_package, path)
+
+
+class SourceIndex:
+    """
+    Resolves module namespaces from source alone.
+
+    Summaries are parsed lazily and memoized, so extracting one module only parses the
+    files its namespace actually pulls names from. By default imports are only followed
+    within the target's own top-level package; pass follow_external=True to also read
+    pure-Python sources of other installed packages (e.g. the stdlib).
+    """
+    def __init__(self, follow_external=False):
+        self.follow_external = follow_external
+        self.summaries = {}
+        self._namespaces = {}
+        self._cycle_cuts = 0
+        self._provisional = {}
+
+    def __getstate__(self):
+        # Resolved namespaces are a cache over the summaries; rebuild them after unpickling
+        return {**self.__dict__, "_namespaces": {}, "_provisional": {}}
+
+    def summary(self, module_name):
+        """
+        Returns the summary for module_name, or None if it has no Python source on disk.
+        """
+        if module_name in self.summaries:
+            return self.summaries[module_name]
+        summary = None
+        try:
+            origin, locations = find_module_source(module_name)
+        except (ModuleNotFoundError, ImportError):
+            origin = None
+        if origin and origin.endswith(".py") and os.path.isfile(origin):
+            try:
+                summary = summarize_file(origin, module_name, is_package=locations is not None)
+            except (SyntaxError, UnicodeDecodeError, OSError) as e:
+                print(f"Could not parse {module_name}: {e}")
+        self.summaries[module_name] = summary
+        return summary
+
+    def add_summary(self, summary, affected=None):
+        """
+        Registers an externally produced summary (e.g. from a worker process). Resolved
+        namespaces are dropped: all of them, or only those of the `affected` module names.
+        """
+        self.summaries[summary["module"]] = summary
+        self.invalidate(affected)
+
+    def remove_summary(self, module_name, affected=None):
+        """
+        Forgets a module (e.g. its file was deleted); see add_summary for `affected`.
+        """
+        self.summaries.pop(module_name, None)
+        self.invalidate(affected)
+
+    def invalidate(self, module_names=None):
+        """
+        Drops resolved namespaces so they are rebuilt from the current summaries.
+        """
+        if module_names is None:
+            self._namespaces.clear()
+            return
+        for module_name in module_names:
+            self._namespaces.pop(module_name, None)
+
+    def dependents(self, module_names):
+        """
+        Returns module_names plus every known module whose namespace pulls names from
+        them, directly or transitively (through from-imports, star imports or __all__ references).
+        """
+        importers = {}
+        for summary in self.summaries.values():
+            if summary is None:
+                continue
+            sources = set(summary["stars"])
+            sources.update(source for source, _ in summary["imports"].values())
+            # `from . import sub` names the submodule itself
+            sources.update(".".join(pair) for pair in summary["imports"].values())
+            # Plain `import m` only matters when __all__ is extended from m.__all__
+            sources.update(summary["modules"].get(ref, ref) for ref in summary["all_refs"])
+            for source in sources:
+                importers.setdefault(source, set()).add(summary["module"])
+
+        affected = set(module_names)
+        pending = list(affected)
+        while pending:
+            for importer in importers.get(pending.pop(), ()):
+                if importer not in affected:
+                    affected.add(importer)
+                    pending.append(importer)
+        return affected
+
+    def _may_follow(self, root, module_name):
+        return self.follow_external or module_name.partition(".")[0] == root
+
+    def namespace(self, module_name):
+        """
+        Returns {name: (kind, payload, defining module, defined name)} for the functions and
+        classes visible at module_name's top level, where kind is "function" or "class" and
+        defined name is what the member is called in its defining module.
+        """
+        return self._namespace(module_name, module_name.partition(".")[0], set())
+
+    def _namespace(self, module_name, root, visiting):
+        if module_name in self._namespaces:
+            return self._namespaces[module_name]
+        if module_name in self._provisional:
+            return self._provisional[module_name]
+        summary = self.summary(module_name)
+        if summary is None:
+            return {}
+        if module_name in visiting:
+            # Circular import: fall back to the module's own definitions, and don't cache the
+            # modules in between, so results don't depend on which module was resolved first
+            self._cycle_cuts += 1
+            return self._own_definitions(summary)
+        visiting.add(module_name)
+        cuts = self._cycle_cuts
+
+        namespace = {}
+        for source_module in summary["stars"]:
+            if not self._may_follow(root, source_module):
+                continue
+            exported = self._namespace(source_module, root, visiting)
+            public = self.exports(source_module, root, visiting)
+            for name in public:
+                if name in exported:
+                    namespace[name] = exported[name]
+
+        for local_name, (source_module, attr) in summary["imports"].items():
+            if not self._may_follow(root, source_module):
+                continue
+            member = self._namespace(source_module, root, visiting).get(attr)
+            if member is not None:
+                namespace[local_name] = member
+
+        namespace.update(self._own_definitions(summary))
+        for name, target in summary["aliases"].items():
+            if target in namespace:
+                namespace[name] = namespace[target]
+
+        visiting.discard(module_name)
+        if self._cycle_cuts == cuts or not visiting:
+            self._namespaces[module_name] = namespace
+        else:
+            # Reusable until the outermost resolution finishes, which bounds the work per call
+            self._provisional[module_name] = namespace
+        if not visiting:
+            self._provisional.clear()
+        return namespace
+
+    @staticmethod
+    def _own_definitions(summary):
+        module_name = summary["module"]
+        namespace = {name: ("function", sig, module_name, name) for name, sig in summary["functions"].items()}
+        for name, record in summary["classes"].items():
+            namespace[name] = ("class", record, module_name, name)
+        return namespace
+
+    def exports(self, module_name, root=None, visiting=None):
+        """
+        Returns the names `from module_name import *` would bind: __all__ when it is
+        statically known, otherwise every public name in the namespace.
+        """
+        root = root or module_name.partition(".")[0]
+        visiting = visiting if visiting is not None else set()
+        summary = self.summary(module_name)
+        if summary is None:
+            return []
+        if summary["all"] is None and not summary["all_refs"]:
+            return [name for name in self._namespace(module_name, root, visiting) if not name.startswith("_")]
+        names = list(summary["all"] or [])
+        for ref in summary["all_refs"]:
+            # `__all__ += submodule.__all__`: ref names a module imported into this one
+            if ref in summary["modules"]:
+                target = summary["modules"][ref]
+            elif ref in summary["imports"]:
+                target = ".".join(summary["imports"][ref])
+            else:
+                target = ref
+            if self._may_follow(root, target):
+                names.extend(self.exports(target, root, visiting))
+        return names
+
+    def class_signature(self, record, defining_module, _seen=None):
+        """
+        Returns the signature string of a class, following bases defined in source when
+        the class itself defines neither __init__ nor __new__.
+        """
+        if record["init"] is not None:
+            return record["init"]
+        bases = [base for base in record["bases"] if base not in ("object", "Generic") and not base.startswith("Generic[")]
+        if not bases:
+            return "()"
+        _seen = _seen or set()
+        namespace = self.namespace(defining_module)
+        for base in bases:
+            member = namespace.get(base.split("[")[0])
+            if member is None or member[0] != "class" or id(member[1]) in _seen:
+                continue
+            _seen.add(id(member[1]))
+            return self.class_signature(member[1], member[2], _seen)
+        return PLACEHOLDER_SIGNATURE
+
+    def class_methods(self, record, defining_module, _seen=None):
+        """
+        Returns {name: signature string} for a class's public methods, including those
+        inherited from bases defined in source (the static counterpart of utils.extract_class_methods).
+        """
+        _seen = _seen or set()
+        _seen.add(id(record))
+        methods = {}
+        namespace = self.namespace(defining_module)
+        for base in reversed(record["bases"]):
+            member = namespace.get(base.split("[")[0])
+            if member is not None and member[0] == "class" and id(member[1]) not in _seen:
+                methods.update(self.class_methods(member[1], member[2], _seen))
+        methods.update(record["methods"])
+        return methods
+
+    def _members(self, module_name, kind, use_all):
+        namespace = self.namespace(module_name)
+        names = sorted(namespace)
+        if use_all:
+            public = set(self.exports(module_name))
+            names = [name for name in names if name in public]
+        return [(name, namespace[name]) for name in names if namespace[name][0] == kind]
+
+    def functions(self, module_name, use_all=False):
+        """
+        Returns {name: signature string} for the functions visible in module_name.
+        """
+        return {name: payload for name, (_, payload, _, _) in self._members(module_name, "function", use_all)}
+
+    def classes(self, module_name, use_all=False):
+        """
+        Returns {name: signature string} for the classes visible in module_name.
+        """
+        return {
+            name: self.class_signature(record, defining_module)
+            for name, (_, record, defining_module, _) in self._members(module_name, "class", use_all)
+        }
+
+
+def extract_source_functions(module, use_all=False, follow_external=False):
+    """
+    Static counterpart of utils.extract_module_functions: parses module's source files
+    (module may be a dotted name, or a module object whose name is used) and returns a
+    dict of function names to their signatures as strings, without importing it.
+    With use_all=True only names listed in the module's __all__ are returned.
+    """
+    module_name = module if isinstance(module, str) else module.__name__
+    return SourceIndex(follow_external).functions(module_name, use_all)
+
+
+def extract_source_classes(module, use_all=False, follow_external=False):
+    """
+    Static counterpart of utils.extract_module_classes.
+    """
+    module_name = module if isinstance(module, str) else module.__name__
+    return SourceIndex(follow_external).classes(module_name, use_all)
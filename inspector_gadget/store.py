@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import struct
+import tempfile
+
+import pyarrow as pa
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: publishers are not serialized against each other
+    fcntl = None
+
+from .apimap import APIMap
+from .cache import default_cache_dir
+from .gadget import Gadget, GadgetFactory
+
+
+# --- Shared Gadget Store ---
+# Purpose: Let many worker processes on one host use the same built gadgets without each holding a copy.
+# Strength: Attaching maps one file (well under a millisecond); pages live in the OS page cache,
+#           shared by every worker, and only the parts a worker reads are ever faulted in.
+# Limitation: Stored gadgets are snapshots; publish again after the library changes. Compiled
+#             parsers are Python objects and can't be mapped: they still load per worker, from
+#             the on-disk grammar cache (see grammars.GrammarCache).
+
+STORE_FORMAT = 1
+_MAGIC = b"IGSTORE1"
+_HEADER = struct.Struct("<8sQQ")  # magic, grammar length, table offset
+_ALIGN = 64  # Arrow buffers stay 64-byte aligned inside the mapping
+
+
+def default_store_dir():
+    """
+    Returns the directory of the default gadget store, under the cache directory.
+    """
+    return os.path.join(default_cache_dir(), "gadgets")
+
+
+class StoredGadget(Gadget):
+    """
+    A Gadget attached from a GadgetStore. Its API map is an APIMap over the mapped file, and
+    the grammar text is decoded from the mapping the first time it is read. module is None,
+    as for static builds.
+    """
+    def __init__(self, name, api_map, grammar_buffer, digest):
+        self.module = None
+        self.name = name
+        self.api_map = api_map
+        self.digest = digest
+        self._grammar_buffer = grammar_buffer
+        self._grammar = None
+
+    @property
+    def grammar(self):
+        if self._grammar is None:
+            self._grammar = self._grammar_buffer.to_pybytes().decode()
+        return self._grammar
+
+
+class GadgetStore:
+    """
+    A read-only, memory-mapped store of built gadgets, one file per gadget plus a JSON index
+    ({gadget name: file}) in one directory.
+
+    A gadget file is a small header, the grammar text, then the API map as an uncompressed
+    Arrow IPC file (see apimap.APIMap.save). publish() writes files atomically, so workers
+    never see a partial gadget, and a gadget published again replaces the old file; workers
+    still holding the old mapping keep reading it until they attach again. attach() re-reads
+    the index only when it changed on disk.
+    """
+    def __init__(self, path=None):
+        self.path = path or default_store_dir()
+        self._index = None
+        self._index_mtime = None
+        self._attached = {}  # gadget name -> StoredGadget
+
+    def _index_path(self):
+        return os.path.join(self.path, "index.json")
+
+    def index(self):
+        """
+        Returns {gadget name: {"file": filename, "digest": content digest, "members": n}}.
+        """
+        try:
+            mtime = os.stat(self._index_path()).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if mtime != self._index_mtime:
+            with open(self._index_path()) as f:
+                index = json.load(f)
+            self._index = index["gadgets"] if index.get("format") == STORE_FORMAT else {}
+            self._index_mtime = mtime
+        return self._index
+
+    def __contains__(self, name):
+        return name in self.index()
+
+    def names(self):
+        return list(self.index())
+
+    def attach(self, name):
+        """
+        Returns the stored gadget called name, mapping its file on first use, or None if the
+        store has no such gadget.
+        """
+        entry = self.index().get(name)
+        if entry is None:
+            return None
+        gadget = self._attached.get(name)
+        if gadget is not None and gadget.digest == entry["digest"]:
+            return gadget
+
+        try:
+            mapped = pa.memory_map(os.path.join(self.path, entry["file"]), "r")
+        except FileNotFoundError:
+            # Replaced by a publisher between reading the index and mapping the file
+            self._index_mtime = None
+            entry = self.index().get(name)
+            if entry is None:
+                return None
+            mapped = pa.memory_map(os.path.join(self.path, entry["file"]), "r")
+        data = mapped.read_buffer()
+        magic, grammar_length, table_offset = _HEADER.unpack(data.slice(0, _HEADER.size).to_pybytes())
+        if magic != _MAGIC:
+            print(f"Ignoring stored gadget {name}: {entry['file']} is not a gadget file")
+            return None
+        table = pa.ipc.open_file(data.slice(table_offset)).read_all()
+        gadget = self._attached[name] = StoredGadget(
+            name, APIMap(table), data.slice(_HEADER.size, grammar_length), entry["digest"])
+        return gadget
+
+    def publish(self, gadget):
+        """
+        Writes gadget into the store under gadget.name, replacing any previous version.
+        Returns the content digest of the stored file.
+        """
+        api_map = gadget.api_map if isinstance(gadget.api_map, APIMap) else APIMap.from_signatures(gadget.api_map)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_file(sink, api_map.to_arrow().schema) as writer:
+            writer.write_table(api_map.to_arrow())
+        table_bytes = sink.getvalue()
+        grammar = gadget.grammar.encode()
+        table_offset = -(-(_HEADER.size + len(grammar)) // _ALIGN) * _ALIGN
+        header = _HEADER.pack(_MAGIC, len(grammar), table_offset)
+        padding = b"\0" * (table_offset - _HEADER.size - len(grammar))
+
+        digest = hashlib.sha256(grammar)
+        digest.update(table_bytes)
+        digest = digest.hexdigest()
+        filename = f"{gadget.name}.{digest[:16]}.gadget"
+        os.makedirs(self.path, exist_ok=True)
+
+        with self._locked():
+            if self.index().get(gadget.name, {}).get("digest") == digest:
+                return digest
+            self._write(filename, [header, grammar, padding, table_bytes])
+            index = dict(self.index())
+            previous = index.get(gadget.name)
+            index[gadget.name] = {"file": filename, "digest": digest, "members": len(api_map)}
+            self._write("index.json", [json.dumps({"format": STORE_FORMAT, "gadgets": index}, indent=1).encode()])
+            self._index_mtime = None
+            if previous is not None and previous["file"] != filename:
+                try:
+                    os.unlink(os.path.join(self.path, previous["file"]))
+                except FileNotFoundError:
+                    pass
+        return digest
+
+    def get_or_build(self, module, **build_options):
+        """
+        Attaches the stored gadget for module (a module object or dotted name), building it with
+        GadgetFactory.build_gadget(module, **build_options) and publishing it first if needed.
+        """
+        name = module if isinstance(module, str) else module.__name__
+        gadget = self.attach(name)
+        if gadget is None:
+            self.publish(GadgetFactory.build_gadget(module, **build_options))
+            gadget = self.attach(name)
+        return gadget
+
+    def remove(self, name):
+        """
+        Removes the gadget called name from the store.
+        """
+        with self._locked():
+            index = dict(self.index())
+            entry = index.pop(name, None)
+            if entry is None:
+                return
+            self._write("index.json", [json.dumps({"format": STORE_FORMAT, "gadgets": index}, indent=1).encode()])
+            self._index_mtime = None
+            self._attached.pop(name, None)
+            try:
+                os.unlink(os.path.join(self.path, entry["file"]))
+            except FileNotFoundError:
+                pass
+
+    def _write(self, filename, chunks):
+        # Write to a temp file first so attaching workers never observe a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, os.path.join(self.path, filename))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _locked(self):
+        return _IndexLock(os.path.join(self.path, "index.lock"))
+
+
+class _IndexLock:
+    # Serializes publishers' read-modify-write of the index (advisory; attach never takes it)
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.file = open(self.path, "a")
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
@@ -0,0 +1,53 @@
+from functools import lru_cache
+
+
+# --- Token Budgets ---
+# Purpose: Keep generated prompt sections inside a hard token budget.
+# Strength: Counts are memoized per chunk, so re-assembling a prompt from the same entries is cheap.
+# Limitation: A budget is checked against the sum of per-chunk counts, which may overcount the
+#             joined text by a token at some chunk boundaries (never undercounts it in practice).
+
+DEFAULT_ENCODING = "cl100k_base"
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name=DEFAULT_ENCODING):
+    """
+    Returns the tiktoken encoding called name, or None if it can't be loaded (tiktoken
+    downloads encodings on first use), in which case counts fall back to UTF-8 byte length.
+    """
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        print(f"Could not load tiktoken encoding {name!r}, counting bytes instead: {e}")
+        return None
+
+
+@lru_cache(maxsize=1 << 16)
+def count_tokens(text, encoding=DEFAULT_ENCODING):
+    """
+    Returns the number of tokens in text. encoding is a tiktoken encoding name or object.
+    Without a loadable encoding the count is the UTF-8 byte length, an upper bound for any
+    byte-level BPE, so budgets still hold.
+    """
+    if isinstance(encoding, str):
+        encoding = get_encoding(encoding)
+    if encoding is None:
+        return len(text.encode())
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def take_within_budget(items, budget, encoding=DEFAULT_ENCODING, spent=0, text=None):
+    """
+    Yields (item, tokens spent so far) for the items of an iterable that fit in the budget,
+    in order; `text` maps an item to the text it costs (default: the item itself). An item
+    that doesn't fit is skipped, and later, smaller ones may still be taken.
+    """
+    for item in items:
+        tokens = count_tokens(item if text is None else text(item), encoding)
+        if spent + tokens > budget:
+            continue
+        spent += tokens
+        yield item, spent
@@ -0,0 +1,404 @@
+import atexit
+import contextvars
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+
+# --- Tracing ---
+# Purpose: Show where a request's time goes: module import, signature extraction, grammar
+#          compilation, prompt rendering, model calls, validation, graph queries.
+# Strength: Off by default at the cost of one global check per instrumented call; when on,
+#           spans nest per thread and per asyncio task, counters record cache hits and misses
+#           and prompt tokens, and everything goes to pluggable sinks in the OpenTelemetry
+#           (OTLP JSON) shape, so a collector or a test can read it.
+# Limitation: Spans end up in sinks only when they finish; a hung step shows up as a missing
+#             span, not as a long one. The sampling profiler sees Python frames only.
+
+TRACE_ENV = "INSPECTOR_GADGET_TRACE"  # a JSONL path: tracing starts enabled, writing there
+PROFILE_INTERVAL = 0.005  # seconds between profiler samples
+MAX_PROFILE_DEPTH = 64
+
+_enabled = False
+_sinks = []
+_counters = Counter()  # (name, attributes) -> value
+_counters_lock = threading.Lock()
+_profiler = None
+_current = contextvars.ContextVar("inspector_gadget_span", default=None)
+
+
+def _otel_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otel_attributes(attributes):
+    return [{"key": key, "value": _otel_value(value)} for key, value in attributes.items()]
+
+
+class Span:
+    """
+    One timed step: a name, attributes, and its trace, span and parent span ids. Use it as a
+    context manager (see span()); set() adds attributes while it runs. An exception leaving
+    the span marks it as an error and is re-raised.
+    """
+    __slots__ = ("name", "attributes", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "error",
+                 "_started", "_token")
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.error = None
+        self.end_ns = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    def __enter__(self):
+        parent = _current.get()
+        self.trace_id = parent.trace_id if parent is not None else random.getrandbits(128)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.span_id = random.getrandbits(64)
+        self._token = _current.set(self)
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.end_ns = self.start_ns + time.perf_counter_ns() - self._started
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        for sink in _sinks:
+            sink.export(self)
+        return False
+
+    @property
+    def duration_ms(self):
+        return (self.end_ns - self.start_ns) / 1e6 if self.end_ns is not None else None
+
+    def to_otel(self):
+        """
+        Returns the span as an OTLP JSON span object.
+        """
+        otel = {
+            "traceId": f"{self.trace_id:032x}",
+            "spanId": f"{self.span_id:016x}",
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otel_attributes(self.attributes),
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id is not None:
+            otel["parentSpanId"] = f"{self.parent_id:016x}"
+        return otel
+
+    def __repr__(self):
+        return f"Span({self.name!r}, {self.duration_ms}ms, {self.attributes!r})"
+
+
+class _NullSpan:
+    # What span() returns while tracing is off: does nothing, cheaply
+    __slots__ = ()
+
+    def set(self, **attributes):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enabled():
+    """
+    Returns whether tracing is on; check it before computing costly attributes.
+    """
+    return _enabled
+
+
+def span(name, **attributes):
+    """
+    Returns a context manager timing the enclosed step as a Span (a no-op while tracing is off):
+
+        with tracing.span("grammar.compile", rules=len(rules)) as step:
+            ...
+            step.set(cache="miss")
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, attributes)
+
+
+def traced(name=None, **attributes):
+    """
+    Decorator running every call of a function in a span (default name: module.qualname).
+    """
+    def decorate(function):
+        span_name = name or f"{function.__module__}.{function.__qualname__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with Span(span_name, dict(attributes)):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, value=1, **attributes):
+    """
+    Adds value to the counter name (one series per distinct set of attributes).
+    """
+    if not _enabled:
+        return
+    key = (name, tuple(sorted(attributes.items())))
+    with _counters_lock:
+        _counters[key] += value
+
+
+def counters():
+    """
+    Returns the counters as {(name, ((attribute, value), ...)): total}.
+    """
+    with _counters_lock:
+        return dict(_counters)
+
+
+def counters_to_otel(snapshot, time_ns=None):
+    """
+    Returns counters (see counters()) as OTLP JSON metric objects: one monotonic cumulative
+    sum per name, one data point per attribute set.
+    """
+    time_ns = str(time_ns or time.time_ns())
+    metrics = {}
+    for (name, attributes), value in sorted(snapshot.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+        metric = metrics.setdefault(name, {"name": name, "sum": {
+            "dataPoints": [], "aggregationTemporality": 2, "isMonotonic": True}})
+        point = {"attributes": _otel_attributes(dict(attributes)), "timeUnixNano": time_ns}
+        if isinstance(value, int):
+            point["asInt"] = str(value)
+        else:
+            point["asDouble"] = value
+        metric["sum"]["dataPoints"].append(point)
+    return list(metrics.values())
+
+
+# --- Sinks ---
+# A sink has export(span), export_counters(snapshot), export_profile(profiler) and close().
+
+class MemorySink:
+    """
+    Keeps finished spans, the last counters snapshot and the last profile in memory, for tests.
+    """
+    def __init__(self):
+        self.spans = []
+        self.counters = {}
+        self.profile = None
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def export_counters(self, snapshot):
+        self.counters = snapshot
+
+    def export_profile(self, profiler):
+        self.profile = profiler.collapsed()
+
+    def close(self):
+        pass
+
+    def named(self, name):
+        """
+        Returns the finished spans called name.
+        """
+        return [span for span in self.spans if span.name == name]
+
+    def counter(self, name, **attributes):
+        """
+        Returns a counter's value (summed over attribute sets not fixed by attributes).
+        """
+        wanted = set(attributes.items())
+        return sum(value for (key, attrs), value in self.counters.items() if key == name and wanted <= set(attrs))
+
+
+class JSONLSink:
+    """
+    Appends one JSON object per line to path: OTLP JSON spans as they finish, OTLP metrics
+    ({"name": ..., "sum": ...}) when counters are exported, and {"profile": {stack: samples}}.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a", buffering=1)
+        self._lock = threading.Lock()
+
+    def _write(self, record):
+        line = json.dumps(record)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def export(self, span):
+        self._write(span.to_otel())
+
+    def export_counters(self, snapshot):
+        for metric in counters_to_otel(snapshot):
+            self._write(metric)
+
+    def export_profile(self, profiler):
+        self._write({"profile": profiler.collapsed(), "intervalSeconds": profiler.interval})
+
+    def close(self):
+        self._file.close()
+
+
+# --- Sampling Profiler ---
+# Purpose: Find the hot functions inside a slow span without instrumenting them.
+# Strength: A background thread samples the other threads' stacks every `interval`; the
+#           profiled code runs unmodified, so the overhead is the sampling alone.
+# Limitation: Statistical; functions shorter than the interval show up only in aggregate,
+#             and time spent in C code is charged to the calling Python frame.
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of running threads (all but its own, or only `threads`) every
+    interval seconds between start() and stop(). collapsed() gives flame-graph input
+    ({"outer;...;inner": samples}), top() the functions with the most samples.
+    """
+    def __init__(self, interval=PROFILE_INTERVAL, threads=None):
+        self.interval = interval
+        self.threads = set(threads) if threads is not None else None
+        self.samples = Counter()  # stack (outermost first) -> samples
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="inspector_gadget-profiler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (self.threads is not None and ident not in self.threads):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_PROFILE_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.samples[tuple(reversed(stack))] += 1
+
+    def collapsed(self):
+        """
+        Returns {"outer;...;inner": samples}, the folded-stack format flame graph tools read.
+        """
+        return {";".join(stack): samples for stack, samples in self.samples.most_common()}
+
+    def top(self, n=20):
+        """
+        Returns [(function, own samples, samples including callees)] for the n functions with
+        the most own samples.
+        """
+        own, total = Counter(), Counter()
+        for stack, samples in self.samples.items():
+            own[stack[-1]] += samples
+            for function in set(stack):
+                total[function] += samples
+        return [(function, samples, total[function]) for function, samples in own.most_common(n)]
+
+
+def profile(interval=PROFILE_INTERVAL):
+    """
+    Returns a SamplingProfiler for the calling thread, to wrap a hot path:
+
+        with tracing.profile() as profiler:
+            tool.search(...)
+        print(profiler.top(10))
+    """
+    return SamplingProfiler(interval, threads=[threading.get_ident()])
+
+
+# --- Switches ---
+
+def enable(*sinks, profile=False, interval=PROFILE_INTERVAL):
+    """
+    Turns tracing on, exporting to sinks (default: a new MemorySink), and returns the first
+    sink. profile=True also runs a SamplingProfiler over every thread until disable().
+    """
+    global _enabled, _profiler
+    _sinks.extend(sinks or [MemorySink()])
+    if profile and _profiler is None:
+        _profiler = SamplingProfiler(interval).start()
+    _enabled = True
+    return _sinks[0]
+
+
+def flush():
+    """
+    Exports the counters (cumulative since the last reset) to every sink.
+    """
+    snapshot = counters()
+    for sink in _sinks:
+        sink.export_counters(snapshot)
+
+
+def disable(reset=True):
+    """
+    Turns tracing off: flushes the counters, stops the profiler (exporting its samples) and
+    closes and detaches the sinks. reset=False keeps the counters.
+    """
+    global _enabled, _profiler
+    _enabled = False
+    flush()
+    if _profiler is not None:
+        _profiler.stop()
+        for sink in _sinks:
+            sink.export_profile(_profiler)
+        _profiler = None
+    for sink in _sinks:
+        sink.close()
+    _sinks.clear()
+    if reset:
+        with _counters_lock:
+            _counters.clear()
+
+
+if os.environ.get(TRACE_ENV):
+    enable(JSONLSink(os.environ[TRACE_ENV]))
+    atexit.register(disable)
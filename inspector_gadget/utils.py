@@ -1,8 +1,30 @@
 import inspect
 import types
 import ast
+import atexit
+import importlib
+import importlib.machinery
+import hashlib
+import json
+import os
+import re
+import select
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+from functools import lru_cache
 
+try:
+    import resource
+except ImportError:  # not POSIX: sandboxed workers run without CPU and memory limits
+    resource = None
 
+from .tracing import traced
+
+
+@traced("extract.functions")
 def extract_module_functions(module):
     """
     Extracts top-level functions from a module using inspect,
@@ -29,6 +51,7 @@ def extract_module_functions(module):
     return function_signatures
 
 
+@traced("extract.classes")
 def extract_module_classes(module):
     """
     Extracts top-level classes from a module using inspect,
@@ -48,113 +71,763 @@ def extract_module_classes(module):
                 class_signatures[name] = "(*args, **kwargs)" # Placeholder
             except Exception as e:
                 print(f"Unexpected error inspecting {name}: {e}")
+    return class_signatures
 
-def extract_
 
-def convert_to_lark_grammar(api_map):
+def extract_class_methods(cls):
     """
-    Convert the API map into a Lark-compatible grammar.
-    This is the same (or similar to) the routine we developed earlier.
+    Extracts public methods (excluding those starting with '_') from a class
+    using inspect, and returns a dict of method names to their signatures as strings.
+    """
+    method_signatures = {}
+    for name, obj in inspect.getmembers(cls):
+        if inspect.isfunction(obj) and not name.startswith('_'):
+            try:
+                method_signatures[name] = str(inspect.signature(obj))
+            except (ValueError, TypeError):
+                method_signatures[name] = "(*args, **kwargs)" # Placeholder
+            except Exception as e:
+                print(f"Unexpected error inspecting {cls.__name__}.{name}: {e}")
+                continue
+    return method_signatures
+
+
+def find_module_source(module_name):
+    """
+    Locates a module on sys.path without importing it (or any of its parents),
+    and returns a tuple of (origin, search_locations).
+
+    origin is the path of the module's source file (the package __init__.py for
+    packages), or None for builtins and namespace packages. search_locations is
+    the list of package directories, or None for plain modules.
+    """
+    if module_name in sys.builtin_module_names:
+        return None, None
+    spec = None
+    search_path = None
+    for part in module_name.split("."):
+        spec = importlib.machinery.PathFinder.find_spec(part, search_path)
+        if spec is None:
+            raise ModuleNotFoundError(f"No module named {module_name!r}", name=module_name)
+        search_path = spec.submodule_search_locations
+    origin = spec.origin if spec.has_location else None
+    locations = list(spec.submodule_search_locations) if spec.submodule_search_locations is not None else None
+    return origin, locations
+
+
+def is_api_name(name):
+    """
+    True for names that can appear in generated calls: identifiers, or dotted
+    qualified names such as "networkx.algorithms.shortest_path".
+    """
+    return all(part.isidentifier() for part in name.split("."))
+
+
+# --- Signature Parsing ---
+# Purpose: Turn the signature strings stored in API maps back into inspect.Signature objects.
+# Strength: Parsing never evaluates anything, so annotations and defaults survive as source text.
+# Limitation: Defaults whose repr is not valid Python (e.g. "<object at 0x...>") are kept as "...".
+
+_OPAQUE_REPR = re.compile(r"<[^<>]*>")
+
+
+class _SourceExpr:
+    """
+    Stands in for a default or annotation that was read from source rather than evaluated.
+    Its repr is the source text, so inspect.Signature renders it the way the live object would.
+    """
+    __slots__ = ("source",)
+
+    def __init__(self, source):
+        self.source = source
+
+    def __repr__(self):
+        return self.source
+
+
+def _annotation(node, future_annotations):
+    if node is None:
+        return inspect.Parameter.empty
+    if future_annotations:
+        # Under PEP 563 the live annotation is a string, which inspect renders quoted
+        return _SourceExpr(repr(ast.unparse(node)))
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return _SourceExpr(repr(node.value))
+    return _SourceExpr(ast.unparse(node))
+
+
+def _default(node):
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return _SourceExpr(ast.unparse(node))
+
+
+def signature_from_ast(args, returns=None, future_annotations=False, drop_first=False):
+    """
+    Builds an inspect.Signature from an ast.arguments node.
+    drop_first removes the leading positional parameter (self/cls), as inspect does for bound methods.
+    """
+    P = inspect.Parameter
+    params = []
+    positional = args.posonlyargs + args.args
+    first_default = len(positional) - len(args.defaults)
+    for i, arg in enumerate(positional):
+        kind = P.POSITIONAL_ONLY if i < len(args.posonlyargs) else P.POSITIONAL_OR_KEYWORD
+        default = _default(args.defaults[i - first_default]) if i >= first_default else P.empty
+        params.append(P(arg.arg, kind, default=default, annotation=_annotation(arg.annotation, future_annotations)))
+    if args.vararg:
+        params.append(P(args.vararg.arg, P.VAR_POSITIONAL, annotation=_annotation(args.vararg.annotation, future_annotations)))
+    for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+        params.append(P(arg.arg, P.KEYWORD_ONLY,
+                        default=P.empty if default is None else _default(default),
+                        annotation=_annotation(arg.annotation, future_annotations)))
+    if args.kwarg:
+        params.append(P(args.kwarg.arg, P.VAR_KEYWORD, annotation=_annotation(args.kwarg.annotation, future_annotations)))
+
+    if drop_first and params and params[0].kind in (P.POSITIONAL_ONLY, P.POSITIONAL_OR_KEYWORD):
+        params = params[1:]
+    return inspect.Signature(params, return_annotation=_annotation(returns, future_annotations))
+
+
+def parse_signature(signature):
+    """
+    Returns signature as an inspect.Signature: either a Signature (returned as is) or a
+    signature string as stored in API maps, e.g. "(G, source=None, *, weight: str = 'weight')".
+    Returns None if the string can't be parsed.
+    """
+    if signature is None or isinstance(signature, inspect.Signature):
+        return signature
+    return _parse_signature_text(signature)
+
+
+@lru_cache(maxsize=4096)
+def _parse_signature_text(text):
+    while True:
+        try:
+            func = ast.parse(f"def _f{text}: pass").body[0]
+            return signature_from_ast(func.args, func.returns)
+        except SyntaxError:
+            # Retry with opaque reprs such as <factory> or <object object at 0x...> blanked out
+            blanked = _OPAQUE_REPR.sub("...", text)
+            if blanked == text:
+                return None
+            text = blanked
+
+
+def lark_rule_names(names, taken=None):
+    """
+    Maps API names to unique Lark rule names of the form "<name>_call".
+    Lark rules must match _?[a-z][_a-z0-9]*, so names are lowercased, dots become
+    "__" and leading underscores are collapsed; clashes get a numeric suffix.
+    Pass a `taken` set to allocate names alongside ones already in use (it is updated in place).
+    """
+    rule_names = {}
+    taken = set() if taken is None else taken
+    for name in names:
+        base = name.replace(".", "__").lower()
+        if base.startswith("_"):
+            base = "_" + base.lstrip("_")
+        rule = f"{base}_call"
+        suffix = 1
+        while rule in taken:
+            suffix += 1
+            rule = f"{base}_{suffix}_call"
+        taken.add(rule)
+        rule_names[name] = rule
+    return rule_names
+
+
+# --- Typed Argument Rules ---
+# Purpose: Give each member the argument language its signature allows, not one generic `args` rule.
+# Strength: Arity, keyword names and literal types are enforced while decoding, so invalid calls
+#           are masked out instead of failing after generation.
+# Limitation: Only builtin scalar, Optional/Union and Literal annotations narrow values; any other
+#             type, and a variable name in any position, still matches the generic `value` rule.
+
+_WS = "[ \\t\\f\\r\\n]"  # the characters common.WS ignores
+_SCALAR_TERMINALS = {
+    "int": ("SIGNED_INT",),
+    "float": ("SIGNED_NUMBER",),
+    "str": ("ESCAPED_STRING",),
+    "bool": ('"True"', '"False"'),
+    "None": ('"None"',),
+    "NoneType": ('"None"',),
+}
+_TERMINAL_WORDS = {"SIGNED_INT": "int", "SIGNED_NUMBER": "number", "ESCAPED_STRING": "string",
+                   '"True"': "true", '"False"': "false", '"None"': "none"}
+
+
+def _annotation_text(annotation):
+    if annotation is inspect.Parameter.empty:
+        return None
+    if isinstance(annotation, _SourceExpr):
+        return annotation.source
+    if isinstance(annotation, str):
+        return annotation
+    return inspect.formatannotation(annotation)
+
+
+def _union_terminals(options):
+    terminals = []
+    for option in options:
+        if option is None:
+            return None
+        terminals.extend(t for t in option if t not in terminals)
+    if "SIGNED_NUMBER" in terminals and "SIGNED_INT" in terminals:
+        terminals.remove("SIGNED_INT")
+    return tuple(terminals)
+
+
+def _literal_terminal(value):
+    # A Lark string literal matching the value written as Python source: "mean" -> "\"mean\""
+    return json.dumps(json.dumps(value) if isinstance(value, str) else repr(value))
+
+
+def _type_terminals(node):
+    """
+    Returns the terminals a literal of the annotated type can be written with, or None
+    when the annotation doesn't narrow it (classes, containers, Any, ...).
+    """
+    if isinstance(node, ast.Constant):
+        if node.value is None:
+            return _SCALAR_TERMINALS["None"]
+        if isinstance(node.value, str):  # forward reference, e.g. "Optional[int]"
+            try:
+                return _type_terminals(ast.parse(node.value, mode="eval").body)
+            except SyntaxError:
+                return None
+        return None
+    if isinstance(node, ast.Name):
+        return _SCALAR_TERMINALS.get(node.id)
+    if isinstance(node, ast.Attribute):
+        return _SCALAR_TERMINALS.get(node.attr) if ast.unparse(node.value) in ("builtins", "types") else None
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+        return _union_terminals([_type_terminals(node.left), _type_terminals(node.right)])
+    if isinstance(node, ast.Subscript):
+        origin = ast.unparse(node.value).rpartition(".")[2]
+        items = node.slice.elts if isinstance(node.slice, ast.Tuple) else [node.slice]
+        if origin == "Optional":
+            return _union_terminals([_type_terminals(items[0]), _SCALAR_TERMINALS["None"]])
+        if origin == "Union":
+            return _union_terminals([_type_terminals(item) for item in items])
+        if origin == "Literal":
+            terminals = []
+            for item in items:
+                try:
+                    value = ast.literal_eval(item)
+                except (ValueError, TypeError, SyntaxError):
+                    return None
+                if value is not None and not isinstance(value, (str, int, float)):
+                    return None
+                terminals.append(_literal_terminal(value))
+            return tuple(dict.fromkeys(terminals))
+    return None
+
+
+def _default_terminals(default):
+    if default is None:
+        return _SCALAR_TERMINALS["None"]
+    if isinstance(default, bool):
+        return _SCALAR_TERMINALS["bool"]
+    if isinstance(default, int):
+        return _SCALAR_TERMINALS["int"]
+    if isinstance(default, float):
+        return _SCALAR_TERMINALS["float"]
+    if isinstance(default, str):
+        return _SCALAR_TERMINALS["str"]
+    return None
+
+
+def _value_rule(param):
+    """
+    Returns (rule name, definition) for an argument bound to param: the literals its annotation
+    (or, when unannotated, its default) allows, plus NAME for passing a variable. The definition
+    is None for the generic `value` rule.
+    """
+    empty = inspect.Parameter.empty
+    terminals = None
+    annotation = _annotation_text(param.annotation)
+    if annotation is not None:
+        try:
+            terminals = _type_terminals(ast.parse(annotation, mode="eval").body)
+        except SyntaxError:
+            terminals = None
+        default = _default_terminals(param.default) if param.default is not empty else None
+        covered = set(terminals or ()) | ({"SIGNED_INT"} if "SIGNED_NUMBER" in (terminals or ()) else set())
+        if terminals is not None and default is not None and not set(default) <= covered:
+            # `weight: str = None` still accepts its own default
+            terminals = _union_terminals([terminals, (_literal_terminal(param.default),)])
+    elif param.default is not empty and param.default is not None:
+        terminals = _default_terminals(param.default)
+        if terminals == _SCALAR_TERMINALS["int"]:
+            terminals = _SCALAR_TERMINALS["float"]  # an unannotated `n=1` usually takes 0.5 as well
+    if terminals is None:
+        return "value", None
+    # A named rule rather than an inline group: Lark expands inline alternatives into copies of
+    # the enclosing rule, which multiplies parser states
+    words = [_TERMINAL_WORDS.get(terminal) for terminal in terminals]
+    if None in words:
+        rule = "literal_" + hashlib.sha1(" ".join(terminals).encode()).hexdigest()[:10] + "_value"
+    else:
+        rule = "_".join(words).replace("true_false", "bool") + "_value"
+    return rule, f"{rule}: " + " | ".join(terminals + ("NAME",))
+
+
+def _keyword_terminal(name):
+    """
+    Returns (terminal name, definition) matching `name=` in a keyword argument. Keyword
+    terminals outrank NAME, so "weight=" is never lexed as a variable called weight.
+    """
+    if re.fullmatch(r"[a-z0-9_]+", name):
+        terminal = "KW_" + name.upper()
+    else:
+        # Terminals are upper case: keep names that differ only in case (G / g) apart
+        digest = hashlib.sha1(name.encode()).hexdigest()[:8].upper()
+        terminal = "KW_" + re.sub(r"[^A-Z0-9_]", "", name.upper()) + "_" + digest
+    return terminal, f"{terminal}.2: /{name}{_WS}*=/"
+
+
+def lark_args_rules(prefix, signature=None):
+    """
+    Returns (args expression, auxiliary rule lines) describing the argument list of a call.
+    Auxiliary rules are named with `prefix` so they stay unique per API member; keyword
+    terminals are named after the parameter and shared by every member that takes it.
+
+    The rules follow the signature (a string or inspect.Signature): no more positional
+    arguments than it takes (any number with *args), required positional-only parameters
+    present, keyword names limited to its keyword-capable parameters (any name with **kwargs),
+    and values narrowed by annotation or default.
+    Without a signature, or if it can't be parsed, any argument list matches the shared `args`.
+
+    Required positional-or-keyword and keyword-only parameters are not enforced: either may
+    come as a keyword in any order, and a context-free rule demanding each one would grow
+    with every ordering. Signature.bind catches them (see validation.CodeValidator).
+    """
+    signature = parse_signature(signature)
+    if signature is None:
+        return "[args]", []
+
+    P = inspect.Parameter
+    params = list(signature.parameters.values())
+    positional = [p for p in params if p.kind in (P.POSITIONAL_ONLY, P.POSITIONAL_OR_KEYWORD)]
+    keywords = [p for p in params if p.kind in (P.POSITIONAL_OR_KEYWORD, P.KEYWORD_ONLY)]
+    var_positional = next((p for p in params if p.kind == P.VAR_POSITIONAL), None)
+    var_keyword = next((p for p in params if p.kind == P.VAR_KEYWORD), None)
+    required = sum(1 for p in positional if p.kind == P.POSITIONAL_ONLY and p.default is P.empty)
+
+    aux_rules = []
+    shared = []  # value rules and keyword terminals, emitted once per grammar
+
+    def value(param):
+        rule, definition = _value_rule(param)
+        if definition is not None:
+            shared.append(definition)
+        return rule
+
+    keyword_list = None
+    if keywords or var_keyword:
+        kw_alternatives = []
+        for p in keywords:
+            terminal, definition = _keyword_terminal(p.name)
+            kw_alternatives.append(f"{terminal} {value(p)}")
+            shared.append(definition)
+        if var_keyword:
+            kw_alternatives.append(f"NAME \"=\" {value(var_keyword)}")
+        keyword_list = f"{prefix}_kws"
+        aux_rules.append(f"{keyword_list}: {prefix}_kw (\",\" {prefix}_kw)*")
+        aux_rules.append(f"{prefix}_kw: " + " | ".join(kw_alternatives))
+
+    # Positional arguments form a right-nested chain of small rules, one per parameter:
+    # each starts at a comma, so the token after it decides between the next positional
+    # argument and the keywords, and the grammar grows linearly with the parameter count
+    # (nested optionals would be expanded into quadratically many alternatives).
+    if var_positional:
+        var_rule = f"{prefix}_var"
+        alternatives = [f"\",\" {value(var_positional)} [{var_rule}]"]
+        if keyword_list:
+            alternatives.append(f"\",\" {keyword_list}")
+        aux_rules.append(f"{var_rule}: " + " | ".join(alternatives))
+        tail = f" [{var_rule}]"
+    else:
+        tail = f" [\",\" {keyword_list}]" if keyword_list else ""
+    for i in reversed(range(1, len(positional))):
+        link_rule = f"{prefix}_{i}"
+        alternatives = [f"\",\" {value(positional[i])}{tail}"]
+        if keyword_list and i >= required:
+            alternatives.append(f"\",\" {keyword_list}")
+        aux_rules.append(f"{link_rule}: " + " | ".join(alternatives))
+        tail = f" {link_rule}" if i < required else f" [{link_rule}]"
+
+    alternatives = []
+    if positional:
+        alternatives.append(f"{value(positional[0])}{tail}")
+    elif var_positional:
+        alternatives.append(f"{value(var_positional)}{tail}")
+    if keyword_list and not required:
+        alternatives.append(keyword_list)
+
+    if not alternatives:
+        return "", []
+    aux_rules.insert(0, f"{prefix}_args: " + " | ".join(alternatives))
+    return (f"{prefix}_args" if required else f"[{prefix}_args]"), aux_rules + sorted(dict.fromkeys(shared), key=lambda line: line[:1].isupper())
+
+
+def lark_call_rule(name, rule_name, signature=None):
+    """
+    Returns the grammar rule(s) for calling one API member.
+    """
+    args_expr, aux_rules = lark_args_rules(rule_name, signature)
+    return "\n".join([f"{rule_name}: \"{name}\" \"(\" {args_expr} \")\""] + aux_rules)
+
+
+def assemble_lark_grammar(rules, entries=None):
+    """
+    Joins per-member rules ({rule name: rule text}) into a complete grammar, adding
+    the statement alternation (over `entries`, default every rule) and the shared
+    value rules and imports.
     """
     grammar_lines = [
         "start: statement+",
         "",
-        "statement: " + " | ".join(f"{name}_call" for name in api_map.keys() if name.isidentifier()),
+        "statement: " + " | ".join(rules.keys() if entries is None else entries),
         ""
     ]
-
-    for name in api_map.keys():
-        if not name.isidentifier():
-            continue
-        # For each function, create a simple rule. You can extend this with parameter types later.
-        grammar_lines.append(f"{name}_call: \"{name}\" \"(\" [args] \")\"")
-
+    # Members share keyword terminals, so identical definition lines are emitted once
+    grammar_lines.extend(dict.fromkeys(line for text in rules.values() for line in text.split("\n")))
     grammar_lines.extend([
         "",
-        "args: value (\",\" value)*",
+        # Any argument list: positional values, then `name=value` keywords
+        "args: value (\",\" value)* (\",\" kwarg)* | kwarg (\",\" kwarg)*",
+        "kwarg: NAME \"=\" value",
         "value: ESCAPED_STRING | SIGNED_NUMBER | NAME",
         "",
         "%import common.ESCAPED_STRING",
         "%import common.SIGNED_NUMBER",
+        "%import common.SIGNED_INT",
         "%import common.CNAME -> NAME",
         "%import common.WS",
         "%ignore WS"
     ])
 
-    return "\n".join(grammar_lines)def _extract_module_functions(self, module):
+    return "\n".join(grammar_lines)
+
+
+TYPED_GRAMMAR_MAX_MEMBERS = 64  # beyond this, typed rules make an LALR parser take seconds to build
+
+
+def typed_rules(typed, members):
     """
-    Extracts top-level functions from a module using inspect,
-    and returns a dict of function names to their signatures as strings.
-    Includes basic error handling for signature extraction.
+    Resolves a `typed` argument: None means typed rules only for API maps of at most
+    TYPED_GRAMMAR_MAX_MEMBERS members (slices, small modules).
     """
-    function_signatures = {}
-    # Iterate through members, checking if they are functions/builtins
-    for name, obj in inspect.getmembers(module):
-        if isinstance(obj, (types.FunctionType, types.BuiltinFunctionType)):
+    return members <= TYPED_GRAMMAR_MAX_MEMBERS if typed is None else typed
+
+
+def convert_to_lark_grammar(api_map, typed=None):
+    """
+    Convert the API map into a Lark-compatible grammar.
+    This is the same (or similar to) the routine we developed earlier.
+    With typed=True each member's arguments follow its signature (see lark_args_rules);
+    typed=False gives every member the generic `args` rule, which compiles much faster
+    for big APIs. The default picks typed rules for small maps only (see typed_rules).
+    """
+    rule_names = lark_rule_names(name for name in api_map.keys() if is_api_name(name))
+    typed = typed_rules(typed, len(rule_names))
+    rules = {rule: lark_call_rule(name, rule, api_map[name] if typed else None)
+             for name, rule in rule_names.items()}
+    return assemble_lark_grammar(rules)
+
+
+# --- Sandboxed Introspection ---
+# Purpose: Introspect libraries whose import is slow, leaks memory or crashes, without risking the host.
+# Strength: Imports happen in a reusable worker subprocess (this file, run as a script) with CPU and
+#           memory limits; a failing library costs one worker restart, and the failure is remembered.
+# Limitation: Worker results are plain API maps (JSON); anything needing live objects in the host
+#             (e.g. Gadget.module) still requires importing the library there.
+
+SYS_PATH_ENV = "INSPECTOR_GADGET_SYS_PATH"
+PACKAGE_PARENT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STDERR_TAIL = 2000  # characters of a failed worker's stderr quoted in the error
+INSPECTION_KINDS = ("functions", "classes", "methods")
+
+
+class IntrospectionError(ImportError):
+    """
+    Raised when a sandboxed worker could not introspect a target: its import or extraction
+    raised, the worker crashed, ran out of CPU time or memory, or timed out.
+    """
+
+
+def _inspect_target(target, kind):
+    # Runs in the worker: "pkg.mod" for functions/classes, "pkg.mod:Class" for methods
+    module_name, _, attribute = target.partition(":")
+    obj = importlib.import_module(module_name)
+    for part in filter(None, attribute.split(".")):
+        obj = getattr(obj, part)
+    if kind == "functions":
+        return extract_module_functions(obj)
+    if kind == "classes":
+        return extract_module_classes(obj)
+    if kind == "methods":
+        return extract_class_methods(obj)
+    raise ValueError(f"Unknown introspection kind {kind!r}")
+
+
+def _inspection_worker(cpu_seconds, memory_mb):
+    """
+    Main loop of a sandboxed worker: reads {"id", "target", "kind"} requests as JSON lines on
+    stdin and answers each with {"id", "api_map"} or {"id", "error"} on stdout.
+    """
+    protocol = os.fdopen(os.dup(1), "w")
+    os.dup2(2, 1)  # whatever libraries print goes to stderr, not into the protocol stream
+    sys.stdout = sys.stderr
+    if resource is not None and memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    protocol.write(json.dumps({"ready": True}) + "\n")  # started: later failures are the target's
+    protocol.flush()
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        if resource is not None and cpu_seconds:
+            # RLIMIT_CPU counts the worker's whole life: give each request its own allowance
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+            soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds
+            resource.setrlimit(resource.RLIMIT_CPU, (soft if hard == resource.RLIM_INFINITY else min(soft, hard), hard))
+        try:
+            reply = {"id": request["id"], "api_map": _inspect_target(request["target"], request["kind"])}
+        except BaseException as e:
+            reply = {"id": request["id"], "error": f"{type(e).__name__}: {e}"}
+        protocol.write(json.dumps(reply) + "\n")
+        protocol.flush()
+
+
+class _InspectionWorker:
+    # One worker subprocess and the number of requests it has served. Replies carry
+    # "target_failure": True when the failure is the target's (its import or inspection raised,
+    # or the worker died inspecting it), False for timeouts and worker startup or protocol errors.
+    def __init__(self, cpu_seconds, memory_mb):
+        # Run as a module of the package (not as a script), so its relative imports resolve
+        env = dict(os.environ, **{SYS_PATH_ENV: json.dumps(sys.path)})
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [PACKAGE_PARENT, os.environ.get("PYTHONPATH")]))
+        self.stderr = tempfile.TemporaryFile()  # a file, not a pipe: a chatty import can't block on it
+        self.stderr_start = 0  # size of the stderr file when the current request began
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", __name__, "--worker", str(cpu_seconds or 0), str(memory_mb or 0)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=self.stderr, env=env, text=True)
+        self.started = False
+        self.served = 0
+
+    def _stderr_size(self):
+        return os.fstat(self.stderr.fileno()).st_size
+
+    def _stderr_tail(self):
+        # What the worker wrote to stderr since the current request began (its last STDERR_TAIL
+        # bytes); read with pread, since seeking would move the worker's shared write offset
+        try:
+            end = self._stderr_size()
+            start = max(self.stderr_start, end - STDERR_TAIL)
+            tail = os.pread(self.stderr.fileno(), end - start, start).decode(errors="replace").strip()
+        except (OSError, ValueError):
+            return ""
+        return f"; stderr: {tail}" if tail else ""
+
+    def _readline(self, timeout):
+        # The next protocol line, "" if the worker died, None on timeout
+        ready, _, _ = select.select([self.process.stdout], [], [], timeout)
+        if not ready:
+            return None
+        return self.process.stdout.readline()
+
+    def _died(self, doing):
+        code = self.process.wait()
+        reason = f"killed by {signal.Signals(-code).name}" if code < 0 else f"exited with code {code}"
+        return f"worker {reason} {doing}{self._stderr_tail()}"
+
+    def request(self, target, kind, timeout):
+        if not self.started:
+            line = self._readline(timeout)
+            if not line:
+                error = self._died("while starting") if line == "" else f"worker did not start in {timeout}s"
+                self.close()
+                return {"error": error, "target_failure": False}
+            self.started = True
+        self.stderr_start = self._stderr_size()
+        self.served += 1
+        self.process.stdin.write(json.dumps({"id": self.served, "target": target, "kind": kind}) + "\n")
+        self.process.stdin.flush()
+        line = self._readline(timeout)
+        if line is None:
+            self.close()
+            return {"error": f"timed out after {timeout}s", "target_failure": False}
+        if not line:
+            return {"error": self._died("(crash, CPU or memory limit)"), "target_failure": True}
+        try:
+            reply = json.loads(line)
+        except ValueError:
+            return {"error": f"unreadable worker reply {line[:200]!r}{self._stderr_tail()}", "target_failure": False}
+        if "error" in reply:
+            reply["target_failure"] = True
+        return reply
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def close(self):
+        if self.alive():
+            self.process.kill()
+        self.process.wait()
+        for stream in (self.process.stdin, self.process.stdout, self.stderr):
             try:
-                # Attempt to get the signature
-                signature = inspect.signature(obj)
-                function_signatures[name] = str(signature)
-            except (ValueError, TypeError) as e:
-                # If signature can't be retrieved (e.g., some C extensions),
-                # store a placeholder or skip. Let's store a placeholder.
-                # print(f"Could not get signature for {name}: {e}")
-                function_signatures[name] = "(*args, **kwargs)" # Placeholder
-            except Exception as e:
-                # Catch any other unexpected errors during inspection
-                print(f"Unexpected error inspecting {name}: {e}")
-                continue # Skip this member
-    return function_signatures
+                stream.close()
+            except OSError:
+                pass
 
 
-def _extract_module_classes(self, module):
+class SubprocessInspector:
     """
-    Extracts top-level classes from a module using inspect,
-    and returns a dict of class names to their signatures as strings.
+    Introspection backend that imports targets in a pool of reusable worker subprocesses, as the
+    throwaway examples/_temp_*_inspect.py scripts did by hand, and returns their API maps.
+
+    Each request gets cpu_seconds of CPU time and the worker's address space is capped at
+    memory_mb (POSIX rlimits); the host waits at most timeout seconds for an answer. A worker is
+    replaced after any failure and after max_requests requests, so leaks from earlier imports
+    don't pile up. Failures of the target itself (its import or inspection raised, or it
+    crashed the worker) are cached on disk against the target's source fingerprint (see
+    cache.module_fingerprint) and raised again without a retry until the library changes;
+    timeouts and worker startup or protocol errors are not cached.
     """
-    class_signatures = {}
-    for name, obj in inspect.getmembers(module):
-        if isinstance(obj, type):
+    def __init__(self, workers=1, cpu_seconds=60, memory_mb=4096, timeout=120.0, max_requests=50, cache_dir=None):
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.timeout = timeout
+        self.max_requests = max_requests
+        self.cache_dir = cache_dir
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(workers)
+        self._lock = threading.Lock()
+        self._failures = None
+
+    def extract(self, target, kind="functions"):
+        """
+        Returns the API map of the given kind ("functions", "classes", or "methods" for a
+        "pkg.mod:Class" target) extracted in a worker. Raises IntrospectionError on failure.
+        """
+        key = f"{kind}:{target}"
+        fingerprint = self._fingerprint(target)
+        failure = self.failures().get(key)
+        if failure is not None and failure["fingerprint"] == fingerprint:
+            raise IntrospectionError(f"{target} failed to introspect before: {failure['error']}")
+
+        with self._slots:
+            with self._lock:
+                worker = self._idle.pop() if self._idle else None
+            if worker is None or not worker.alive():
+                worker = _InspectionWorker(self.cpu_seconds, self.memory_mb)
+            reply = worker.request(target, kind, self.timeout)
+            if "error" in reply or worker.served >= self.max_requests or not worker.alive():
+                worker.close()
+            else:
+                with self._lock:
+                    self._idle.append(worker)
+
+        if "error" in reply:
+            if reply.get("target_failure"):
+                self._remember_failure(key, fingerprint, reply["error"])
+            raise IntrospectionError(f"Could not introspect {target}: {reply['error']}")
+        return reply["api_map"]
+
+    def _fingerprint(self, target):
+        from .cache import module_fingerprint
+
+        try:
+            return module_fingerprint(target.partition(":")[0])
+        except (ModuleNotFoundError, OSError):
+            return None
+
+    def _failures_path(self):
+        from .cache import default_cache_dir
+
+        return os.path.join(self.cache_dir or default_cache_dir(), "inspection_failures.json")
+
+    def failures(self):
+        """
+        Returns the negative cache: {"kind:target": {"fingerprint": ..., "error": ...}}.
+        """
+        if self._failures is None:
             try:
-                # Attempt to get the signature
-                signature = inspect.signature(obj)
-                class_signatures[name] = str(signature)
-            except (ValueError, TypeError) as e:
-                # If signature can't be retrieved (e.g., some C extensions),
-                # store a placeholder or skip. Let's store a placeholder.
-                # print(f"Could not get signature for {name}: {e}")
-                class_signatures[name] = "(*args, **kwargs)" # Placeholder
-            except Exception as e:
-                print(f"Unexpected error inspecting {name}: {e}")
+                with open(self._failures_path()) as f:
+                    self._failures = json.load(f)
+            except (OSError, ValueError):
+                self._failures = {}
+        return self._failures
+
+    def _remember_failure(self, key, fingerprint, error):
+        self.failures()[key] = {"fingerprint": fingerprint, "error": error}
+        self._save_failures()
+
+    def forget_failures(self, target=None):
+        """
+        Drops cached failures (for target only, if given) so they are retried.
+        """
+        failures = self.failures()
+        for key in [key for key in failures if target is None or key.partition(":")[2] == target]:
+            del failures[key]
+        self._save_failures()
+
+    def _save_failures(self):
+        path = self._failures_path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.failures(), f, indent=1, sort_keys=True)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not save introspection failures: {e}")
+
+    def close(self):
+        """
+        Stops the idle workers.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
 
-def convert_to_lark_grammar(api_map):
+@lru_cache(maxsize=None)
+def default_inspector():
     """
-    Convert the API map into a Lark-compatible grammar.
-    This is the same (or similar to) the routine we developed earlier.
+    Returns the process-wide SubprocessInspector, whose workers are stopped at exit.
     """
-    grammar_lines = [
-        "start: statement+",
-        "",
-        "statement: " + " | ".join(f"{name}_call" for name in api_map.keys() if name.isidentifier()),
-        ""
-    ]
+    inspector = SubprocessInspector()
+    atexit.register(inspector.close)
+    return inspector
 
-    for name in api_map.keys():
-        if not name.isidentifier():
-            continue
-        # For each function, create a simple rule. You can extend this with parameter types later.
-        grammar_lines.append(f"{name}_call: \"{name}\" \"(\" [args] \")\"")
 
-    grammar_lines.extend([
-        "",
-        "args: value (\",\" value)*",
-        "value: ESCAPED_STRING | SIGNED_NUMBER | NAME",
-        "",
-        "%import common.ESCAPED_STRING",
-        "%import common.SIGNED_NUMBER",
-        "%import common.CNAME -> NAME",
-        "%import common.WS",
-        "%ignore WS"
-    ])
+def sandboxed_extract_functions(module_name):
+    """
+    extract_module_functions, run in a sandboxed worker (see SubprocessInspector).
+    """
+    return default_inspector().extract(module_name, "functions")
+
+
+def sandboxed_extract_classes(module_name):
+    """
+    extract_module_classes, run in a sandboxed worker (see SubprocessInspector).
+    """
+    return default_inspector().extract(module_name, "classes")
+
 
-    return "\n".join(grammar_lines)
\ No newline at end of file
+if __name__ == "__main__" and sys.argv[1:2] == ["--worker"]:
+    sys.path[:] = json.loads(os.environ.get(SYS_PATH_ENV, "[]")) or sys.path[1:]
+    _inspection_worker(int(sys.argv[2]), int(sys.argv[3]))
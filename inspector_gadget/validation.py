@@ -0,0 +1,338 @@
+import ast
+import json
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import lark
+
+from . import tracing
+from .grammars import default_grammar_cache
+from .utils import convert_to_lark_grammar, parse_signature
+
+
+# --- Code Validation ---
+# Purpose: Check generated snippets (e.g. best-of-n candidates) against the gadget's grammar and
+#          the API's signatures before anything runs them.
+# Strength: Cheapest checks first (ast.parse in C, then Signature.bind per call, then the Lark
+#           parse of the API calls), results memoized per snippet text, the compiled parser
+#           shared through the grammar cache, and batches fanned out over a pool with an
+#           early exit.
+# Limitation: Static: calls are checked by argument shape (count, names) and literal values,
+#             not by computed values, and calls through variables (obj.method()) aren't
+#             matched to the API.
+
+SERIAL_THRESHOLD = 256  # below this many candidates a process pool costs more than it saves
+CHUNK_CANDIDATES = 64
+STAGES = ("syntax", "signature", "grammar")
+
+
+class ValidationResult:
+    """
+    The outcome of validating one candidate: valid, the stage that rejected it (one of STAGES,
+    None when valid), the error messages, and the call sites found ((name, line, column),
+    names resolved through the snippet's imports, API members by their API map key).
+    """
+    __slots__ = ("index", "code", "valid", "stage", "errors", "calls")
+
+    def __init__(self, index, code, valid, stage, errors, calls):
+        self.index = index
+        self.code = code
+        self.valid = valid
+        self.stage = stage
+        self.errors = errors
+        self.calls = calls
+
+    def __repr__(self):
+        status = "valid" if self.valid else f"invalid at {self.stage}: {self.errors[0]}"
+        return f"ValidationResult({self.index}, {status}, calls={[call[0] for call in self.calls]!r})"
+
+
+def _dotted_name(expr):
+    parts = []
+    while isinstance(expr, ast.Attribute):
+        parts.append(expr.attr)
+        expr = expr.value
+    if not isinstance(expr, ast.Name):
+        return None
+    parts.append(expr.id)
+    return ".".join(reversed(parts))
+
+
+def _literal_source(expr):
+    # An argument as the grammar sees it: literals as written, anything else as a variable
+    if isinstance(expr, ast.UnaryOp) and isinstance(expr.op, ast.USub):
+        operand = _literal_source(expr.operand)
+        return "-" + operand if operand[:1].isdigit() else "_"
+    if isinstance(expr, ast.Constant):
+        value = expr.value
+        if isinstance(value, str):
+            return json.dumps(value)
+        if value is None or isinstance(value, (bool, int, float)):
+            return repr(value)
+    return "_"
+
+
+def _unpacks(node):
+    return any(isinstance(arg, ast.Starred) for arg in node.args) or any(kw.arg is None for kw in node.keywords)
+
+
+def _call_source(name, node):
+    # The call rewritten in the grammar's form: `name(arg, ..., keyword=arg)`
+    args = [_literal_source(arg) for arg in node.args]
+    args.extend(f"{kw.arg}={_literal_source(kw.value)}" for kw in node.keywords)
+    return f"{name}({', '.join(args)})"
+
+
+class CodeValidator:
+    """
+    Validates snippets against an API map ({name: signature}) and its Lark grammar (default:
+    convert_to_lark_grammar(api_map)), in three stages:
+
+        syntax     ast.parse
+        signature  every call to an API member binds to its signature (Signature.bind on
+                   placeholders), and no call names a member the API doesn't have
+        grammar    the grammar's parser (from the grammar cache) accepts every API call,
+                   each rewritten as `name(args)` with its literal arguments as written
+                   and any other argument as a variable
+
+    Only the calls go through the grammar, so imports, assignments and other code around
+    them pass. Calls resolve through the snippet's imports; with module_name (the module the
+    API map's keys are relative to, e.g. "networkx"), `nx.path_graph(...)` after
+    `import networkx as nx` is checked as the member "path_graph".
+
+    check_grammar=False skips the last stage. Results are memoized per snippet text
+    (cache_size entries), so repeated candidates cost a lookup.
+    """
+    def __init__(self, api_map, grammar=None, check_grammar=True, grammar_cache=None, cache_size=4096,
+                 module_name=None):
+        self.api_map = api_map
+        self._grammar = grammar
+        self.check_grammar = check_grammar
+        self.grammar_cache = grammar_cache
+        self.cache_size = cache_size
+        self.module_name = module_name
+        self.roots = {name.partition(".")[0] for name in api_map}
+        # Namespaces of the relative keys ("" for top-level members): `module.<namespace>.x`
+        # calls that miss the API are reported, other dotted names may be submodules it skips
+        self.namespaces = {name.rpartition(".")[0] for name in api_map}
+        if module_name:
+            self.roots.add(module_name.partition(".")[0])
+        self._signatures = {}
+        self._results = OrderedDict()  # code -> (valid, stage, errors, calls)
+        self._parser = None
+
+    @classmethod
+    def from_gadget(cls, gadget, **options):
+        options.setdefault("module_name", gadget.name)
+        return cls(gadget.api_map, gadget.grammar, **options)
+
+    @property
+    def grammar(self):
+        if self._grammar is None:
+            self._grammar = convert_to_lark_grammar(self.api_map)
+        return self._grammar
+
+    @property
+    def parser(self):
+        if self._parser is None:
+            self._parser = (self.grammar_cache or default_grammar_cache()).parser(self.grammar)
+        return self._parser
+
+    def warm(self):
+        """
+        Compiles (or loads from the grammar cache) the parser ahead of the first validation.
+        """
+        if self.check_grammar:
+            self.parser
+
+    def _signature(self, name):
+        if name not in self._signatures:
+            self._signatures[name] = parse_signature(self.api_map[name])
+        return self._signatures[name]
+
+    def validate(self, code, index=0):
+        """
+        Validates one snippet and returns its ValidationResult.
+        """
+        outcome = self._results.get(code)
+        tracing.count("validation_cache", result="miss" if outcome is None else "hit")
+        if outcome is None:
+            outcome = self._results[code] = self._check(code)
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        else:
+            try:
+                self._results.move_to_end(code)
+            except KeyError:
+                pass  # evicted by another thread meanwhile
+        return ValidationResult(index, code, *outcome)
+
+    def _check(self, code):
+        try:
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError) as e:
+            return False, "syntax", [f"line {getattr(e, 'lineno', '?')}: {getattr(e, 'msg', e)}"], []
+
+        aliases = {}
+        calls, errors, api_calls = [], [], []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        aliases[alias.asname] = alias.name
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                for alias in node.names:
+                    aliases[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+            elif isinstance(node, ast.Call):
+                name = _dotted_name(node.func)
+                if name is None:
+                    continue
+                head, _, rest = name.partition(".")
+                if head in aliases:
+                    name = aliases[head] + ("." + rest if rest else "")
+                key = self._member(name)
+                calls.append((key or name, node.lineno, node.col_offset))
+                error = self._check_call(name, key, node)
+                if error is not None:
+                    errors.append(f"line {node.lineno}: {error}")
+                elif key is not None and self.check_grammar and not _unpacks(node):
+                    api_calls.append((node.lineno, _call_source(key, node)))
+        calls.sort(key=lambda call: call[1:])
+        if errors:
+            return False, "signature", errors, calls
+
+        if api_calls:
+            errors = self._check_grammar(sorted(api_calls))
+            if errors:
+                return False, "grammar", errors, calls
+        return True, None, [], calls
+
+    def _member(self, name):
+        # The API map key a resolved call name refers to, or None when it isn't an API member
+        if name in self.api_map:
+            return name
+        prefix = f"{self.module_name}."
+        if self.module_name and name.startswith(prefix) and name[len(prefix):] in self.api_map:
+            return name[len(prefix):]
+        return None
+
+    def _check_grammar(self, api_calls):
+        try:
+            self.parser.parse("\n".join(source for _, source in api_calls))
+            return []
+        except lark.exceptions.LarkError:
+            pass
+        # Rare path: parse the calls one by one to name the ones the grammar rejects
+        errors = []
+        for lineno, source in api_calls:
+            try:
+                self.parser.parse(source)
+            except lark.exceptions.LarkError as e:
+                message = str(e).strip().split("\n")[0]
+                errors.append(f"line {lineno}: {source} is outside the grammar: {message}")
+        return errors or ["the API calls are outside the grammar"]
+
+    def _check_call(self, name, key, node):
+        if key is None:
+            prefix = f"{self.module_name}."
+            if self.module_name and name.startswith(prefix):
+                if name[len(prefix):].rpartition(".")[0] in self.namespaces:
+                    return f"{name} is not in the API"
+            elif name.partition(".")[0] in self.roots and "." in name:
+                return f"{name} is not in the API"
+            return None
+        signature = self._signature(key)
+        if signature is None or _unpacks(node):
+            return None  # *args / **kwargs at the call site: the shape isn't known statically
+        try:
+            signature.bind(*node.args, **{kw.arg: kw.value for kw in node.keywords})
+        except TypeError as e:
+            return f"{key}{signature}: {e}"
+        return None
+
+    def validate_many(self, candidates, workers=None, first_valid=False, pool="process",
+                      chunk_size=CHUNK_CANDIDATES):
+        """
+        Validates candidates and returns their ValidationResults in order. Batches of
+        chunk_size go to a pool of `workers` processes (pool="thread" for threads; default
+        os.cpu_count()); workers=1 and short lists run in-process.
+
+        With first_valid, stops at the first valid candidate (by position): the results end
+        with it (or cover every candidate if none is valid) and pending batches are cancelled.
+        """
+        with tracing.span("validation.batch", pool=pool) as step:
+            results = self._validate_many(list(candidates), workers, first_valid, pool, chunk_size)
+            if tracing.enabled():
+                step.set(checked=len(results), valid=sum(result.valid for result in results))
+        return results
+
+    def _validate_many(self, candidates, workers, first_valid, pool, chunk_size):
+        workers = workers or os.cpu_count() or 1
+        results = []
+        if workers == 1 or len(candidates) < SERIAL_THRESHOLD:
+            for index, code in enumerate(candidates):
+                results.append(self.validate(code, index))
+                if first_valid and results[-1].valid:
+                    break
+            return results
+
+        self.warm()  # compiled once here, so process workers load it from the disk cache
+        if pool == "thread":
+            executor = ThreadPoolExecutor(max_workers=workers)
+            task = self._validate_chunk
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                           initargs=(dict(self.api_map.items()), self.grammar, self.check_grammar,
+                                                     self.module_name))
+            task = _validate_chunk
+        pending = deque()
+        chunks = ((start, candidates[start:start + chunk_size]) for start in range(0, len(candidates), chunk_size))
+        try:
+            for start, chunk in chunks:
+                pending.append(executor.submit(task, start, chunk))
+                if len(pending) >= 2 * workers and self._collect(pending.popleft(), results, first_valid):
+                    return results
+            while pending:
+                if self._collect(pending.popleft(), results, first_valid):
+                    return results
+            return results
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _collect(self, future, results, first_valid):
+        # Appends a batch's results (up to the first valid one with first_valid); True to stop
+        for index, code, outcome in future.result():
+            results.append(ValidationResult(index, code, *outcome))
+            if first_valid and outcome[0]:
+                return True
+        return False
+
+    def _validate_chunk(self, start, chunk):
+        outcomes = []
+        for index, code in enumerate(chunk, start):
+            result = self.validate(code, index)
+            outcomes.append((index, code, (result.valid, result.stage, result.errors, result.calls)))
+        return outcomes
+
+    def first_valid(self, candidates, **options):
+        """
+        Returns the ValidationResult of the first valid candidate, or None.
+        """
+        results = self.validate_many(candidates, first_valid=True, **options)
+        return results[-1] if results and results[-1].valid else None
+
+
+_worker_validator = None
+
+
+def _init_worker(api_map, grammar, check_grammar, module_name):
+    global _worker_validator
+    _worker_validator = CodeValidator(api_map, grammar, check_grammar, module_name=module_name)
+
+
+def _validate_chunk(start, chunk):
+    # Process pool entry point
+    return _worker_validator._validate_chunk(start, chunk)